@@ -0,0 +1,3 @@
+from covidnpi.cli import main
+
+main()
@@ -0,0 +1,282 @@
+import datetime as dt
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import typer
+
+from covidnpi.score.fields import return_dict_fields
+from covidnpi.score.interventions import return_dict_interventions
+from covidnpi.score.islas import return_dict_islas
+from covidnpi.score.items import return_dict_items
+from covidnpi.score.rollup import return_dict_rollup
+from covidnpi.store_cases import main as store_cases
+from covidnpi.utils.cases import LINK_CASES, return_cases_repository
+from covidnpi.utils.config import load_config
+from covidnpi.utils.dictionaries import store_dict_scores, update_keep_old_keys
+from covidnpi.utils.log import logger
+from covidnpi.utils.metrics import count_rows
+from covidnpi.utils.preprocess import read_npi_and_build_dict
+from covidnpi.utils.regions import extend_regions
+from covidnpi.utils.snapshot import ENV_OFFLINE, ENV_SNAPSHOT, store_snapshot
+from covidnpi.utils.synthetic import (
+    DATE_START,
+    generate_cases_csv,
+    generate_npi_folder,
+    generate_taxonomy,
+    list_synthetic_regions,
+    return_dict_synthetic_regions,
+)
+from covidnpi.utils.taxonomy import return_taxonomy
+from covidnpi.web.datastore import return_cases_documents, return_scores_documents
+
+
+def time_stage(
+    list_stage: List[Dict], name: str, func, *args, repeat: int = 1, **kwargs
+):
+    """Runs `func(*args, **kwargs)` `repeat` times, appends its timings to
+    `list_stage` and returns the output of the last run"""
+    list_time = []
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        output = func(*args, **kwargs)
+        list_time.append(time.perf_counter() - time_start)
+    dict_stage = {
+        "stage": name,
+        "rows": count_rows(output),
+        "time": min(list_time),
+        "time_mean": float(np.mean(list_time)),
+        "times": list_time,
+    }
+    logger.info(f"{name:<30} {dict_stage['time']:>10.3f} s {dict_stage['rows']:>10}")
+    list_stage.append(dict_stage)
+    return output
+
+
+def run_store_cases(link: str, **kwargs) -> pd.DataFrame:
+    """Runs `store_cases` from scratch, as the cases repository is shared by all
+    the runs, and returns the daily cases"""
+    return_cases_repository(link=link).invalidate()
+    return store_cases(link=link, **kwargs).matrix_normed()
+
+
+def run_benchmark(
+    path_work: Path,
+    path_config: Path,
+    num_regions: int = None,
+    num_years: int = 1,
+    num_measures: int = 100,
+    seed: int = 0,
+    repeat: int = 1,
+) -> Dict:
+    """Generates synthetic data in `path_work` and times each stage of the
+    pipeline on it. The synthetic cases are stored as the snapshot of
+    `LINK_CASES`, and the benchmark runs offline, so the network is never used.
+    Synthetic regions get a code and population, so every stage processes them.
+    Returns a dictionary with the parameters and the timings"""
+    path_raw = path_work / "datos_NPI"
+    path_taxonomy = path_work / "taxonomy.xlsx"
+    path_cases = path_work / "cases.csv"
+    path_snapshot = path_work / "snapshots"
+    path_output = path_work / "output"
+    path_output.mkdir(parents=True, exist_ok=True)
+
+    # Synthetic data
+    generate_taxonomy(str(path_taxonomy))
+    generate_npi_folder(
+        str(path_raw),
+        num_regions=num_regions,
+        num_years=num_years,
+        num_measures=num_measures,
+        seed=seed,
+    )
+    generate_cases_csv(
+        str(path_cases), num_regions=num_regions, num_years=num_years, seed=seed
+    )
+    store_snapshot(LINK_CASES, str(path_cases), path_snapshot=str(path_snapshot))
+    dict_regions = return_dict_synthetic_regions(num_regions)
+
+    list_stage = []
+    # Some stages write auxiliary files in the relative path "output"
+    path_cwd = os.getcwd()
+    os.chdir(path_work)
+    # Remote sources are read only from the snapshots of `path_work`
+    dict_environ = {key: os.environ.get(key) for key in [ENV_OFFLINE, ENV_SNAPSHOT]}
+    os.environ.update({ENV_OFFLINE: "1", ENV_SNAPSHOT: str(path_snapshot)})
+    try:
+        # Synthetic regions are processed as provinces, with their code and population
+        with extend_regions(dict_regions):
+            dict_interventions = time_stage(
+                list_stage,
+                "read_npi_and_build_dict",
+                read_npi_and_build_dict,
+                path_data=str(path_raw),
+                path_taxonomy=str(path_taxonomy),
+                repeat=repeat,
+            )
+            dict_scores = time_stage(
+                list_stage,
+                "return_dict_interventions",
+                return_dict_interventions,
+                dict_interventions,
+                path_taxonomy=str(path_taxonomy),
+                repeat=repeat,
+            )
+            dict_items = time_stage(
+                list_stage,
+                "return_dict_items",
+                return_dict_items,
+                dict_scores,
+                repeat=repeat,
+            )
+            dict_field = time_stage(
+                list_stage,
+                "return_dict_fields",
+                return_dict_fields,
+                dict_items,
+                path_taxonomy=str(path_taxonomy),
+                repeat=repeat,
+            )
+            dict_islas = time_stage(
+                list_stage,
+                "return_dict_islas",
+                return_dict_islas,
+                dict_field,
+                repeat=repeat,
+            )
+            dict_field = update_keep_old_keys(dict_field, dict_islas)
+            time_stage(
+                list_stage,
+                "return_dict_rollup",
+                return_dict_rollup,
+                dict_field,
+                repeat=repeat,
+            )
+            time_stage(
+                list_stage,
+                "store_dict_scores",
+                store_dict_scores,
+                dict_field,
+                path_output=str(path_output / "score_field"),
+                repeat=repeat,
+            )
+            time_stage(
+                list_stage,
+                "store_cases",
+                run_store_cases,
+                path_output=str(path_output),
+                path_config=str(path_config),
+                link=LINK_CASES,
+                repeat=repeat,
+            )
+            # Datastore documents, without the mongo server
+            date_min = dt.datetime.strptime(DATE_START, "%Y-%m-%d")
+            list_field = (
+                return_taxonomy(path_taxonomy=str(path_taxonomy))["ambito"]
+                .unique()
+                .tolist()
+            )
+            time_stage(
+                list_stage,
+                "return_scores_documents",
+                return_scores_documents,
+                path_output / "score_field",
+                list_field,
+                date_min,
+                repeat=repeat,
+            )
+            days = load_config(str(path_config), key="cases")["movavg"]
+            time_stage(
+                list_stage,
+                "return_cases_documents",
+                return_cases_documents,
+                path_output,
+                days,
+                date_min,
+                repeat=repeat,
+            )
+    finally:
+        os.chdir(path_cwd)
+        for key, value in dict_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    return {
+        "date": dt.datetime.now().isoformat(timespec="seconds"),
+        "parameters": {
+            "num_regions": len(list_synthetic_regions(num_regions)),
+            "num_years": num_years,
+            "num_measures": num_measures,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "stages": list_stage,
+        "total": sum(d["time"] for d in list_stage),
+    }
+
+
+def main(
+    path_json: str = "benchmark.json",
+    path_work: str = "benchmark",
+    path_config: str = "covidnpi/config.toml",
+    num_regions: int = None,
+    num_years: int = 1,
+    num_measures: int = 100,
+    seed: int = 0,
+    repeat: int = 1,
+):
+    """Benchmarks the stringency pipeline on synthetic data: NPI workbooks,
+    taxonomy and cases are generated in `path_work`, and each stage is timed.
+    It runs offline, remote sources are replaced by snapshots of synthetic data.
+    The results are stored in `path_json`, so that different runs can be compared
+
+    Parameters
+    ----------
+    path_json : str, optional
+        Path to the json where the results are stored, by default "benchmark.json"
+    path_work : str, optional
+        Folder where the synthetic data and outputs are stored, by default "benchmark"
+    path_config : str, optional
+        Config file, by default "covidnpi/config.toml"
+    num_regions : int, optional
+        Number of regions, by default all the regions of Spain. Synthetic regions
+        are added when it is bigger
+    num_years : int, optional
+        Years covered by the data, by default 1
+    num_measures : int, optional
+        Interventions per region and year, by default 100
+    seed : int, optional
+        Random seed of the synthetic data, by default 0
+    repeat : int, optional
+        Number of runs of each stage, the minimum time is reported, by default 1
+
+    """
+    dict_benchmark = run_benchmark(
+        Path(path_work).resolve(),
+        Path(path_config).resolve(),
+        num_regions=num_regions,
+        num_years=num_years,
+        num_measures=num_measures,
+        seed=seed,
+        repeat=repeat,
+    )
+    with open(path_json, "w") as f:
+        json.dump(dict_benchmark, f, indent=2)
+    logger.info(f"Benchmark stored in {path_json}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
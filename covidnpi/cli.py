@@ -0,0 +1,111 @@
+import importlib
+import sys
+from typing import List
+
+# Subcommands of the `covidnpi` entry point {command: (module, function, help)}
+# Modules are imported only when their command runs, so that the entry point
+# starts fast and each command loads only its own dependencies
+DICT_COMMANDS = {
+    "pipeline": (
+        "covidnpi.pipeline",
+        "main",
+        "Update all the data of the web, running independent stages concurrently",
+    ),
+    "score": (
+        "covidnpi.store_stringency_scores",
+        "main",
+        "Preprocess the raw NPI data and score interventions, items and fields",
+    ),
+    "preprocess": (
+        "covidnpi.utils.preprocess",
+        "main",
+        "Preprocess the raw NPI data",
+    ),
+    "interventions": (
+        "covidnpi.score.interventions",
+        "main",
+        "Score the preprocessed interventions",
+    ),
+    "items": ("covidnpi.score.items", "main", "Score the items"),
+    "fields": ("covidnpi.score.fields", "main", "Score the fields of activity"),
+    "cases": ("covidnpi.store_cases", "main", "Store the cases of each province"),
+    "mobility": (
+        "covidnpi.utils.mobility",
+        "mobility_report_to_csv",
+        "Store the Google mobility reports of each province",
+    ),
+    "combine": (
+        "covidnpi.utils.combine",
+        "combine_csv_field",
+        "Combine the field scores of every province in one csv",
+    ),
+    "initialize-web": (
+        "covidnpi.initialize_web",
+        "main",
+        "Store the data in mongo and generate the json files of the web",
+    ),
+    "datastore": ("covidnpi.web.datastore", "datastore", "Store the data in mongo"),
+    "generate-json": (
+        "covidnpi.web.generate_json",
+        "generate_json",
+        "Generate the json files listing provinces and fields",
+    ),
+    "static-json": (
+        "covidnpi.web.static_json",
+        "store_static_json",
+        "Store the payloads of the web API as static json files",
+    ),
+    "benchmark": (
+        "covidnpi.benchmark",
+        "main",
+        "Time the stages of the pipeline on synthetic data",
+    ),
+    "synthetic": (
+        "covidnpi.utils.synthetic",
+        "main",
+        "Generate synthetic NPI data, taxonomy and cases",
+    ),
+}
+
+
+def print_usage():
+    """Prints the list of commands"""
+    width = max(len(command) for command in DICT_COMMANDS)
+    list_lines = [
+        "Usage: covidnpi COMMAND [OPTIONS]",
+        "",
+        "Run `covidnpi COMMAND --help` to see the options of a command.",
+        "",
+        "Commands:",
+    ]
+    list_lines += [
+        f"  {command:<{width}}  {value[2]}" for command, value in DICT_COMMANDS.items()
+    ]
+    print("\n".join(list_lines))
+
+
+def main(argv: List[str] = None):
+    """Entry point of `covidnpi`: runs the command given in the first argument,
+    with the rest of arguments as its options"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if (len(argv) == 0) or (argv[0] in ["-h", "--help"]):
+        print_usage()
+        return
+    command = argv[0]
+    try:
+        module, function, _ = DICT_COMMANDS[command]
+    except KeyError:
+        print_usage()
+        print(f"\nError: No such command '{command}'.", file=sys.stderr)
+        sys.exit(2)
+
+    import typer
+
+    app = typer.Typer(add_completion=False)
+    app.command()(getattr(importlib.import_module(module), function))
+    app(args=argv[1:], prog_name=f"covidnpi {command}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 import typer
 
 from covidnpi.utils.taxonomy import PATH_TAXONOMY
-from covidnpi.web.datastore import datastore
-from covidnpi.web.generate_json import generate_json
 
 
 def main(
@@ -12,10 +10,14 @@ def main(
     path_json_provincia: str = "output/provinces.json",
     path_json_fields: str = "output/fields.json",
     free_memory: bool = False,
+    compact: bool = False,
+    static_json: bool = False,
+    path_static: str = "output/api",
 ):
     """Runs all the process needed to initalize the web:
     - Store the data in mongo
     - Generate the json files listing both the provinces and fields
+    - (Optional) Store the web payloads as static json files
 
     Parameters
     ----------
@@ -31,19 +33,34 @@ def main(
         Path where the fields json is stored, must end in a file with json format
     free_memory : bool, optional
         If True, free the memory of the database before loading new data, by default False
+    compact : bool, optional
+        If True, store the series in mongo as float32 binary arrays, by default False
+    static_json : bool, optional
+        If True, store the payloads of the web API as static json files, compressed
+        with gzip (and brotli, if installed), by default False
+    path_static : str, optional
+        Folder where the static json files are stored, by default "output/api"
 
     """
+    # Each step loads its own dependencies
+    from covidnpi.web.datastore import datastore
+    from covidnpi.web.generate_json import generate_json
+    from covidnpi.web.static_json import store_static_json
+
     datastore(
         path_output=path_output,
         path_taxonomy=path_taxonomy,
         path_config=path_config,
         free_memory=free_memory,
+        compact=compact,
     )
     generate_json(
         path_config=path_config,
         path_json_fields=path_json_fields,
         path_json_provincia=path_json_provincia,
     )
+    if static_json:
+        store_static_json(path_config=path_config, path_static=path_static)
 
 
 if __name__ == "__main__":
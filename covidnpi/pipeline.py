@@ -0,0 +1,268 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple
+
+import typer
+
+from covidnpi.utils.log import logger
+from covidnpi.utils.snapshot import set_offline
+from covidnpi.utils.taxonomy import PATH_TAXONOMY
+
+
+class Stage(NamedTuple):
+    """Stage of the pipeline: `func` is called with `kwargs`, plus the outputs
+    of other stages given by `inputs` {argument: stage}. The stage runs after
+    the stages in `inputs` and `requires` have finished"""
+
+    func: Callable
+    kwargs: Dict = {}
+    inputs: Dict[str, str] = {}
+    requires: tuple = ()
+
+    def dependencies(self) -> set:
+        return set(self.requires) | set(self.inputs.values())
+
+
+def sort_stages(dict_stages: Dict[str, Stage]) -> List[str]:
+    """Returns the names of the stages in an order that respects their
+    dependencies. Raises ValueError if a dependency is missing or there is a cycle"""
+    for name, stage in dict_stages.items():
+        missing = stage.dependencies() - set(dict_stages)
+        if len(missing) > 0:
+            raise ValueError(f"Stage '{name}' depends on missing stages: {missing}")
+    list_sorted = []
+    pending = dict(dict_stages)
+    while len(pending) > 0:
+        list_ready = [
+            name
+            for name, stage in pending.items()
+            if stage.dependencies() <= set(list_sorted)
+        ]
+        if len(list_ready) == 0:
+            raise ValueError(f"Stages with cyclic dependencies: {', '.join(pending)}")
+        for name in list_ready:
+            list_sorted.append(name)
+            pending.pop(name)
+    return list_sorted
+
+
+def _run_stage(func: Callable, kwargs: Dict):
+    """Runs a stage, returning its output and wall time. Used by the workers"""
+    time_start = time.perf_counter()
+    output = func(**kwargs)
+    return output, time.perf_counter() - time_start
+
+
+def run_pipeline(dict_stages: Dict[str, Stage], n_jobs: int = 1) -> Dict:
+    """Runs the stages of the pipeline, each one as soon as its dependencies
+    have finished. With `n_jobs` > 1, independent stages run concurrently in a
+    pool of processes; the outputs passed between stages are sent in memory.
+    When a stage fails, the stages depending on it are skipped, the rest go on
+
+    Parameters
+    ----------
+    dict_stages : Dict[str, Stage]
+        Stages of the pipeline {name: stage}
+    n_jobs : int, optional
+        Number of processes, by default 1 (all stages run in this process)
+
+    Returns
+    -------
+    Dict
+        Outputs of the stages {name: output}
+
+    Raises
+    ------
+    RuntimeError
+        If any stage failed, once the rest have finished
+
+    """
+    list_sorted = sort_stages(dict_stages)
+    dict_output = {}
+    dict_time = {}
+    list_failed = []
+
+    def kwargs_of(name: str) -> Dict:
+        stage = dict_stages[name]
+        kwargs = dict(stage.kwargs)
+        kwargs.update({arg: dict_output[dep] for arg, dep in stage.inputs.items()})
+        return kwargs
+
+    def is_blocked(name: str) -> bool:
+        return any(dep in list_failed for dep in dict_stages[name].dependencies())
+
+    def finish(name: str, func: Callable):
+        try:
+            dict_output[name], dict_time[name] = func()
+            logger.info(f"Stage '{name}' finished in {dict_time[name]:.1f} s")
+        except Exception as er:
+            logger.error(f"Stage '{name}' failed: {er!r}")
+            list_failed.append(name)
+
+    if n_jobs <= 1:
+        for name in list_sorted:
+            if is_blocked(name):
+                logger.error(f"Stage '{name}' skipped: its dependencies failed")
+                list_failed.append(name)
+                continue
+            logger.info(f"Stage '{name}' started")
+            finish(name, lambda: _run_stage(dict_stages[name].func, kwargs_of(name)))
+    else:
+        pending = list(list_sorted)
+        running = {}
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            while (len(pending) > 0) or (len(running) > 0):
+                # Submit the stages whose dependencies have finished
+                for name in list(pending):
+                    if is_blocked(name):
+                        logger.error(f"Stage '{name}' skipped: its dependencies failed")
+                        list_failed.append(name)
+                        pending.remove(name)
+                    elif dict_stages[name].dependencies() <= set(dict_output):
+                        logger.info(f"Stage '{name}' started")
+                        future = executor.submit(
+                            _run_stage, dict_stages[name].func, kwargs_of(name)
+                        )
+                        running[future] = name
+                        pending.remove(name)
+                if len(running) == 0:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result)
+
+    if len(list_failed) > 0:
+        raise RuntimeError(f"Stages failed: {', '.join(list_failed)}")
+    logger.info(f"Pipeline finished: {sum(dict_time.values()):.1f} s of stages")
+    return dict_output
+
+
+def return_update_stages(
+    path_raw: str = "datos_NPI",
+    path_taxonomy: str = PATH_TAXONOMY,
+    path_output: str = "output",
+    list_config: List[str] = None,
+    free_memory: bool = False,
+) -> Dict[str, Stage]:
+    """Returns the stages that update the data of the web (see update.sh):
+    - npi: preprocess and score the interventions, see `store_stringency_scores`
+    - cases: store the cases rates, see `store_cases`
+    - mobility: store the mobility reports, using the cases of the stage above
+    - web: store the outputs in mongo, one stage per config file in `list_config`.
+      They write to different databases, so they can run at the same time
+    - json: generate the json files of provinces and fields, shared by all the
+      configs, once the data is in the mongo of the first config
+
+    Only the cases are passed in memory, to the mobility stage. The web stages
+    read the scores and cases from the files in `path_output`, as they store
+    them in mongo as they are written there
+
+    """
+    # Imported here, so the stages are only loaded when the pipeline runs
+    from covidnpi.store_cases import main as store_cases
+    from covidnpi.store_stringency_scores import main as store_stringency_scores
+    from covidnpi.utils.mobility import store_mobility_reports
+    from covidnpi.web.datastore import datastore
+    from covidnpi.web.generate_json import generate_json
+
+    if list_config is None:
+        list_config = ["config.toml"]
+
+    dict_stages = {
+        "npi": Stage(
+            store_stringency_scores,
+            kwargs={
+                "path_raw": path_raw,
+                "path_taxonomy": path_taxonomy,
+                "path_output": path_output,
+                "mobility": False,
+            },
+        ),
+        "cases": Stage(
+            store_cases,
+            kwargs={"path_output": path_output, "path_config": list_config[0]},
+        ),
+        "mobility": Stage(
+            store_mobility_reports,
+            kwargs={"path_output": os.path.join(path_output, "mobility")},
+            inputs={"cases": "cases"},
+        ),
+    }
+    list_web = []
+    for path_config in list_config:
+        name = "web" if len(list_config) == 1 else f"web_{path_config}"
+        dict_stages[name] = Stage(
+            datastore,
+            kwargs={
+                "path_output": path_output,
+                "path_taxonomy": path_taxonomy,
+                "path_config": path_config,
+                "free_memory": free_memory,
+            },
+            requires=("npi", "cases"),
+        )
+        list_web.append(name)
+    # The json files are the same for every config, they are written only once
+    dict_stages["json"] = Stage(
+        generate_json,
+        kwargs={
+            "path_config": list_config[0],
+            "path_json_provincia": os.path.join(path_output, "provinces.json"),
+            "path_json_fields": os.path.join(path_output, "fields.json"),
+        },
+        requires=(list_web[0],),
+    )
+    return dict_stages
+
+
+def main(
+    path_raw: str = "datos_NPI",
+    path_taxonomy: str = PATH_TAXONOMY,
+    path_output: str = "output",
+    path_config: List[str] = None,
+    free_memory: bool = False,
+    n_jobs: int = 4,
+    offline: bool = False,
+):
+    """Updates all the data of the web: scores the NPI, stores the cases and
+    mobility, and loads them in mongo. Independent stages run concurrently
+
+    Parameters
+    ----------
+    path_raw : str, optional
+        Path to raw data, by default "datos_NPI"
+    path_taxonomy : str, optional
+        Path to taxonomy xlsx file, by default `PATH_TAXONOMY`
+    path_output : str, optional
+        Output folder, by default "output"
+    path_config : List[str], optional
+        Config files, the data is loaded in the mongo of each one. Can be given
+        several times, by default ["config.toml"]
+    free_memory : bool, optional
+        If True, free the memory of the databases before loading new data,
+        by default False
+    n_jobs : int, optional
+        Number of processes, by default 4
+    offline : bool, optional
+        If True, the cases and mobility are read from their last snapshot,
+        without using the network, by default False
+
+    """
+    if not path_config:
+        path_config = ["config.toml"]
+    if offline:
+        set_offline()
+    os.makedirs(path_output, exist_ok=True)
+    dict_stages = return_update_stages(
+        path_raw=path_raw,
+        path_taxonomy=path_taxonomy,
+        path_output=path_output,
+        list_config=list(path_config),
+        free_memory=free_memory,
+    )
+    run_pipeline(dict_stages, n_jobs=n_jobs)
+
+
+if __name__ == "__main__":
+    typer.run(main)
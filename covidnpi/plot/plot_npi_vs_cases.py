@@ -7,7 +7,7 @@ import numpy as np
 import pandas as pd
 import typer
 from adjustText import adjust_text
-from covidnpi.utils.cases import load_cases_df, return_cases_of_provincia_normed
+from covidnpi.utils.cases import return_cases_repository
 from covidnpi.utils.fields import list_fields
 from covidnpi.utils.log import logger
 from covidnpi.utils.regions import (
@@ -103,16 +103,11 @@ def dataframe_of_cases_by_date_province() -> pd.DataFrame:
     pd.DataFrame
         Pandas dataframe, index is datetime, columns are provinces codes
     """
-    cases = load_cases_df()
-    # Initialize dictionary of time series
-    dict_ser = {}
-    for _, code in PROVINCIA_LOWER_TO_ISOPROV.items():
-        # cases by province for each 100,000 inhabitants
-        ser = return_cases_of_provincia_normed(cases, code)
-        # Index to datetime
-        ser.index = pd.to_datetime(ser.index)
-        dict_ser.update({code: ser})
-    return pd.DataFrame.from_dict(dict_ser)
+    # cases by province for each 100,000 inhabitants
+    df = return_cases_repository().matrix_normed()
+    # Keep the provinces codes, without repetition
+    list_codes = list(dict.fromkeys(PROVINCIA_LOWER_TO_ISOPROV.values()))
+    return df[list_codes]
 
 
 def dict_of_cases_mean_by_province(
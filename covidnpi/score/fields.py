@@ -1,7 +1,12 @@
+from typing import Dict
+
+import numpy as np
 import pandas as pd
 import typer
+from covidnpi.score.rollup import return_weight_matrix
 from covidnpi.utils.dictionaries import load_dict_scores, store_dict_scores
 from covidnpi.utils.log import logger
+from covidnpi.utils.metrics import Metrics, measure
 from covidnpi.utils.taxonomy import PATH_TAXONOMY, return_item_ponderacion
 
 
@@ -96,33 +101,122 @@ def apply_porcentaje_afectado_to_items(df_item: pd.DataFrame):
     return df_afectado
 
 
-def score_ponderada(df_afectado: pd.DataFrame, path_taxonomy=PATH_TAXONOMY):
-    """Calcula la score de cada ambito a partir de sus item"""
-    ponderacion = return_item_ponderacion(path_taxonomy=path_taxonomy)
-    list_field = ponderacion["ambito"].unique()
-    for field in list_field:
-        pon_sub = ponderacion.query(f"ambito == '{field}'")
-        pesos = pon_sub["ponderacion"].values
-        items = pon_sub["nombre"]
-        df_afectado[field] = (df_afectado[items] * pesos).sum(axis=1).div(pesos.sum())
-        # Max value is 1
-        # assert df_afectado[field].max() <= 1, f"La puntuacion de {field} supera 1"
-    return df_afectado
+def return_field_weights(
+    path_taxonomy: str = PATH_TAXONOMY, ponderacion: pd.DataFrame = None
+) -> pd.DataFrame:
+    """Returns the weight of each item in the score of each field, as a matrix
+    whose rows sum 1. Fields and items keep the order of the taxonomy
+
+    Parameters
+    ----------
+    path_taxonomy : str, optional
+        Path to taxonomy xlsx file, by default `PATH_TAXONOMY`
+    ponderacion : pandas.DataFrame, optional
+        Output of `return_item_ponderacion`, read from `path_taxonomy` if not given
+
+    Returns
+    -------
+    pandas.DataFrame
+        Weights, index are the fields and columns the items
+
+    """
+    if ponderacion is None:
+        ponderacion = return_item_ponderacion(path_taxonomy=path_taxonomy)
+    # Items repeated in a field add their weights
+    pesos = ponderacion.groupby(["ambito", "nombre"], sort=False)["ponderacion"].sum()
+    dict_groups = {}
+    for (field, item), peso in pesos.items():
+        dict_groups.setdefault(field, {})[item] = peso
+    return return_weight_matrix(dict_groups, normalize=True)
+
+
+def score_ponderada(
+    df_afectado: pd.DataFrame,
+    path_taxonomy: str = PATH_TAXONOMY,
+    weights: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """Calcula la score de cada ambito a partir de sus item, como la media
+    ponderada de sus item. Los item sin score cuentan como 0
+
+    Parameters
+    ----------
+    df_afectado : pandas.DataFrame
+        Score of each item, see `apply_porcentaje_afectado_to_items`.
+        The scores of the fields are added to it as columns
+    path_taxonomy : str, optional
+        Path to taxonomy xlsx file, by default `PATH_TAXONOMY`
+    weights : pandas.DataFrame, optional
+        Output of `return_field_weights`, read from `path_taxonomy` if not given
+
+    Returns
+    -------
+    pandas.DataFrame
+        `df_afectado`, with a column per field
+
+    """
+    if weights is None:
+        weights = return_field_weights(path_taxonomy=path_taxonomy)
+    return score_ponderada_batch({None: df_afectado}, weights)[None]
+
+
+def score_ponderada_batch(
+    dict_afectado: dict, weights: pd.DataFrame
+) -> Dict[str, pd.DataFrame]:
+    """Same as `score_ponderada` for all the provinces at once: their items are
+    stacked in a single array, and the scores of every field are computed with
+    one matrix product
+
+    Parameters
+    ----------
+    dict_afectado : dict
+        Contains couples of {provincia: pd.DataFrame of item scores}.
+        The scores of the fields are added to them as columns
+    weights : pandas.DataFrame
+        Output of `return_field_weights`
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        Contains couples of {provincia: pd.DataFrame of item and field scores}
+
+    """
+    list_item = weights.columns
+    list_df = list(dict_afectado.values())
+    if len(list_df) == 0:
+        return {}
+    arr = np.concatenate([df[list_item].to_numpy(float) for df in list_df])
+    # Items without score count as 0
+    arr_field = np.where(np.isnan(arr), 0.0, arr) @ weights.to_numpy(float).T
+    list_split = np.cumsum([len(df) for df in list_df])[:-1]
+    for df, values in zip(list_df, np.split(arr_field, list_split)):
+        for i, field in enumerate(weights.index):
+            df[field] = values[:, i]
+    return dict_afectado
 
 
 def return_dict_fields(
     dict_items: dict,
     path_taxonomy: str = PATH_TAXONOMY,
     verbose: bool = True,
+    metrics: Metrics = None,
 ) -> dict:
-    dict_field = {}
+    weights = return_field_weights(path_taxonomy=path_taxonomy)
+    dict_afectado = {}
 
     for provincia, df_item in dict_items.items():
         if verbose:
             logger.debug(provincia)
-        df_afectado = apply_porcentaje_afectado_to_items(df_item)
-        df_afectado = score_ponderada(df_afectado, path_taxonomy=path_taxonomy)
-        dict_field.update({provincia: df_afectado.set_index("fecha")})
+        with measure(metrics, "fields", provincia=provincia) as record:
+            df_afectado = apply_porcentaje_afectado_to_items(df_item)
+            record["rows"] = len(df_afectado)
+        dict_afectado.update({provincia: df_afectado})
+
+    # The fields of all the provinces are computed at once
+    dict_afectado = score_ponderada_batch(dict_afectado, weights)
+    dict_field = {
+        provincia: df_afectado.set_index("fecha")
+        for provincia, df_afectado in dict_afectado.items()
+    }
 
     return dict_field
 
@@ -11,7 +11,14 @@ from covidnpi.utils.dictionaries import (
     store_dict_condicion,
 )
 from covidnpi.utils.log import logger
-from covidnpi.utils.taxonomy import return_taxonomy, return_all_interventions
+from covidnpi.utils.metrics import Metrics, measure
+from covidnpi.utils.taxonomy import (
+    LIST_CODIGO_NIVEL_EDUCACION,
+    LIST_NIVEL_EDUCACION,
+    PATH_TAXONOMY,
+    return_all_interventions,
+    return_taxonomy,
+)
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
@@ -87,44 +94,69 @@ def build_condicion_horario(lista_interventions, hora):
     return condicion_compuesta
 
 
-def expand_nivel_educacion(df):
+def expand_nivel_educacion(
+    df: pd.DataFrame, list_codigo: list = None, list_nivel: list = None
+) -> pd.DataFrame:
+    """Appends the initial of the education level to the interventions that
+    apply to different levels (ED.1 in primary school becomes ED.1P).
+    Interventions applying to all levels ("todos") or to no level in particular
+    are repeated once per level in `list_nivel`
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Dataframe of interventions, with columns "codigo" and "nivel_educacion"
+    list_codigo : list, optional
+        Interventions to expand, by default `LIST_CODIGO_NIVEL_EDUCACION`
+    list_nivel : list, optional
+        Initials of the education levels, by default `LIST_NIVEL_EDUCACION`
+
+    Returns
+    -------
+    pandas.DataFrame
+        Expanded dataframe, with a new index. If there is nothing to expand,
+        `df` is returned as it is
+
+    """
+    if list_codigo is None:
+        list_codigo = LIST_CODIGO_NIVEL_EDUCACION
+    if list_nivel is None:
+        list_nivel = LIST_NIVEL_EDUCACION
     # Split the dataframe in two:
     # df_ed contains only the measures that apply to different education levels
     # df_no_ed contains the rest of measures
-    df_ed = df.query(
-        "(codigo == 'ED.1') | (codigo == 'ED.2') | (codigo == 'ED.5')"
-    ).copy()
-    df_no_ed = df.query(
-        "(codigo != 'ED.1') & (codigo != 'ED.2') & (codigo != 'ED.5')"
-    ).copy()
+    mask_ed = df["codigo"].isin(list_codigo).to_numpy()
+    if not mask_ed.any():
+        return df
+    df_ed = df.take(np.flatnonzero(mask_ed))
+    df_no_ed = df.take(np.flatnonzero(~mask_ed))
     try:
-        df_ed["niv_edu"] = (
+        # The column may be categorical, that does not accept the new value "t"
+        niv_edu = (
             df_ed["nivel_educacion"]
+            .astype(object)
             .fillna("t")
-            .str.replace("\d+", "")
+            .str.replace(r"\d+", "", regex=True)
             .str.upper()
             .str[0]
         )
     except AttributeError:
         return df
 
-    df_ed.reset_index(drop=True, inplace=True)
-    drop_idx = []
-
-    mask_edu = df_ed["niv_edu"] == "t"
-
-    for i, row in df_ed[mask_edu].iterrows():
-        drop_idx += [i]
-        for niv_edu in ["B", "U", "I", "P", "S"]:
-            new_row = row.copy()
-            new_row["niv_edu"] = niv_edu
-            df_ed = df_ed.append(new_row)
-
-    df_ed = df_ed.reset_index(drop=True).drop(drop_idx)
-    df_ed["codigo"] = df_ed["codigo"] + df_ed["niv_edu"]
-    df_ed = df_ed.drop(["niv_edu"], axis=1)
+    # Initial "T": "todos" or missing level
+    mask_todos = (niv_edu == "T").to_numpy()
+    idx_todos = np.flatnonzero(mask_todos)
+    idx_nivel = np.flatnonzero(~mask_todos)
+    # Cross join of the rows applying to all levels with the list of levels
+    df_ed = df_ed.take(
+        np.concatenate([idx_nivel, np.repeat(idx_todos, len(list_nivel))])
+    )
+    niv_edu = np.concatenate(
+        [niv_edu.to_numpy()[idx_nivel], np.tile(list_nivel, len(idx_todos))]
+    )
+    df_ed["codigo"] = df_ed["codigo"].astype(str) + niv_edu
 
-    df_expanded = pd.concat([df_ed, df_no_ed])
+    df_expanded = pd.concat([df_ed, df_no_ed], ignore_index=True)
     return df_expanded
 
 
@@ -213,15 +245,21 @@ def add_score_intervention(
     df_score.loc[mask_medio, "score_intervention"] = 0.5
     df_score.loc[mask_alto, "score_intervention"] = 1
 
-    # df_score = expand_nivel_educacion(df_score)
+    # After scoring, so the conditions of the taxonomy apply to ED.1, ED.2, ED.5
+    df_score = expand_nivel_educacion(df_score)
 
     return df_score
 
 
 def pivot_df_score(df_score: pd.DataFrame):
-    df_intervention = df_score[["codigo", "score_intervention"]].pivot(
-        columns="codigo", values="score_intervention"
-    )
+    codigo = df_score["codigo"]
+    # Categorical codes would give a column per category, even if unused
+    if pd.api.types.is_categorical_dtype(codigo):
+        codigo = codigo.cat.remove_unused_categories()
+    df_intervention = pd.DataFrame(
+        {"codigo": codigo, "score_intervention": df_score["score_intervention"]}
+    ).pivot(columns="codigo", values="score_intervention")
+    df_intervention.columns = df_intervention.columns.astype(str)
     df_intervention["fecha"] = df_score["fecha"].reset_index(drop=True)
     df_intervention["porcentaje_afectado"] = (
         df_score["porcentaje_afectado"].fillna(100).reset_index(drop=True)
@@ -262,12 +300,21 @@ def score_interventions(
     return df_score
 
 
-def return_dict_interventions(dict_interventions: dict) -> dict:
+def return_dict_interventions(
+    dict_interventions: dict,
+    path_taxonomy: str = PATH_TAXONOMY,
+    metrics: Metrics = None,
+) -> dict:
     """
 
     Parameters
     ----------
     dict_interventions : dict
+    path_taxonomy : str, optional
+        Path to taxonomy xlsx file, by default `PATH_TAXONOMY`
+    metrics : Metrics, optional
+        If given, the scoring of each province is measured,
+        see `covidnpi.utils.metrics.Metrics`
 
     Returns
     -------
@@ -277,12 +324,14 @@ def return_dict_interventions(dict_interventions: dict) -> dict:
     """
     dict_scores = {}
 
-    taxonomy = return_taxonomy()
-    all_interventions = return_all_interventions()
+    taxonomy = return_taxonomy(path_taxonomy=path_taxonomy)
+    all_interventions = return_all_interventions(path_taxonomy=path_taxonomy)
 
     for provincia, df_sub in dict_interventions.items():
         logger.debug(provincia)
-        df_score = score_interventions(df_sub, taxonomy)
+        with measure(metrics, "interventions", provincia=provincia) as record:
+            df_score = score_interventions(df_sub, taxonomy)
+            record["rows"] = len(df_score)
         # Nos aseguramos de que todas las interventions estan en el df
         interventions_missing = list(set(all_interventions) - set(df_score.columns))
         for m in interventions_missing:
@@ -295,9 +344,12 @@ def return_dict_interventions(dict_interventions: dict) -> dict:
 def main(
     path_interventions: str = "output/interventions",
     path_output: str = "output/interventions",
+    path_taxonomy: str = PATH_TAXONOMY,
 ):
     dict_interventions = load_dict_interventions(path_interventions=path_interventions)
-    dict_scores = return_dict_interventions(dict_interventions)
+    dict_scores = return_dict_interventions(
+        dict_interventions, path_taxonomy=path_taxonomy
+    )
     store_dict_scores(dict_scores, path_output=path_output)
 
 
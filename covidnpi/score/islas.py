@@ -1,7 +1,7 @@
-from functools import reduce
+from typing import Dict
 
 import pandas as pd
-from covidnpi.utils.log import logger
+from covidnpi.score.rollup import return_weight_matrix, rollup_scores
 from covidnpi.utils.regions import ISLA_TO_PERCENTAGE
 
 
@@ -25,40 +25,37 @@ def aggregate_score_isles(dict_islas: dict, dict_field: dict) -> pd.DataFrame:
     KeyError
         If an island is missing
     """
-    list_df = []
     assert sum(dict_islas.values()) == 1, "The percentage does not sum 1"
-    for isle, percentage in dict_islas.items():
-        try:
-            list_df.append(dict_field[isle].copy() * percentage)
-        except KeyError:
+    for isle in dict_islas.keys():
+        if isle not in dict_field:
             raise KeyError(f"Falta la isla: {isle}")
-    return reduce(lambda x, y: x.add(y, fill_value=0), list_df)
+    weights = return_weight_matrix({"isles": dict_islas})
+    return rollup_scores(dict_field, weights)["isles"]
 
 
-def return_dict_islas(dict_field: dict) -> dict:
+def return_dict_islas(
+    dict_field: dict, dict_groups: Dict[str, Dict[str, float]] = None
+) -> dict:
     """Given a dictionary of scores by island, returns a dictionary
-    of scores by group of islands
+    of scores by group of islands. All the groups are computed at once,
+    see `covidnpi.score.rollup.rollup_scores`
 
     Parameters
     ----------
     dict_field : dict
         Contains couples of {island: pd.DataFrame of scores}
+    dict_groups : Dict[str, Dict[str, float]], optional
+        Contains couples of {group of islands: {island: population percentage}},
+        by default `ISLA_TO_PERCENTAGE`
 
     Returns
     -------
     dict
         Contains couples of {group of islands: pd.DataFrame of scores}
     """
-    # Initialize output dictionary
-    dict_ccaa = {}
-    # Ensure the isles of each group are present
-    # If so, perform grouping operation
-    for ccaa, dict_islas in ISLA_TO_PERCENTAGE.items():
-        logger.debug(ccaa)
-        try:
-            df = aggregate_score_isles(dict_islas, dict_field)
-            dict_ccaa.update({ccaa: df})
-        except KeyError as er:
-            logger.error(f"No se pudo calcular {ccaa}. {er}")
-            continue
-    return dict_ccaa
+    if dict_groups is None:
+        dict_groups = ISLA_TO_PERCENTAGE
+    for ccaa, dict_islas in dict_groups.items():
+        assert sum(dict_islas.values()) == 1, f"The percentage of {ccaa} does not sum 1"
+    # Groups with missing isles are logged and skipped
+    return rollup_scores(dict_field, return_weight_matrix(dict_groups))
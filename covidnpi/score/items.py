@@ -6,6 +6,7 @@ import typer
 
 from covidnpi.utils.dictionaries import store_dict_scores, load_dict_scores
 from covidnpi.utils.log import logger
+from covidnpi.utils.metrics import Metrics, measure
 
 
 def items(df: pd.DataFrame):
@@ -112,13 +113,16 @@ def items(df: pd.DataFrame):
 def return_dict_items(
     dict_scores: dict,
     verbose: bool = True,
+    metrics: Metrics = None,
 ) -> dict:
     dict_items = {}
 
     for provincia, df_sub in dict_scores.items():
         if verbose:
             logger.debug(provincia)
-        df_item = items(df_sub)
+        with measure(metrics, "items", provincia=provincia) as record:
+            df_item = items(df_sub)
+            record["rows"] = len(df_item)
         dict_items.update({provincia: df_item.set_index("fecha")})
 
     return dict_items
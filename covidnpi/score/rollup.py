@@ -0,0 +1,277 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from covidnpi.utils.log import logger
+from covidnpi.utils.regions import (
+    ISLA_TO_PERCENTAGE,
+    ISO_NATIONAL,
+    ISOCCAA_TO_CCAA_LOWER,
+    ISOCCAA_TO_ISOPROV,
+    ISOPROV_TO_POBLACION,
+    NATIONAL_LOWER,
+    PROVINCIA_LOWER_TO_ISOPROV,
+)
+
+
+def return_weight_matrix(
+    dict_groups: Dict[str, Dict[str, float]], normalize: bool = False
+) -> pd.DataFrame:
+    """Builds the weight matrix of a rollup, with a row per group and a column
+    per member. Members not belonging to a group have weight 0
+
+    Parameters
+    ----------
+    dict_groups : Dict[str, Dict[str, float]]
+        Contains couples of {group: {member: weight}}
+    normalize : bool, optional
+        If True, the weights of each group are divided by their sum,
+        by default False
+
+    Returns
+    -------
+    pandas.DataFrame
+        Weights, index are the groups and columns the members
+
+    """
+    list_member = list(dict.fromkeys(m for d in dict_groups.values() for m in d))
+    weights = pd.DataFrame(
+        [[d.get(m, 0) for m in list_member] for d in dict_groups.values()],
+        index=list(dict_groups),
+        columns=list_member,
+    )
+    if normalize:
+        weights = weights.div(weights.sum(axis=1), axis=0)
+    return weights.astype(float)
+
+
+def return_population_weights(
+    dict_groups: Dict[str, List[str]], dict_population: Dict[str, float]
+) -> pd.DataFrame:
+    """Builds the weight matrix of a rollup weighted by population: each member
+    weighs its share of the population of the group
+
+    Parameters
+    ----------
+    dict_groups : Dict[str, List[str]]
+        Contains couples of {group: list of members}
+    dict_population : Dict[str, float]
+        Contains couples of {member: population}
+
+    Returns
+    -------
+    pandas.DataFrame
+        Weights, index are the groups and columns the members. Each row sums 1
+
+    """
+    dict_weights = {
+        group: {member: dict_population[member] for member in list_member}
+        for group, list_member in dict_groups.items()
+    }
+    return return_weight_matrix(dict_weights, normalize=True)
+
+
+def union_indexes(list_index: List[pd.Index]) -> pd.Index:
+    """Returns the union of the indexes, sorted unless they are all equal,
+    same as joining them one by one with `pandas.Index.union`"""
+    index = list_index[0]
+    if all(index.equals(other) for other in list_index[1:]):
+        return index
+    index = index.append(list_index[1:]).unique()
+    try:
+        return index.sort_values()
+    except TypeError:
+        return index
+
+
+def return_positions(index: pd.Index, other: pd.Index) -> np.ndarray:
+    """Returns the positions in `index` of the labels of `other`, that must be
+    included in `index`. Sorted indexes are searched with numpy, faster than pandas"""
+    if index.is_monotonic_increasing:
+        return np.searchsorted(index.to_numpy(), other.to_numpy())
+    return index.get_indexer(other)
+
+
+def return_indexer(
+    index: pd.Index, columns: pd.Index, other_index: pd.Index, other_columns: pd.Index
+) -> tuple:
+    """Returns the indexer of the rows `other_index` and columns `other_columns`
+    in an array of rows `index` and columns `columns`"""
+    if index.equals(other_index) and columns.equals(other_columns):
+        return slice(None), slice(None)
+    return np.ix_(
+        return_positions(index, other_index), return_positions(columns, other_columns)
+    )
+
+
+def rollup_scores(
+    dict_scores: Dict[str, pd.DataFrame], weights: pd.DataFrame, average: bool = False
+) -> Dict[str, pd.DataFrame]:
+    """Aggregates the scores of the members of each group, weighted by `weights`.
+    The scores of every member are aligned in a single array, and all the groups
+    are computed at once with a sparse matrix product. By default missing values
+    count as 0, unless they are missing in every member of the group. Each group
+    keeps the dates and columns of its members, as if their frames were added
+    one by one
+
+    Parameters
+    ----------
+    dict_scores : Dict[str, pandas.DataFrame]
+        Contains couples of {member: pd.DataFrame of scores}
+    weights : pandas.DataFrame
+        Weights of each group (rows) and member (columns),
+        see `return_weight_matrix`
+    average : bool, optional
+        If True, returns the weighted average of the members with a value:
+        each value is divided by the weight of the members present in it.
+        By default False, the weighted sum with missing values as 0
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        Contains couples of {group: pd.DataFrame of scores}. Groups with members
+        missing from `dict_scores` are skipped
+
+    """
+    member = weights.columns[(weights != 0).any(axis=0)]
+    missing = member.difference(pd.Index(list(dict_scores.keys())))
+    if len(missing) > 0:
+        mask_missing = (weights[missing] != 0).any(axis=1)
+        for group in weights.index[mask_missing]:
+            list_miss = missing[weights.loc[group, missing] != 0]
+            logger.error(f"No se pudo calcular {group}. Faltan: {', '.join(list_miss)}")
+        weights = weights[~mask_missing]
+        member = weights.columns[(weights != 0).any(axis=0)]
+    if (len(weights) == 0) or (len(member) == 0):
+        return {}
+    weights = weights[member]
+
+    # scipy takes long to import, and only this function needs it
+    from scipy import sparse
+
+    list_df = [dict_scores[m] for m in member]
+    index = union_indexes([df.index for df in list_df])
+    columns = union_indexes([df.columns for df in list_df])
+    # Scores of every member aligned in an array (member, date, column), with
+    # missing values as 0, and the mask of the values that are present
+    arr = np.zeros((len(member), len(index), len(columns)))
+    has_value = np.zeros(arr.shape, dtype=np.int8)
+    for i, df in enumerate(list_df):
+        indexer = return_indexer(index, columns, df.index, df.columns)
+        values = df.to_numpy(float)
+        mask = np.isnan(values)
+        arr[i][indexer] = np.where(mask, 0.0, values)
+        has_value[i][indexer] = ~mask
+
+    # Each group has few members, so the weights are kept as a sparse matrix
+    w = weights.to_numpy(float)
+    w_member = w != 0
+    shape = (len(weights), len(index), len(columns))
+    arr_group = (sparse.csr_matrix(w) @ arr.reshape(len(member), -1)).reshape(shape)
+    # Number of members with a value, to find the values missing in all of them
+    count = sparse.csr_matrix(w_member.astype(np.int32)) @ has_value.reshape(
+        len(member), -1
+    )
+    if average:
+        # Weight of the members with a value, so the missing ones are not 0
+        weight_present = sparse.csr_matrix(w) @ has_value.reshape(len(member), -1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            arr_group /= weight_present.reshape(shape)
+    arr_group[count.reshape(shape) == 0] = np.nan
+
+    dict_group = {}
+    for i, group in enumerate(weights.index):
+        list_group = [df for df, is_member in zip(list_df, w_member[i]) if is_member]
+        index_group = union_indexes([df.index for df in list_group])
+        columns_group = union_indexes([df.columns for df in list_group])
+        indexer = return_indexer(index, columns, index_group, columns_group)
+        dict_group[group] = pd.DataFrame(
+            arr_group[i][indexer], index=index_group, columns=columns_group
+        )
+    return dict_group
+
+
+def return_dict_provincia_scores(dict_field: dict) -> Dict[str, pd.DataFrame]:
+    """Returns the scores of each province by its code. The groups of islands
+    stand for their province, instead of any of its islands
+
+    Parameters
+    ----------
+    dict_field : dict
+        Contains couples of {province or island: pd.DataFrame of scores}
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        Contains couples of {province code: pd.DataFrame of scores}
+
+    """
+    dict_provincia = {}
+    for provincia, code in PROVINCIA_LOWER_TO_ISOPROV.items():
+        if provincia not in dict_field:
+            continue
+        if (code not in dict_provincia) or (provincia in ISLA_TO_PERCENTAGE):
+            dict_provincia[code] = dict_field[provincia]
+    return dict_provincia
+
+
+def return_rollup_weights(list_code: List[str]) -> pd.DataFrame:
+    """Returns the weights of the autonomous communities and the country, each
+    province weighted by its population. Only the provinces in `list_code` are
+    used, the weights of the rest are shared by the provinces available
+
+    Parameters
+    ----------
+    list_code : List[str]
+        Codes of the provinces with scores
+
+    Returns
+    -------
+    pandas.DataFrame
+        Weights, index are the codes of the communities and the country,
+        columns are codes of provinces
+
+    """
+    dict_groups = {}
+    for ccaa, list_provincia in ISOCCAA_TO_ISOPROV.items():
+        list_found = [code for code in list_provincia if code in list_code]
+        if len(list_found) < len(list_provincia):
+            list_miss = sorted(set(list_provincia) - set(list_found))
+            logger.warning(f"{ccaa} is missing provinces: {', '.join(list_miss)}")
+        if len(list_found) > 0:
+            dict_groups[ccaa] = list_found
+    dict_groups[ISO_NATIONAL] = [
+        code for code in ISOPROV_TO_POBLACION.keys() if code in list_code
+    ]
+    return return_population_weights(dict_groups, ISOPROV_TO_POBLACION)
+
+
+def return_dict_rollup(dict_field: dict) -> Dict[str, pd.DataFrame]:
+    """Given a dictionary of scores by province, returns the scores of each
+    autonomous community and of the country, weighted by population. Each date
+    is averaged over the provinces with a value on it, the weights of the rest are
+    shared by them. All of them are computed at once, see `rollup_scores`
+
+    Parameters
+    ----------
+    dict_field : dict
+        Contains couples of {province or island: pd.DataFrame of scores}, with
+        the groups of islands, see `covidnpi.score.islas.return_dict_islas`
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        Contains couples of {community or country: pd.DataFrame of scores},
+        named as in `ISOCCAA_TO_CCAA_LOWER` and `NATIONAL_LOWER`
+
+    """
+    dict_provincia = return_dict_provincia_scores(dict_field)
+    if len(dict_provincia) == 0:
+        logger.error("No provinces found, rollups not computed")
+        return {}
+    weights = return_rollup_weights(list(dict_provincia.keys()))
+    dict_name = dict(ISOCCAA_TO_CCAA_LOWER, **{ISO_NATIONAL: NATIONAL_LOWER})
+    return {
+        dict_name[code]: df
+        for code, df in rollup_scores(dict_provincia, weights, average=True).items()
+    }
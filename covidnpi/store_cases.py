@@ -1,19 +1,16 @@
 from pathlib import Path
 
-import pandas as pd
 import typer
 
-from covidnpi.utils.cases import load_cases_df, return_cases_of_provincia_normed
+from covidnpi.utils.cases import LINK_CASES, return_cases_repository
 from covidnpi.utils.config import load_config
-from covidnpi.utils.series import (
-    compute_growth_rate,
-    compute_logarithmic_growth_rate,
-    cumulative_cases,
-    moving_average,
-)
 
 
-def main(path_output: str = "output", path_config: str = "config.toml"):
+def main(
+    path_output: str = "output",
+    path_config: str = "config.toml",
+    link: str = LINK_CASES,
+):
     """Compute and store the cases rates of each province in Spain
 
     Parameters
@@ -22,50 +19,46 @@ def main(path_output: str = "output", path_config: str = "config.toml"):
         Folder where the results are stored, by default "output"
     path_config : str, optional
         Config file
+    link : str, optional
+        Web link or path to the cases csv, by default `LINK_CASES`
+
+    Returns
+    -------
+    CasesRepository
+        Cases of `link`, with the matrices computed here memoized, see
+        `covidnpi.utils.cases.return_cases_repository`
+
     """
-    # Load the raw cases rates
-    cases = load_cases_df()
+    # Load the raw cases rates, shared with the rest of this process. They are
+    # loaded again if the source has changed since the last call
+    cases = return_cases_repository(link=link)
+    cases.refresh()
     # Change variable to Path type
     path_output = Path(path_output)
     # Get the size of the time window
     cfg_cases = load_config(path_config, key="cases")
     days = cfg_cases["movavg"]
 
-    # Initialize the dictionaries
-    dict_daily = {}
-    dict_acum = {}
-    dict_growth = {}
-    dict_lr = {}
-    dict_mean = {}
-
-    # Loop through each province
-    for provincia in cases["provincia_iso"].dropna().unique():
-        # Compute daily cases
-        try:
-            ser = return_cases_of_provincia_normed(cases, provincia)
-        except KeyError:
-            print(f"-----\nProvincia {provincia} missing from poblacion\n-----")
-            continue
-        dict_daily.update({provincia: ser})
-        # Compute acumulated cases
-        ser_acum = cumulative_cases(ser, days).fillna(0)
-        dict_acum.update({provincia: ser_acum})
-        # Compute the growth rate of cases
-        ser_growth = compute_growth_rate(ser, days).fillna(0)
-        dict_growth.update({provincia: ser_growth})
-        # Compute the logarithmic growth rate of cases
-        ser_lr = compute_logarithmic_growth_rate(ser, days).fillna(0)
-        dict_lr.update({provincia: ser_lr})
-        # Compute the mean cases
-        ser_mean = moving_average(ser, days).fillna(0)
-        dict_mean.update({provincia: ser_mean})
+    # Compute daily cases of all provinces at once
+    df_daily = cases.matrix_normed()
+    # Compute all the rates in one pass, sharing the moving average
+    dict_rates = cases.rates(days)
 
     # Store all cases rates
-    pd.DataFrame(dict_daily).to_csv(path_output / "covid_cases_daily.csv")
-    pd.DataFrame(dict_acum).to_csv(path_output / f"covid_cases_cumulative_{days}.csv")
-    pd.DataFrame(dict_growth).to_csv(path_output / f"covid_growth_rate_{days}.csv")
-    pd.DataFrame(dict_lr).to_csv(path_output / f"covid_growth_rate_log_{days}.csv")
-    pd.DataFrame(dict_mean).to_csv(path_output / f"covid_cases_average_{days}.csv")
+    df_daily.to_csv(path_output / "covid_cases_daily.csv")
+    dict_rates["cumulative"].fillna(0).to_csv(
+        path_output / f"covid_cases_cumulative_{days}.csv"
+    )
+    dict_rates["growth_rate"].fillna(0).to_csv(
+        path_output / f"covid_growth_rate_{days}.csv"
+    )
+    dict_rates["logarithmic_growth_rate"].fillna(0).to_csv(
+        path_output / f"covid_growth_rate_log_{days}.csv"
+    )
+    dict_rates["average"].fillna(0).to_csv(
+        path_output / f"covid_cases_average_{days}.csv"
+    )
+    return cases
 
 
 if __name__ == "__main__":
@@ -5,13 +5,15 @@ import typer
 from covidnpi.score.fields import return_dict_fields
 from covidnpi.score.islas import return_dict_islas
 from covidnpi.score.items import return_dict_items
+from covidnpi.score.rollup import return_dict_rollup
 from covidnpi.score.interventions import return_dict_interventions
 from covidnpi.utils.dictionaries import (
     store_dict_provincia_to_interventions,
     store_dict_scores,
     update_keep_old_keys,
 )
-from covidnpi.utils.log import logger
+from covidnpi.utils.log import data_quality, logger
+from covidnpi.utils.metrics import Metrics, count_rows
 from covidnpi.utils.mobility import mobility_report_to_csv
 from covidnpi.utils.preprocess import read_npi_and_build_dict
 from covidnpi.utils.taxonomy import PATH_TAXONOMY
@@ -21,6 +23,11 @@ def main(
     path_raw: str = "datos_NPI",
     path_taxonomy: str = PATH_TAXONOMY,
     path_output: str = "output",
+    n_jobs: int = 1,
+    path_metrics: str = None,
+    path_report: str = None,
+    verbose: bool = False,
+    mobility: bool = True,
 ):
     """Reads the raw data stored in `path_raw`, preprocess and scores it, while storing
     all the results in `path_output`. An additional path to the taxonomy xlsx file
@@ -34,56 +41,113 @@ def main(
         Path to taxonomy xlsx file, by default `PATH_TAXONOMY`
     path_output : str, optional
         Output folder, by default "output"
+    n_jobs : int, optional
+        Number of processes used to store the mobility data, by default 1
+    path_metrics : str, optional
+        JSON-lines file where the time, CPU time, process peak RSS and rows of each
+        stage and province are stored, by default `path_output`/metrics.jsonl
+    path_report : str, optional
+        JSON-lines file where the data quality issues of the raw data are stored,
+        by default `path_output`/data_quality.jsonl
+    verbose : bool, optional
+        Log every data quality issue, instead of a summary per file,
+        by default False
+    mobility : bool, optional
+        Store the mobility data, by default True. `covidnpi.pipeline` stores it
+        in a separate stage
 
     """
-    logger.debug(f"Reading raw data from {path_raw}")
-    dict_interventions = read_npi_and_build_dict(
-        path_data=path_raw, path_taxonomy=path_taxonomy
-    )
-
     # Build output path
     if not os.path.exists(path_output):
         os.mkdir(path_output)
 
+    if path_metrics is None:
+        path_metrics = os.path.join(path_output, "metrics.jsonl")
+    metrics = Metrics(path_metrics)
+    if path_report is None:
+        path_report = os.path.join(path_output, "data_quality.jsonl")
+    data_quality.configure(path_report=path_report, verbose=verbose)
+
+    logger.debug(f"Reading raw data from {path_raw}")
+    with metrics.measure("read_npi_and_build_dict") as record:
+        dict_interventions = read_npi_and_build_dict(
+            path_data=path_raw, path_taxonomy=path_taxonomy, metrics=metrics
+        )
+        record["rows"] = count_rows(dict_interventions)
+    logger.debug(f"Data quality issues have been stored in {path_report}")
+
     path_interventions = os.path.join(path_output, "interventions")
-    store_dict_provincia_to_interventions(
-        dict_interventions, path_output=path_interventions
-    )
+    with metrics.measure("store_interventions"):
+        store_dict_provincia_to_interventions(
+            dict_interventions, path_output=path_interventions
+        )
     logger.debug(
         f"The processed interventions have been stored in {path_interventions}\n\n...\n\n"
         f"Next step is to score each intervention."
     )
 
-    dict_scores = return_dict_interventions(dict_interventions)
+    with metrics.measure("return_dict_interventions") as record:
+        dict_scores = return_dict_interventions(
+            dict_interventions, path_taxonomy=path_taxonomy, metrics=metrics
+        )
+        record["rows"] = count_rows(dict_scores)
     path_interventions = os.path.join(path_output, "interventions")
-    store_dict_scores(dict_scores, path_output=path_interventions)
+    with metrics.measure("store_scores"):
+        store_dict_scores(dict_scores, path_output=path_interventions)
     logger.debug(
         "The score of each intervention per province has been stored in "
         f"{path_interventions}\n\n...\n\nNext step is to score the items."
     )
 
-    dict_items = return_dict_items(dict_scores)
+    with metrics.measure("return_dict_items") as record:
+        dict_items = return_dict_items(dict_scores, metrics=metrics)
+        record["rows"] = count_rows(dict_items)
     path_items = os.path.join(path_output, "items")
-    store_dict_scores(dict_items, path_output=path_items)
+    with metrics.measure("store_items"):
+        store_dict_scores(dict_items, path_output=path_items)
     logger.debug(
         "The score of each item per province has been stored in "
         f"{path_items}\n\n...\n\nNext step is to score the fields of activity."
     )
 
-    dict_field = return_dict_fields(dict_items, path_taxonomy=path_taxonomy)
-    dict_islas = return_dict_islas(dict_field)
+    with metrics.measure("return_dict_fields") as record:
+        dict_field = return_dict_fields(
+            dict_items, path_taxonomy=path_taxonomy, metrics=metrics
+        )
+        record["rows"] = count_rows(dict_field)
+    with metrics.measure("return_dict_islas") as record:
+        dict_islas = return_dict_islas(dict_field)
+        record["rows"] = count_rows(dict_islas)
     dict_field = update_keep_old_keys(dict_field, dict_islas)
     path_score_field = os.path.join(path_output, "score_field")
-    store_dict_scores(dict_field, path_output=path_score_field)
-
+    with metrics.measure("store_fields"):
+        store_dict_scores(dict_field, path_output=path_score_field)
     logger.debug(
         "The score of each field per province has been stored in "
-        f"{path_score_field}\n\n...\n\nNext step is to compute the mobility data."
+        f"{path_score_field}\n\n...\n\nNext step is to roll them up by community."
+    )
+
+    with metrics.measure("return_dict_rollup") as record:
+        dict_rollup = return_dict_rollup(dict_field)
+        record["rows"] = count_rows(dict_rollup)
+    path_score_rollup = os.path.join(path_output, "score_rollup")
+    with metrics.measure("store_rollup"):
+        store_dict_scores(dict_rollup, path_output=path_score_rollup)
+
+    logger.debug(
+        "The score of each field per community and country has been stored in "
+        f"{path_score_rollup}\n"
     )
 
-    path_mobility = os.path.join(path_output, "mobility")
-    mobility_report_to_csv(path_output=path_mobility)
-    logger.debug(f"Mobility data has been stored in {path_mobility}\n")
+    if mobility:
+        logger.debug("...\n\nNext step is to compute the mobility data.")
+        path_mobility = os.path.join(path_output, "mobility")
+        with metrics.measure("mobility_report_to_csv"):
+            mobility_report_to_csv(path_output=path_mobility, n_jobs=n_jobs)
+        logger.debug(f"Mobility data has been stored in {path_mobility}\n")
+
+    metrics.log_summary()
+    logger.debug(f"Metrics have been stored in {path_metrics}")
 
 
 if __name__ == "__main__":
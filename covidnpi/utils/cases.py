@@ -1,28 +1,61 @@
-import datetime as dt
+import os
 import warnings
+from typing import Dict
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 from covidnpi.utils.log import logger
 from covidnpi.utils.regions import (
     ISOPROV_REASSIGN,
     ISOPROV_TO_POBLACION,
     ISOPROV_TO_PROVINCIA,
 )
+from covidnpi.utils.rho import compute_rho_matrix
+from covidnpi.utils.series import compute_rates_matrix
+from covidnpi.utils.snapshot import fetch_snapshot, is_remote, return_snapshot_path
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 
+LINK_CASES = "https://cnecovid.isciii.es/covid19/resources/casos_tecnica_provincia.csv"
+
+LIST_CASES_COLUMNS = ["provincia_iso", "fecha", "num_casos"]
+
+
+def format_cases_chunk(cases: pd.DataFrame) -> pd.DataFrame:
+    """Formats a chunk of the cases csv in place: dates are parsed with a fixed
+    format, province codes are reassigned and stored as categories, and the number
+    of cases is stored as float32, so that every chunk has the same types whether
+    it has missing values or not"""
+    cases["fecha"] = pd.to_datetime(cases["fecha"], format="%Y-%m-%d")
+    # Correct some abbreviations
+    cases["provincia_iso"] = (
+        cases["provincia_iso"]
+        .fillna("Desconocido")
+        .replace(ISOPROV_REASSIGN)
+        .astype("category")
+    )
+    cases["num_casos"] = cases["num_casos"].astype("float32")
+    return cases
+
+
 def load_cases_df(
-    link: str = "https://cnecovid.isciii.es/covid19/resources/"
-    "casos_tecnica_provincia.csv",
+    link: str = LINK_CASES,
+    chunksize: int = None,
 ) -> pd.DataFrame:
-    """Loads a dataframe containing the number of COVID cases by day and province
+    """Loads a dataframe containing the number of COVID cases by day and province.
+    Only the columns "provincia_iso", "fecha" and "num_casos" are read
 
     Parameters
     ----------
     link : str, optional
-        Web link
+        Web link or path to a local csv. Web links are read from their local
+        snapshot, that is only downloaded again when the file has changed,
+        see `covidnpi.utils.snapshot.fetch_snapshot`
+    chunksize : int, optional
+        If given, the csv is read and formatted in chunks of this number of rows,
+        to not saturate the memory. By default the whole file is read at once
 
     Returns
     -------
@@ -32,30 +65,38 @@ def load_cases_df(
     """
     logger.debug("Loading cases data")
 
-    def dateparse(x):
-        """This function is used to parse the dates of cases"""
-        return dt.datetime.strptime(x, "%Y-%m-%d")
-
-    cases = pd.read_csv(
-        link,
-        parse_dates=["fecha"],
-        date_parser=dateparse,
+    reader = pd.read_csv(
+        fetch_snapshot(link),
+        usecols=LIST_CASES_COLUMNS,
+        dtype={"provincia_iso": str, "fecha": str},
         keep_default_na=False,
         na_values=["NC"],
+        chunksize=chunksize,
     )
-    # Correct some abbreviations
-    cases["provincia_iso"] = (
-        cases["provincia_iso"].fillna("Desconocido").replace(ISOPROV_REASSIGN)
-    )
+    if chunksize is None:
+        cases = format_cases_chunk(reader)
+    else:
+        list_chunks = [format_cases_chunk(chunk) for chunk in reader]
+        # Categories may differ between chunks, so we join them before merging,
+        # sorted as when the file is read at once
+        provincia_iso = union_categoricals(
+            [chunk.pop("provincia_iso") for chunk in list_chunks],
+            sort_categories=True,
+        )
+        cases = pd.concat(list_chunks, ignore_index=True)
+        del list_chunks
+        cases.insert(0, "provincia_iso", provincia_iso)
+    cases = cases[LIST_CASES_COLUMNS]
 
+    list_codes = set(cases["provincia_iso"].cat.categories)
     # List abbreviations not appearing in province codes
-    list_miss = set(cases["provincia_iso"].unique()) - set(ISOPROV_TO_PROVINCIA.keys())
+    list_miss = list_codes - set(ISOPROV_TO_PROVINCIA.keys())
     if len(list_miss) > 0:
         logger.warning(
             f"The following codes are not assigned to any province: {','.join(list_miss)}"
         )
     # List provinces not appearing in cases
-    list_miss = set(ISOPROV_TO_PROVINCIA.keys()) - set(cases["provincia_iso"].unique())
+    list_miss = set(ISOPROV_TO_PROVINCIA.keys()) - list_codes
     if len(list_miss) > 0:
         logger.warning(f"The following provinces are missing: {','.join(list_miss)}")
 
@@ -118,3 +159,194 @@ def return_cases_of_provincia_normed(
     series = return_cases_of_provincia(cases, code)
     pob = ISOPROV_TO_POBLACION[code]
     return per_inhabitants * series / pob
+
+
+def return_cases_matrix(cases: pd.DataFrame) -> pd.DataFrame:
+    """Return the total cases of COVID per date (rows) and province (columns),
+    pivoting the cases dataframe only once
+
+    Parameters
+    ----------
+    cases : pandas.DataFrame
+        The dataframe returned by load_cases_df
+
+    Returns
+    -------
+    pandas.DataFrame
+        Total cases of COVID, index is datetime, columns are provinces codes in
+        the order they appear in `cases`. Missing dates are filled with NaN
+
+    """
+    df = cases.pivot(index="fecha", columns="provincia_iso", values="num_casos")
+    df.columns = df.columns.astype(str)
+    # Provinces in the order they appear in the source, pivot sorts them
+    df = df[cases["provincia_iso"].dropna().unique().astype(str)]
+    # Fill missing dates with NaN
+    idx = pd.date_range(df.index.min(), df.index.max())
+    df = df.reindex(idx, fill_value=np.nan)
+    return df.rename_axis(index=None, columns=None)
+
+
+def return_cases_matrix_normed(
+    cases: pd.DataFrame,
+    per_inhabitants: int = 100000,
+) -> pd.DataFrame:
+    """Return the cases of COVID per date (rows) and province (columns),
+    per N inhabitants. Provinces without population are dropped
+
+    Parameters
+    ----------
+    cases : pandas.DataFrame
+        The dataframe returned by load_cases_df
+    per_inhabitants : int, optional
+        Normalization value, N, by default 100,000
+
+    Returns
+    -------
+    pandas.DataFrame
+        Cases of COVID per N inhabitants, index is datetime,
+        columns are provinces codes
+
+    """
+    return normalize_cases_matrix(
+        return_cases_matrix(cases), per_inhabitants=per_inhabitants
+    )
+
+
+def normalize_cases_matrix(
+    df: pd.DataFrame, per_inhabitants: int = 100000
+) -> pd.DataFrame:
+    """Divides the output of `return_cases_matrix` by the population of each
+    province, see `return_cases_matrix_normed`"""
+    pob = pd.Series(ISOPROV_TO_POBLACION)
+    list_miss = df.columns.difference(pob.index)
+    if len(list_miss) > 0:
+        logger.warning(
+            f"The following codes are missing from poblacion: {','.join(list_miss)}"
+        )
+        df = df.drop(columns=list_miss)
+    return per_inhabitants * df / pob[df.columns]
+
+
+class CasesRepository:
+    """Cases of COVID loaded once from `link`, a web link or the path to a local
+    snapshot of the csv. The matrices derived from them are computed on first
+    use and memoized, so every consumer shares them: do not modify the frames
+    returned. They are cleared when the file read is replaced, for instance when
+    a newer snapshot is downloaded. Call `refresh` to revalidate the snapshot
+    with the server
+
+    Examples
+    --------
+    >>> cases = return_cases_repository()
+    >>> df_daily = cases.matrix_normed()
+    >>> df_growth = cases.rates(7)["growth_rate"]
+    >>> cases.refresh()  # Downloads the csv again if it has changed
+
+    """
+
+    def __init__(self, link: str = LINK_CASES, per_inhabitants: int = 100000):
+        self.link = link
+        self.per_inhabitants = per_inhabitants
+        self.dict_cache = {}
+        # Identifies the file the memoized data was loaded from
+        self.stamp_loaded = None
+
+    def stamp(self) -> tuple:
+        """Returns the path, modification time and size of the file read: the
+        local snapshot of web links, or the path itself. None if it is missing"""
+        path_file = (
+            return_snapshot_path(self.link) if is_remote(self.link) else self.link
+        )
+        try:
+            stat = os.stat(path_file)
+        except OSError:
+            return None
+        return str(path_file), stat.st_mtime_ns, stat.st_size
+
+    def check_stamp(self):
+        """Clears the memoized data if the file read has been replaced"""
+        if (len(self.dict_cache) > 0) and (self.stamp() != self.stamp_loaded):
+            logger.debug(f"Cases in {self.link} have changed, loading them again")
+            self.invalidate()
+
+    def refresh(self):
+        """Revalidates the snapshot of the cases with the server, so it is
+        downloaded again if it has changed, and clears the memoized data if so.
+        See `covidnpi.utils.snapshot.fetch_snapshot`"""
+        if len(self.dict_cache) > 0:
+            fetch_snapshot(self.link)
+        self.check_stamp()
+
+    def _memoize(self, key, func):
+        """Returns the value stored in `key`, computing it with `func` if missing"""
+        self.check_stamp()
+        try:
+            return self.dict_cache[key]
+        except KeyError:
+            value = func()
+            self.dict_cache[key] = value
+            return value
+
+    def invalidate(self):
+        """Clears the memoized data, so it is loaded again on next use"""
+        self.dict_cache = {}
+
+    def __getstate__(self) -> dict:
+        # The raw cases are not sent to other processes, the matrices suffice
+        state = dict(self.__dict__)
+        state["dict_cache"] = {
+            key: value for key, value in self.dict_cache.items() if key != "cases"
+        }
+        return state
+
+    def _load_cases(self) -> pd.DataFrame:
+        cases = load_cases_df(link=self.link)
+        self.stamp_loaded = self.stamp()
+        return cases
+
+    def cases(self) -> pd.DataFrame:
+        """Cases by day and province, see `load_cases_df`"""
+        return self._memoize("cases", self._load_cases)
+
+    def matrix(self) -> pd.DataFrame:
+        """Total cases by date and province, see `return_cases_matrix`"""
+        return self._memoize("matrix", lambda: return_cases_matrix(self.cases()))
+
+    def matrix_normed(self) -> pd.DataFrame:
+        """Cases per N inhabitants by date and province,
+        see `return_cases_matrix_normed`"""
+        return self._memoize(
+            "matrix_normed",
+            lambda: normalize_cases_matrix(
+                self.matrix(), per_inhabitants=self.per_inhabitants
+            ),
+        )
+
+    def rates(self, days: int) -> Dict[str, pd.DataFrame]:
+        """Cumulative cases, moving average, growth rate and logarithmic growth
+        rate of the normed cases, see `covidnpi.utils.series.compute_rates_matrix`"""
+        return self._memoize(
+            ("rates", days), lambda: compute_rates_matrix(self.matrix_normed(), days)
+        )
+
+    def rho(self, days: int = 7) -> pd.DataFrame:
+        """Rho of the normed cases, see `covidnpi.utils.rho.compute_rho_matrix`"""
+        return self._memoize(
+            ("rho", days), lambda: compute_rho_matrix(self.matrix_normed(), days=days)
+        )
+
+
+# Repositories shared by all the consumers {link: repository}
+DICT_CASES_REPOSITORY = {}
+
+
+def return_cases_repository(link: str = LINK_CASES) -> CasesRepository:
+    """Returns the repository of the cases in `link`, shared by all the calls
+    in this process"""
+    try:
+        return DICT_CASES_REPOSITORY[link]
+    except KeyError:
+        repository = CasesRepository(link=link)
+        DICT_CASES_REPOSITORY[link] = repository
+        return repository
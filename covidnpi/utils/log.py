@@ -1,5 +1,9 @@
+import json
 import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
 
+import numpy as np
 import pandas as pd
 
 
@@ -52,36 +56,160 @@ console_handler.setFormatter(my_formatter)
 logger.addHandler(console_handler)
 
 
+class DataQualityReport:
+    """Collects the rows of the NPI data with unexpected values. The rows are
+    grouped by file, column and issue, and each group is stored as one record
+    in a JSON-lines file, if given. While reading a file, only a summary of it
+    is logged as a warning, unless `verbose` is True. Outside of a file each
+    record is logged as a warning when added
+
+    Examples
+    --------
+    >>> data_quality.configure("output/data_quality.jsonl")
+    >>> with data_quality.file("Medidas_andalucia.xlsx"):
+    ...     df = read_npi_data("datos_NPI/Medidas_andalucia.xlsx")
+    ...     data_quality.add(df, list_idx, "hora", "missing", "Lost values")
+    >>> data_quality.summary()
+
+    """
+
+    def __init__(
+        self, path_report: str = None, verbose: bool = False, max_examples: int = 5
+    ):
+        self.configure(
+            path_report=path_report, verbose=verbose, max_examples=max_examples
+        )
+
+    def configure(
+        self, path_report: str = None, verbose: bool = False, max_examples: int = 5
+    ):
+        """Clears the report and changes its settings. `max_examples` is the
+        number of values of each record that are stored and logged"""
+        self.path_report = path_report
+        self.verbose = verbose
+        self.max_examples = max_examples
+        self.records: List[Dict] = []
+        self.name_file = None
+        self.dict_pending = {}
+        # Start a new file in each run
+        if path_report is not None:
+            open(path_report, "w").close()
+
+    @staticmethod
+    def format_record(record: Dict) -> str:
+        rows = ", ".join(str(row) for row in record["rows"][:10])
+        if record["count"] > 10:
+            rows += ", ..."
+        examples = ", ".join(record["examples"])
+        return (
+            f"{record['message']}: {record['count']} rows ({rows}). "
+            f"Values: {examples}"
+        )
+
+    def add(
+        self,
+        df: pd.DataFrame,
+        list_idx: Iterable,
+        col: str,
+        issue: str,
+        message: str,
+    ):
+        """Adds the rows `list_idx` of `df` to the record of column `col` and
+        `issue` ("type", "value", "missing"...). The index of `df` must be the
+        original one, the rows are reported as they appear in the spreadsheet"""
+        list_idx = pd.Index(list_idx)
+        if len(list_idx) == 0:
+            return
+        key = (col, issue)
+        record = self.dict_pending.get(key)
+        if record is None:
+            record = {
+                "file": self.name_file,
+                "column": col,
+                "issue": issue,
+                "message": message,
+                "count": 0,
+                "rows": [],
+                "examples": [],
+            }
+            self.dict_pending[key] = record
+        record["count"] += len(list_idx)
+        # The header takes the first row of the spreadsheet
+        record["rows"] += (np.asarray(list_idx) + 2).tolist()
+        num_examples = self.max_examples - len(record["examples"])
+        if num_examples > 0:
+            values = df.loc[list_idx[:num_examples], col]
+            record["examples"] += [str(value) for value in values]
+
+        if self.name_file is None:
+            logger.warning(self.format_record(record))
+            self._store_pending()
+        elif self.verbose:
+            logger.warning(self.format_record(record))
+
+    def _store_pending(self):
+        """Moves the records of the current file to the report"""
+        list_records = list(self.dict_pending.values())
+        self.dict_pending = {}
+        self.records += list_records
+        if (self.path_report is not None) and (len(list_records) > 0):
+            with open(self.path_report, "a") as f:
+                for record in list_records:
+                    f.write(json.dumps(record) + "\n")
+        return list_records
+
+    @contextmanager
+    def file(self, name_file: str):
+        """Context manager that assigns the added records to `name_file`,
+        and logs a summary of them at the end"""
+        self._store_pending()
+        self.name_file = name_file
+        try:
+            yield self
+        finally:
+            list_records = self._store_pending()
+            self.name_file = None
+            if (len(list_records) > 0) and not self.verbose:
+                msg = ", ".join(
+                    f"'{record['column']}' {record['issue']} ({record['count']})"
+                    for record in list_records
+                )
+                if self.path_report is not None:
+                    msg += f". See {self.path_report}"
+                logger.warning(f"File {name_file} has data quality issues: {msg}")
+
+    def summary(self) -> pd.DataFrame:
+        """Returns a table with the number of rows of each file, column and issue"""
+        df = pd.DataFrame(self.records, columns=["file", "column", "issue", "count"])
+        return df.groupby(["file", "column", "issue"], sort=False)["count"].sum()
+
+
+# Shared report, used by the warnings below
+data_quality = DataQualityReport()
+
+
 def raise_type_warning(
     df: pd.DataFrame, list_idx: list, col: str, typing: str = "string"
 ):
-    """Prints the rows that produces warnings, showing index and the value that fails"""
-    list_msg = [""] * len(list_idx)
-    for j, idx in enumerate(list_idx):
-        list_msg[j] = f"     {idx + 2} ... {df.loc[idx, col]}"
-
-    logger.warning(
-        f"Column '{col}' contains {typing} - Changed to NaN:\n" + "\n".join(list_msg)
+    """Reports the rows that contain a value of the wrong type,
+    see `DataQualityReport`"""
+    data_quality.add(
+        df, list_idx, col, "type", f"Column '{col}' contains {typing} - Changed to NaN"
     )
 
 
 def raise_value_warning(df: pd.DataFrame, list_idx: list, col: str):
-    """Prints the rows that produces warnings, showing index and the value that fails"""
-    list_msg = [""] * len(list_idx)
-    for j, idx in enumerate(list_idx):
-        list_msg[j] = f"     {idx + 2} ... {df.loc[idx, col]}"
-
-    logger.warning(
-        f"Column '{col}' contains suspicious values:\n" + "\n".join(list_msg)
+    """Reports the rows that contain suspicious values, see `DataQualityReport`"""
+    data_quality.add(
+        df, list_idx, col, "value", f"Column '{col}' contains suspicious values"
     )
 
 
-def raise_missing_warning(df: pd.DataFrame, list_idx: list, col: str):
-    """Prints the rows that produces warnings, showing index and the value that fails"""
-    if len(list_idx) == 0:
-        return
-    list_msg = [""] * len(list_idx)
-    for j, idx in enumerate(list_idx):
-        list_msg[j] = f"     {idx + 2} ... {df.loc[idx, col]}"
-
-    logger.warning(f"Column '{col}' has lost values:\n" + "\n".join(list_msg))
+def raise_missing_warning(
+    df: pd.DataFrame, list_idx: list, col: str, message: str = None
+):
+    """Reports the rows whose values are missing or have been lost,
+    see `DataQualityReport`"""
+    if message is None:
+        message = f"Column '{col}' has lost values"
+    data_quality.add(df, list_idx, col, "missing", message)
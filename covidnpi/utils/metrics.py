@@ -0,0 +1,131 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import pandas as pd
+
+from covidnpi.utils.log import logger
+
+try:
+    import resource
+except ImportError:
+    # Not available in Windows
+    resource = None
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of the process since it started, in MB.
+    NaN if it cannot be measured in this platform"""
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux measures it in KB, macOS in bytes
+    if sys.platform == "darwin":
+        return peak / 1024**2
+    return peak / 1024
+
+
+class Metrics:
+    """Records the wall time, CPU time, memory and number of rows of each stage
+    of the pipeline, and optionally of each province inside a stage.
+    Each record is appended as a line to a JSON-lines file, if given.
+
+    The memory is the peak RSS of the whole process so far, so every stage after
+    the most memory-hungry one reports the same value: "process_peak_rss_mb".
+    "process_peak_rss_increase_mb" is how much the stage raised that peak,
+    0 if it did not exceed the previous stages
+
+    Examples
+    --------
+    >>> metrics = Metrics("output/metrics.jsonl")
+    >>> with metrics.measure("items") as record:
+    ...     dict_items = return_dict_items(dict_scores, metrics=metrics)
+    ...     record["rows"] = count_rows(dict_items)
+    >>> metrics.log_summary()
+
+    """
+
+    def __init__(self, path_metrics: str = None):
+        self.path_metrics = path_metrics
+        self.records: List[Dict] = []
+        # Start a new file in each run
+        if path_metrics is not None:
+            open(path_metrics, "w").close()
+
+    @contextmanager
+    def measure(self, stage: str, provincia: str = None):
+        """Context manager that measures the code inside it. Yields the record,
+        whose "rows" can be filled inside the block"""
+        record = {"stage": stage, "provincia": provincia, "rows": None}
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        rss_start = peak_rss_mb()
+        try:
+            yield record
+        finally:
+            rss_end = peak_rss_mb()
+            record.update(
+                {
+                    "wall_time": time.perf_counter() - wall_start,
+                    "cpu_time": time.process_time() - cpu_start,
+                    "process_peak_rss_mb": rss_end,
+                    "process_peak_rss_increase_mb": rss_end - rss_start,
+                }
+            )
+            self.records.append(record)
+            if self.path_metrics is not None:
+                with open(self.path_metrics, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def summary(self) -> pd.DataFrame:
+        """Returns a table with the records of the stages, not the provinces"""
+        df = pd.DataFrame(self.records)
+        if df.empty:
+            return df
+        df = df[df["provincia"].isna()].drop("provincia", axis=1)
+        return df.set_index("stage")
+
+    def summary_provincia(self, top: int = 5) -> pd.DataFrame:
+        """Returns a table with the `top` provinces of each stage that took
+        the longest wall time"""
+        df = pd.DataFrame(self.records)
+        if df.empty:
+            return df
+        df = df[df["provincia"].notna()]
+        return (
+            df.sort_values("wall_time", ascending=False)
+            .groupby("stage", sort=False)
+            .head(top)
+            .sort_values(["stage", "wall_time"], ascending=[True, False])
+            .set_index(["stage", "provincia"])
+        )
+
+    def log_summary(self, top: int = 5):
+        """Logs the summary tables"""
+        with pd.option_context("display.width", 120, "display.precision", 3):
+            logger.info(f"\nStages:\n{self.summary().to_string()}")
+            df = self.summary_provincia(top=top)
+            if not df.empty:
+                logger.info(f"\nSlowest provinces per stage:\n{df.to_string()}")
+
+
+@contextmanager
+def measure(metrics: Metrics, stage: str, provincia: str = None):
+    """Same as `Metrics.measure`, but does nothing when `metrics` is None"""
+    if metrics is None:
+        yield {}
+    else:
+        with metrics.measure(stage, provincia=provincia) as record:
+            yield record
+
+
+def count_rows(output) -> int:
+    """Counts the rows of the output of a stage: a dictionary of dataframes,
+    a list of documents or a dataframe"""
+    if isinstance(output, dict):
+        return int(sum(len(df) for df in output.values()))
+    elif output is None:
+        return 0
+    return len(output)
@@ -1,39 +1,72 @@
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
 
 import pandas as pd
 import typer
-from covidnpi.utils.cases import (
-    load_cases_df,
-    return_cases_of_provincia_normed,
-)
+from covidnpi.utils.cases import CasesRepository, return_cases_repository
 from covidnpi.utils.log import logger
 from covidnpi.utils.regions import (
     ISOPROV_REASSIGN,
     ISOPROV_TO_PROVINCIA_LOWER,
     ISOPROV_TO_PROVINCIA,
 )
-from covidnpi.utils.rho import compute_rho
-from covidnpi.utils.series import compute_growth_rate, cumulative_cases
+from covidnpi.utils.snapshot import fetch_snapshot
 
 URL_MOBILITY = "https://www.gstatic.com/covid19/mobility/Global_Mobility_Report.csv"
 
+PATH_MOBILITY_EXTRACT = "cache/mobility_report_ES.parquet"
+
+# Columns read from the mobility report, apart from the reports themselves
+LIST_MOBILITY_COLUMNS = ["country_region_code", "iso_3166_2_code", "date"]
+
+# Every report column ends with this suffix
+MOBILITY_REPORT_SUFFIX = "_percent_change_from_baseline"
+
+# Inputs of the worker processes of `store_mobility_reports`, inherited when
+# they are forked so that they are not pickled
+DICT_SHARED = {}
+
+DICT_MOBILITY_DTYPE = {
+    "country_region_code": "category",
+    "iso_3166_2_code": str,
+    "date": str,
+    "retail_and_recreation_percent_change_from_baseline": "float32",
+    "grocery_and_pharmacy_percent_change_from_baseline": "float32",
+    "parks_percent_change_from_baseline": "float32",
+    "transit_stations_percent_change_from_baseline": "float32",
+    "workplaces_percent_change_from_baseline": "float32",
+    "residential_percent_change_from_baseline": "float32",
+}
+
 
 def load_mobility_report(
     country: str = "ES",
     path_csv: str = URL_MOBILITY,
     chunksize: int = 500000,
+    path_extract: str = None,
 ) -> pd.DataFrame:
     """Loads the Google mobility report of a certain country. Adds additional columns:
     - code : province code
 
+    Only the columns needed are read, with compact types, and the rows of other
+    countries are rejected before parsing the dates.
+
     Parameters
     ----------
     country : str, optional
         Code of the country to load, by default "ES"
     path_csv : str, optional
-        Link or path to the mobility report csv
+        Link or path to the mobility report csv. Links are read from their local
+        snapshot, see `covidnpi.utils.snapshot.fetch_snapshot`
     chunksize : int, optional
         Rows of data read at once, by default 500000
+    path_extract : str, optional
+        Path to a parquet file with the report of the country. If it exists and
+        is newer than the csv, it is loaded instead of `path_csv`. If not, it is
+        created after reading `path_csv`, so later runs skip the global file.
+        By default None (not used)
 
     Returns
     -------
@@ -41,27 +74,56 @@ def load_mobility_report(
         Mobility report of given country
 
     """
+    has_extract = (path_extract is not None) and os.path.exists(path_extract)
+    try:
+        path_csv = fetch_snapshot(path_csv)
+    except FileNotFoundError:
+        # The extract is enough when the csv cannot be downloaded
+        if not has_extract:
+            raise
+        logger.warning(f"Mobility report not available, using {path_extract}")
+        path_csv = None
+    if has_extract and (
+        (path_csv is None)
+        or (os.path.getmtime(path_extract) >= os.path.getmtime(path_csv))
+    ):
+        try:
+            mob = pd.read_parquet(path_extract)
+            logger.debug(f"Loaded mobility report from {path_extract}")
+            return mob
+        except ImportError as er:
+            logger.warning(f"Could not read {path_extract}: {er}")
+
     logger.debug("Loading mobility report")
     # Process in chunks to not saturate the memory
     df_list = []
     for i, chunk in enumerate(
         pd.read_csv(
             path_csv,
-            parse_dates=["date"],
-            dayfirst=False,
+            usecols=lambda col: (col in LIST_MOBILITY_COLUMNS)
+            or col.endswith(MOBILITY_REPORT_SUFFIX),
+            dtype=DICT_MOBILITY_DTYPE,
             chunksize=chunksize,
-            low_memory=False,
         )
     ):
-        df_list += [chunk.query(f"country_region_code == '{country}'")]
+        df_list += [chunk[chunk["country_region_code"].values == country]]
         logger.debug(f"    Loaded chunk {i}")
-    mob = pd.concat(df_list)
+    mob = pd.concat(df_list, ignore_index=True)
     del df_list
     logger.debug("Done loading all chunks. Merged into single dataframe.")
 
+    # Parse the dates once the other countries are removed
+    mob["date"] = pd.to_datetime(mob["date"], format="%Y-%m-%d")
     # Codes of each province
     mob["code"] = mob["iso_3166_2_code"].str.replace(f"{country}-", "")
     logger.debug("Done loading mobility report")
+
+    if path_extract is not None:
+        try:
+            mob.to_parquet(path_extract, index=False)
+            logger.debug(f"Mobility report of {country} stored in {path_extract}")
+        except ImportError as er:
+            logger.warning(f"Could not store {path_extract}: {er}")
     return mob
 
 
@@ -91,17 +153,122 @@ def return_reports_of_provincia(mob: pd.DataFrame, code: str) -> dict:
     return dict_reports
 
 
-def mobility_report_to_csv(
+def return_reports_by_provincia(mob: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Splits the mobility report by province in a single pass
+
+    Parameters
+    ----------
+    mob : pandas.DataFrame
+        Mobility report dataframe
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        {code: reports}, reports are indexed by date, and their columns are the
+        same keys returned by `return_reports_of_provincia`
+
+    """
+    list_reports = [col for col in mob.columns if "percent" in col]
+    dict_rename = {col: col.split("_", 1)[0] for col in list_reports}
+    df = mob[["code", "date"] + list_reports].rename(columns=dict_rename)
+    dict_reports = {
+        code: df_code.drop(columns="code").set_index("date")
+        for code, df_code in df.groupby("code", sort=False)
+    }
+    return dict_reports
+
+
+def store_mobility_of_provincias(
+    list_code: List[str],
+    path_output: str,
+    mob: pd.DataFrame,
+    dict_rates: Dict[str, pd.DataFrame],
+    df_rho: pd.DataFrame,
+) -> int:
+    """Builds and stores the csv of each province in `list_code`: its mobility
+    reports along with its cases rates. Returns the number of files stored
+
+    Parameters
+    ----------
+    list_code : List[str]
+        Codes of the provinces
+    path_output : str
+        Folder where the csv files are stored
+    mob : pandas.DataFrame
+        Mobility report dataframe, see `load_mobility_report`
+    dict_rates : Dict[str, pandas.DataFrame]
+        Rates of the cases of every province, see `CasesRepository.rates`
+    df_rho : pandas.DataFrame
+        Rho of the cases of every province, see `CasesRepository.rho`
+
+    """
+    list_reports = [col.split("_", 1)[0] for col in mob.columns if "percent" in col]
+    # Split the reports of these provinces once
+    dict_reports = return_reports_by_provincia(mob[mob["code"].isin(list_code)])
+    for code in list_code:
+        try:
+            df_reports = dict_reports[code]
+        except KeyError:
+            logger.warning(f"No mobility reports for {code}")
+            df_reports = pd.DataFrame(
+                columns=list_reports, index=pd.DatetimeIndex([], name="date")
+            )
+        # Store data
+        df_store = df_reports.assign(
+            ia7=dict_rates["cumulative"][code],
+            growth_rate=dict_rates["growth_rate"][code],
+            rho=df_rho[code],
+        ).rename_axis("date", axis=0)
+        filename = ISOPROV_TO_PROVINCIA_LOWER[code]
+        df_store.to_csv(os.path.join(path_output, f"{filename}.csv"))
+    return len(list_code)
+
+
+def _store_mobility_shared(list_code: List[str], path_output: str) -> int:
+    """Same as `store_mobility_of_provincias`, with the inputs of `DICT_SHARED`.
+    Used by the worker processes"""
+    return store_mobility_of_provincias(list_code, path_output, **DICT_SHARED)
+
+
+def store_mobility_reports(
     path_output: str = "output/mobility",
+    path_extract: str = PATH_MOBILITY_EXTRACT,
+    n_jobs: int = 1,
+    cases: CasesRepository = None,
 ):
-    """Stores the Google mobility reports in csv format"""
+    """Stores the Google mobility reports in csv format, along with the cases
+    rates of each province. See `mobility_report_to_csv`
+
+    Parameters
+    ----------
+    path_output : str, optional
+        Folder where the csv files are stored, by default "output/mobility"
+    path_extract : str, optional
+        Path to the parquet extract of the Spanish mobility report
+    n_jobs : int, optional
+        Number of processes building and storing the csv files, by default 1.
+        The processes are forked, so they share the mobility report and the
+        cases rates without copying them. Where fork is not available, the files
+        are stored by this process
+    cases : CasesRepository, optional
+        Cases of each province, by default the shared repository of
+        `covidnpi.utils.cases.LINK_CASES`, see `return_cases_repository`
+
+    """
 
     if not os.path.exists(path_output):
         os.mkdir(path_output)
 
-    mob = load_mobility_report()
-    cases = load_cases_df()
+    if path_extract:
+        os.makedirs(os.path.dirname(path_extract) or ".", exist_ok=True)
+    mob = load_mobility_report(path_extract=path_extract or None)
+    if cases is None:
+        cases = return_cases_repository()
+    # Rates of all provinces at once, memoized by the repository
+    dict_rates = cases.rates(7)
+    df_rho = cases.rho(7)
 
+    list_code = []
     for code in mob["code"].unique():
         # Reassign code if needed
         code = ISOPROV_REASSIGN.get(code, code)
@@ -111,20 +278,57 @@ def mobility_report_to_csv(
         except KeyError:
             logger.warning(f"Omitted {code}")
             continue
-        dict_reports = return_reports_of_provincia(mob, code)
-        series_cases = return_cases_of_provincia_normed(cases, code)
-        series_ia7 = cumulative_cases(series_cases, 7)
-        series_growth = compute_growth_rate(series_cases, 7)
-        series_rho = compute_rho(series_cases)
+        if code not in list_code:
+            list_code.append(code)
 
-        # Store data
-        df_store = (
-            pd.DataFrame(dict_reports)
-            .assign(ia7=series_ia7, growth_rate=series_growth, rho=series_rho)
-            .rename_axis("date", axis=0)
-        )
-        filename = ISOPROV_TO_PROVINCIA_LOWER[code]
-        df_store.to_csv(os.path.join(path_output, f"{filename}.csv"))
+    can_fork = "fork" in multiprocessing.get_all_start_methods()
+    if (n_jobs > 1) and not can_fork:
+        logger.warning("Processes cannot be forked, the files are stored serially")
+    if (n_jobs > 1) and can_fork and (len(list_code) > 1):
+        n_jobs = min(n_jobs, len(list_code))
+        logger.debug(f"Storing {len(list_code)} files using {n_jobs} processes")
+        # The forked workers inherit the inputs, instead of receiving them pickled
+        DICT_SHARED.update({"mob": mob, "dict_rates": dict_rates, "df_rho": df_rho})
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                # Each worker receives only the codes of its provinces
+                list(
+                    executor.map(
+                        _store_mobility_shared,
+                        [list_code[i::n_jobs] for i in range(n_jobs)],
+                        [path_output] * n_jobs,
+                    )
+                )
+        finally:
+            DICT_SHARED.clear()
+    else:
+        store_mobility_of_provincias(list_code, path_output, mob, dict_rates, df_rho)
+
+
+def mobility_report_to_csv(
+    path_output: str = "output/mobility",
+    path_extract: str = PATH_MOBILITY_EXTRACT,
+    n_jobs: int = 1,
+):
+    """Stores the Google mobility reports in csv format
+
+    Parameters
+    ----------
+    path_output : str, optional
+        Folder where the csv files are stored, by default "output/mobility"
+    path_extract : str, optional
+        Path to the parquet extract of the Spanish mobility report, created on the
+        first run, by default `PATH_MOBILITY_EXTRACT`. Remove it to read the global
+        report again
+    n_jobs : int, optional
+        Number of processes building and storing the csv files, by default 1
+
+    """
+    store_mobility_reports(
+        path_output=path_output, path_extract=path_extract, n_jobs=n_jobs
+    )
 
 
 if __name__ == "__main__":
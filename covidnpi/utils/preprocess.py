@@ -1,4 +1,6 @@
 import os
+import re
+import unicodedata
 from datetime import date
 
 import numpy as np
@@ -8,12 +10,19 @@ import xlrd
 
 from covidnpi.utils.dictionaries import store_dict_provincia_to_interventions
 from covidnpi.utils.log import (
+    data_quality,
     logger,
     raise_type_warning,
     raise_value_warning,
     raise_missing_warning,
 )
-from covidnpi.utils.taxonomy import return_all_interventions, PATH_TAXONOMY
+from covidnpi.utils.metrics import Metrics, measure
+from covidnpi.utils.taxonomy import (
+    LIST_CODIGO_NIVEL_EDUCACION,
+    LIST_NIVEL_EDUCACION,
+    PATH_TAXONOMY,
+    return_all_interventions,
+)
 from covidnpi.utils.regions import (
     DICT_RENAME_PROVINCIA_LOWER,
     DICT_FILL_PROVINCIA_LOWER,
@@ -21,6 +30,18 @@ from covidnpi.utils.regions import (
 
 LIST_BASE_SHEET = ["base", "base-regional-provincias", "BASE", "Base"]
 
+# Memoized results of `clean_str`, shared between files {text: cleaned text}
+DICT_CLEAN_STR = {}
+
+# Memoized results of the parsers, shared between files
+# {(parser, text): (value, rejected)}
+DICT_PARSED = {}
+
+# Time ranges HH:MM-HH:MM
+RE_HORA_RANGE = re.compile(
+    "^([0-1]?[0-9]|2[0-3]):[0-5][0-9]-([0-1]?[0-9]|2[0-3]):[0-5][0-9]$"
+)
+
 DICT_PORCENTAJE = {
     "cantalejo": 2,
     "carrascaldelrio": 0.1,
@@ -92,23 +113,132 @@ LIST_COLS_OUTPUT = [
     "nivel_educacion",
 ]
 
+# Types of the columns of the interventions table
+DICT_COLS_DTYPE = {
+    "comunidad_autonoma": "category",
+    "provincia": "category",
+    "codigo": "category",
+    "fecha_inicio": "datetime64[ns]",
+    "fecha_fin": "datetime64[ns]",
+    "ambito": "category",
+    "porcentaje_afectado": "float32",
+    "porcentaje": "float32",
+    "personas": "float32",
+    "hora": "float32",
+    "nivel_educacion": "category",
+}
+
 
 def _raise_missing_column(df: pd.DataFrame, col: str):
     """Raises KeyError related to missing column"""
     raise KeyError(f"Missing column '{col}' in columns: " f"{', '.join(df.columns)}")
 
 
+def clean_str(text: str) -> str:
+    """Homogenizes a string: removes accents, changes to lower case and
+    replaces spaces by underscores. Results are memoized in `DICT_CLEAN_STR`"""
+    try:
+        return DICT_CLEAN_STR[text]
+    except KeyError:
+        pass
+    text_cleaned = (
+        unicodedata.normalize("NFKD", text)
+        .encode("ascii", errors="ignore")
+        .decode("utf-8")
+        .lower()
+        .replace(" ", "_")
+    )
+    text_cleaned = re.sub("_$", "", text_cleaned)
+    DICT_CLEAN_STR[text] = text_cleaned
+    return text_cleaned
+
+
 def clean_pandas_str(series: pd.Series):
-    """Homogenizes a pandas series of string type"""
-    series_cleaned = (
-        series.str.normalize("NFKD")
-        .str.encode("ascii", errors="ignore")
-        .str.decode("utf-8")
-        .str.lower()
-        .str.replace(" ", "_")
-        .str.replace("_$", "")
+    """Homogenizes a pandas series (or index) of string type, see `clean_str`.
+    Only the unique values are cleaned, and then mapped back to the series.
+    Values that are not strings become NaN"""
+    # Raise AttributeError if the series does not contain strings
+    _ = series.str
+    codes, uniques = pd.factorize(series)
+    # Code -1 (missing values) takes the last position, NaN
+    values = np.array(
+        [clean_str(s) if isinstance(s, str) else np.nan for s in uniques] + [np.nan],
+        dtype=object,
+    )[codes]
+    if isinstance(series, pd.Index):
+        return pd.Index(values, dtype=object, name=series.name)
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def parse_hora(text: str) -> float:
+    """Parses an hour HH:MM into a float, 22:30 becomes 22.5. Of the ranges
+    HH:MM-HH:MM we take the last hour. Raises ValueError if it is not valid"""
+    text = text.replace(" ", "")
+    if RE_HORA_RANGE.match(text):
+        text = text.split("-")[-1] + ":00"
+    list_split = text.split(":")
+    if len(list_split) < 2:
+        raise ValueError(f"Not an hour: {text}")
+    hora = float(list_split[0]) + float(list_split[1]) / 60
+    if np.isnan(hora):
+        raise ValueError(f"Not an hour: {text}")
+    return hora
+
+
+def parse_porcentaje(text: str, dict_porcentaje: dict = None) -> float:
+    """Parses a percentage into a float: "25,5 %" becomes 25.5. The names
+    of some zones are changed to their percentage, see `DICT_PORCENTAJE`.
+    "nan" is NaN, and any other value that is not a number raises ValueError"""
+    if dict_porcentaje is None:
+        dict_porcentaje = DICT_PORCENTAJE
+    text = (
+        unicodedata.normalize(
+            "NFKD",
+            text.lower().replace("%", "").replace(" ", "").replace(",", "."),
+        )
+        .encode("ascii", errors="ignore")
+        .decode("utf-8")
     )
-    return series_cleaned
+    if text == "nan":
+        return np.nan
+    return float(dict_porcentaje.get(text, text))
+
+
+def parse_unique(series: pd.Series, parser) -> tuple:
+    """Applies `parser` to the unique values of `series`, as strings, and maps
+    the results back. Results are memoized in `DICT_PARSED`, so each string
+    is parsed once in all the files. Missing values are NaN
+
+    Parameters
+    ----------
+    series : pandas.Series
+    parser : callable
+        Receives a string and returns a float. Raises ValueError when the
+        string is not valid, then the value is rejected and changed to NaN
+
+    Returns
+    -------
+    numpy.array
+        Parsed values
+    numpy.array
+        Mask of the rejected values
+
+    """
+    codes, uniques = pd.factorize(series)
+    # Code -1 (missing values) takes the last position, NaN and not rejected
+    values = np.full(len(uniques) + 1, np.nan)
+    rejected = np.zeros(len(uniques) + 1, dtype=bool)
+    for i, unique in enumerate(uniques):
+        key = (parser.__name__, str(unique))
+        try:
+            values[i], rejected[i] = DICT_PARSED[key]
+        except KeyError:
+            try:
+                values[i] = parser(key[1])
+            except ValueError:
+                rejected[i] = True
+            DICT_PARSED[key] = (values[i], rejected[i])
+    return values[codes], rejected[codes]
 
 
 def read_npi_data(
@@ -134,7 +264,8 @@ def read_npi_data(
             # Read excel - dates are parsed automatically
             df = pd.read_excel(path_com, sheet_name=sheet)
             break
-        except xlrd.biffh.XLRDError:
+        # xlrd raises XLRDError when the sheet is missing, openpyxl raises ValueError
+        except (xlrd.biffh.XLRDError, ValueError):
             pass
     else:
         xl = pd.ExcelFile(path_com)
@@ -142,10 +273,10 @@ def read_npi_data(
 
     # Homogenize column names
     df.columns = clean_pandas_str(df.columns)
-    df = df.rename(col_rename, axis=1)
+    df.rename(col_rename, axis=1, inplace=True)
     # Drop columns named "unnamed"
     drop_cols = [col for col in df.columns if col.startswith("unnamed")]
-    df = df.drop(drop_cols, axis=1)
+    df.drop(drop_cols, axis=1, inplace=True)
 
     # Preprocesar texto
     for col in list_col_text:
@@ -183,19 +314,35 @@ def read_npi_data(
 
 
 def filter_relevant_interventions(
-    df: pd.DataFrame, path_taxonomy: str = PATH_TAXONOMY
+    df: pd.DataFrame,
+    path_taxonomy: str = PATH_TAXONOMY,
+    all_interventions: list = None,
 ) -> pd.DataFrame:
-    """Remove the interventions in `df` not appearing in the taxonomy."""
-    all_interventions = return_all_interventions(path_taxonomy=path_taxonomy)
-    mask_interventions = df["codigo"].isin(all_interventions)
-    df_new = df[mask_interventions]
+    """Remove the interventions in `df` not appearing in the taxonomy.
+    The list of interventions is read from `path_taxonomy`, unless
+    `all_interventions` is given. Returns a new dataframe, not a view of `df`"""
+    if all_interventions is None:
+        all_interventions = return_all_interventions(path_taxonomy=path_taxonomy)
+    # The taxonomy lists the education interventions by level (ED.1P), but the
+    # data does not: they are expanded after scoring, see `expand_nivel_educacion`
+    list_codigo_ed = [
+        codigo
+        for codigo in LIST_CODIGO_NIVEL_EDUCACION
+        if any(codigo + niv in all_interventions for niv in LIST_NIVEL_EDUCACION)
+    ]
+    mask_interventions = df["codigo"].isin(list(all_interventions) + list_codigo_ed)
+    # `take` returns a new dataframe that can be modified without warnings
+    df_new = df.take(np.flatnonzero(mask_interventions))
     dropped = sorted(df.loc[~mask_interventions, "codigo"].astype(str).unique())
     logger.debug(f"The following interventions have been ignored: {', '.join(dropped)}")
     return df_new
 
 
 def process_fecha(
-    df: pd.DataFrame, dict_rename: dict = None, fillna_date_end: str = "today"
+    df: pd.DataFrame,
+    dict_rename: dict = None,
+    fillna_date_end: str = "today",
+    inplace: bool = False,
 ) -> pd.DataFrame:
     """Defines a starting and end date for each province
 
@@ -207,6 +354,8 @@ def process_fecha(
         Defines how we fill the NaNs in fecha_fin column, by default "today":
         - "today": NaNs are changed to today date
         - "start": NaNs are changed to fecha_inicio date
+    inplace : bool, optional
+        Modify `df` instead of a copy of it, by default False
 
     Returns
     -------
@@ -215,8 +364,8 @@ def process_fecha(
     """
     if dict_rename is None:
         dict_rename = DICT_FECHA_RENAME
-    # Do not modify the original dataframe
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
     # Rename strings
     for col in ["fecha_inicio", "fecha_fin"]:
         try:
@@ -225,26 +374,29 @@ def process_fecha(
             continue
     # Si no hay fecha de inicio se coge la fecha de publicacion, y sino la fecha de
     # inicio de la cuarentena
-    list_idx = [str(i + 2) for i in df[df["fecha_inicio"].isna()].index]
+    list_idx = df.index[df["fecha_inicio"].isna()]
+    raise_missing_warning(
+        df,
+        list_idx,
+        "fecha_inicio",
+        message="Rows missing a start date, we take the publication date. "
+        "If both are missing, we take the starting date of the quarantine",
+    )
     df["fecha_inicio"] = (
         df["fecha_inicio"].fillna(df["fecha_publicacion_oficial"]).fillna("2020-03-15")
     )
-    if len(list_idx) > 0:
-        logger.warning(
-            f"The following rows are missing a start date, "
-            f"we take the publication date. If both are missing, "
-            f"we take the starting date of the quarantine: {', '.join(list_idx)}"
-        )
 
     # Si no hay fecha final, se pone el dia de hoy o la ultima fecha registrada
-    list_idx = [str(i + 2) for i in df[df["fecha_fin"].isna()].index]
+    list_idx = df.index[df["fecha_fin"].isna()]
     if (len(list_idx) > 0) and ("today" in fillna_date_end.lower()):
+        raise_missing_warning(
+            df,
+            list_idx,
+            "fecha_fin",
+            message="Rows missing an end date, we take today as end date",
+        )
         # Llenamos los NaN de fecha_fin con el día de hoy
         df["fecha_fin"] = df["fecha_fin"].fillna(pd.Timestamp(date.today()))
-        logger.warning(
-            f"The following rows are missing an end date, "
-            f"we take today as end date: {', '.join(list_idx)}"
-        )
     elif (len(list_idx) > 0) and ("start" in fillna_date_end.lower()):
         # Llenamos los NaN de fecha_fin con fecha_inicio
         df["fecha_fin"] = df["fecha_fin"].fillna(df["fecha_inicio"])
@@ -253,12 +405,13 @@ def process_fecha(
     return df
 
 
-def rename_unidad(df, rename: dict = None) -> pd.DataFrame:
+def rename_unidad(df, rename: dict = None, inplace: bool = False) -> pd.DataFrame:
     """Rename the values of column 'unidad'"""
     if rename is None:
         rename = DICT_UNIDAD_RENAME
 
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
 
     # If any value contains the exact word, change value to word
     list_rename = set(rename.values())
@@ -281,69 +434,35 @@ def rename_unidad(df, rename: dict = None) -> pd.DataFrame:
     return df
 
 
-def format_hora(df: pd.DataFrame) -> pd.DataFrame:
+def format_hora(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """Formats the 'hora' column to datetime"""
     # If "hora" is empty, return original
     if df["hora"].isnull().all():
         return df
-    # We do not want to modify the original dataframe
-    df = df.copy()
-    # Take the column "hora" as a string series
-    hora = df["hora"].dropna().astype(str).str.replace(" ", "").copy()
-    # Change ranges HH:MM-HH:MM to last HH:MM
-    mask_range = hora.str.contains(
-        "^([0-1]?[0-9]|2[0-3]):[0-5][0-9]-([0-1]?[0-9]|2[0-3]):[0-5][0-9]$"
-    ).fillna(False)
-    hora[mask_range] = hora[mask_range].str.split("-").str[-1] + ":00"
-    # Take hour
-    minute = hora.str.split(":").str[1]
-    hora = hora.str.split(":").str[0]
-    # Force numeric
-    hora = pd.to_numeric(hora, errors="coerce")
-    minute = pd.to_numeric(minute, errors="coerce")
-    # Sum minutes to hora
-    hora += minute / 60
+    if not inplace:
+        df = df.copy()
+    hora, rejected = parse_unique(df["hora"], parse_hora)
     # Check if some original data is missing
-    list_idx = df[hora.isna() & ~df["hora"].isna()].index
-    raise_missing_warning(df, list_idx, "hora")
+    raise_missing_warning(df, df.index[rejected], "hora")
     df["hora"] = hora
     return df
 
 
-def format_porcentaje_afectado(df: pd.DataFrame) -> pd.DataFrame:
+def format_porcentaje_afectado(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """Formats the column 'porcentaje_afectado'"""
-    df = df.copy()
+    if not inplace:
+        df = df.copy()
     # En algunos cases aparece el nombre de una zona en lugar del porcentaje
-    # Convertimos esos cases a su porcentaje correspondiente
-    # Tambien reemplazamos "," por "."
+    # Convertimos esos cases a su porcentaje correspondiente, see `parse_porcentaje`
     try:
-        df["porcentaje_afectado"] = (
-            df["porcentaje_afectado"]
-            .astype(str)
-            .str.lower()
-            .str.replace("%", "")
-            .str.replace(" ", "")
-            .str.replace(",", ".")
-            .str.normalize("NFKD")
-            .str.encode("ascii", errors="ignore")
-            .str.decode("utf-8")
-            .replace(DICT_PORCENTAJE)
-            .replace({"nan": np.nan})
-        )
+        porcentaje, rejected = parse_unique(df["porcentaje_afectado"], parse_porcentaje)
     except KeyError:
         _raise_missing_column(df, "porcentaje_afectado")
 
-    # Convertimos a float y mostramos los cases donde salta error (que se dejan como NaN)
-    try:
-        df["porcentaje_afectado"] = df["porcentaje_afectado"].astype(float)
-    except TypeError:
-        logger.warning(f"porcentaje_afectado is not a float!")
-    except ValueError:
-        porc_old = df["porcentaje_afectado"].copy()
-        porc = pd.to_numeric(df["porcentaje_afectado"], errors="coerce")
-        list_idx = porc_old[porc.isna()].dropna().index.tolist()
-        raise_type_warning(df, list_idx, "porcentaje_afectado")
-        df["porcentaje_afectado"] = porc
+    # Mostramos los cases donde salta error (que se dejan como NaN)
+    if rejected.any():
+        raise_type_warning(df, df.index[rejected].tolist(), "porcentaje_afectado")
+    df["porcentaje_afectado"] = porcentaje
 
     # Warn when the values never surpass 1
     if df["porcentaje_afectado"].dropna().max() <= 1:
@@ -357,16 +476,18 @@ def format_porcentaje_afectado(df: pd.DataFrame) -> pd.DataFrame:
         list_idx = df.query("0 < porcentaje_afectado < 1").index
         raise_value_warning(df, list_idx, "porcentaje_afectado")
     # Round to one decimal
-    new_col = df["porcentaje_afectado"].astype(float).round(1)
-
-    df["porcentaje_afectado"] = new_col.round(1)
+    df["porcentaje_afectado"] = df["porcentaje_afectado"].astype(float).round(1)
     return df
 
 
-def pivot_unidad_valor(df: pd.DataFrame, list_float: tuple = None) -> pd.DataFrame:
+def pivot_unidad_valor(
+    df: pd.DataFrame, list_float: tuple = None, inplace: bool = False
+) -> pd.DataFrame:
     """Pivot the column unidad so that we get one column per category"""
     if list_float is None:
         list_float = LIST_UNIDAD_FLOAT
+    if not inplace:
+        df = df.copy()
 
     # Pasamos las categorias de la columna "unidad" a columnas con valor "valor"
     df_cat = df[["unidad", "valor"]].pivot(columns="unidad", values="valor")
@@ -385,34 +506,61 @@ def pivot_unidad_valor(df: pd.DataFrame, list_float: tuple = None) -> pd.DataFra
             list_idx = df_old[df_cat[col].isna()].dropna().index.tolist()
             raise_type_warning(df, list_idx, "valor", typing="fecha")
 
-    df = df.join(df_cat).drop(["unidad", "valor"], axis=1)
+    # Both share the index, so the new columns are added without joining
+    for col in df_cat.columns:
+        df[col] = df_cat[col]
+    df.drop(["unidad", "valor"], axis=1, inplace=True)
+
+    return format_hora(df, inplace=True)
+
 
-    df = format_hora(df)
+def enforce_dtypes(
+    df: pd.DataFrame, dict_dtype: dict = None, inplace: bool = False
+) -> pd.DataFrame:
+    """Casts the columns of the interventions table to their types: text columns
+    to categories, values to float32 and dates to datetime64. Columns not found
+    in `dict_dtype` are left untouched"""
+    if dict_dtype is None:
+        dict_dtype = DICT_COLS_DTYPE
+    dict_dtype = {col: dtype for col, dtype in dict_dtype.items() if col in df.columns}
+    if not inplace:
+        return df.astype(dict_dtype)
+    # Cast column by column, so only one column is duplicated at a time
+    for col, dtype in dict_dtype.items():
+        df[col] = df[col].astype(dtype)
     return df
 
 
-def select_columns(df: pd.DataFrame, list_cols: list = None) -> pd.DataFrame:
-    """Returns the dataframe having only the selected columns.
-    If one is missing, fill it with NaNs"""
+def select_columns(
+    df: pd.DataFrame, list_cols: list = None, dict_dtype: dict = None
+) -> pd.DataFrame:
+    """Returns a new dataframe having only the selected columns.
+    If one is missing, fill it with NaNs. The columns are casted to the types
+    in `dict_dtype`, by default `DICT_COLS_DTYPE`"""
     if list_cols is None:
         list_cols = LIST_COLS_OUTPUT
-    try:
-        df = df[list_cols]
-    except KeyError:
-        cols_missing = list(set(list_cols) - set(df.columns))
-        for col in cols_missing:
-            df[col] = np.nan
+    cols_missing = [col for col in list_cols if col not in df.columns]
+    if len(cols_missing) > 0:
         logger.warning(
             f"Missing columns, will be filled with NaN: {', '.join(cols_missing)}"
         )
-    return df
+    df = df.reindex(columns=list_cols)
+    return enforce_dtypes(df, dict_dtype=dict_dtype, inplace=True)
 
 
 def return_dict_provincia_to_ccaa(df: pd.DataFrame, dict_add: dict = None) -> dict:
     """Generates a dictionary where each key is a province and its value is the CCAA"""
     if dict_add is None:
         dict_add = DICT_ADD_PROVINCE
-    df_ccaa = df.groupby(["comunidad_autonoma", "provincia"]).size().reset_index()
+    # Combinations found in the data (grouping categorical columns would list
+    # every combination of categories)
+    df_ccaa = (
+        df[["comunidad_autonoma", "provincia"]]
+        .dropna()
+        .drop_duplicates()
+        .astype(str)
+        .sort_values(["comunidad_autonoma", "provincia"])
+    )
 
     dict_provincia_to_ccaa = dict(
         zip(df_ccaa["provincia"], df_ccaa["comunidad_autonoma"])
@@ -427,61 +575,126 @@ def return_dict_provincia_to_interventions(df: pd.DataFrame) -> dict:
     the dataframe containing the limitations applied in it"""
     dict_provincia_to_ccaa = return_dict_provincia_to_ccaa(df)
 
+    # Positions of the rows of each province, and of the autonomic rows of each
+    # region, found in one pass over the dataframe
+    dict_provincia_to_idx = df.groupby("provincia", observed=True, sort=False).indices
+    idx_autonomico = np.flatnonzero(df["ambito"] == "autonomico")
+    dict_ccaa_to_idx = {
+        ccaa: idx_autonomico[idx]
+        for ccaa, idx in df.iloc[idx_autonomico]
+        .groupby("comunidad_autonoma", observed=True, sort=False)
+        .indices.items()
+    }
+    idx_empty = np.array([], dtype=int)
+
     dict_provincia_to_interventions = {}
 
     for provincia, ccaa in dict_provincia_to_ccaa.items():
-        df_sub = (
-            df.query(
-                f"(provincia == '{provincia}') |"
-                f"((comunidad_autonoma == '{ccaa}') "
-                f"& (ambito == 'autonomico'))"
-            )
-            .copy()
-            .reset_index(drop=True)
+        # Sorted and without duplicates, the rows keep their original order
+        idx = np.union1d(
+            dict_provincia_to_idx.get(provincia, idx_empty),
+            dict_ccaa_to_idx.get(ccaa, idx_empty),
         )
+        # `take` already returns a new dataframe, owned by the province
+        df_sub = df.take(idx)
+        df_sub.reset_index(drop=True, inplace=True)
         if not df_sub.empty:
             dict_provincia_to_interventions.update({provincia: df_sub})
 
     return dict_provincia_to_interventions
 
 
+def preprocess_npi_data(
+    df: pd.DataFrame,
+    path_taxonomy: str = PATH_TAXONOMY,
+    all_interventions: list = None,
+) -> pd.DataFrame:
+    """Preprocess the output of `read_npi_data`, returning the interventions table.
+    The pipeline takes ownership of `df`: it is filtered into a new dataframe,
+    that is modified in place by every step, and `df` must not be used afterwards
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Output of `read_npi_data`
+    path_taxonomy : str, optional
+        Path to the taxonomy, used to filter the relevant interventions
+    all_interventions : list, optional
+        Relevant interventions, read from `path_taxonomy` if not given
+
+    Returns
+    -------
+    pandas.DataFrame
+        Interventions table, see `select_columns`
+
+    """
+    # Filtramos las interventions relevantes - the only copy of the raw data
+    df = filter_relevant_interventions(
+        df, path_taxonomy=path_taxonomy, all_interventions=all_interventions
+    )
+    # Corregimos las fechas
+    process_fecha(df, inplace=True)
+    # Renombramos la columna unidad
+    rename_unidad(df, inplace=True)
+    # Formateamos "porcentaje afectado"
+    format_porcentaje_afectado(df, inplace=True)
+    # Pivotamos la columna "unidad" y le asignamos a cada categoría
+    # su correspondiente "valor"
+    pivot_unidad_valor(df, inplace=True)
+    # Tomamos sólo las columnas que nos interesan
+    return select_columns(df)
+
+
+def read_npi_file(
+    path_file: str, path_taxonomy: str = PATH_TAXONOMY, all_interventions: list = None
+) -> dict:
+    """Reads and preprocess one file of NPI, returning a dictionary
+    {province: limitations}. The dictionary is empty if the file could not be opened"""
+    file = os.path.basename(path_file)
+    try:
+        df = read_npi_data(path_file)
+    except IsADirectoryError:
+        logger.error(
+            f"File {file} could not be opened as province: not a valid file format\n...............\n"
+        )
+        return {}
+    except KeyError:
+        logger.error(
+            f"File {file} could not be opened as province: base sheet is missing\n...............\n"
+        )
+        return {}
+    df_output = preprocess_npi_data(
+        df, path_taxonomy=path_taxonomy, all_interventions=all_interventions
+    )
+    # Construimos el diccionario de interventions
+    return return_dict_provincia_to_interventions(df_output)
+
+
 def read_npi_and_build_dict(
     path_data: str = "datos_NPI",
     path_taxonomy: str = PATH_TAXONOMY,
+    metrics: Metrics = None,
 ):
     """Reads the folder containing the NPI and returns a dictionary
-    {province: limitations}"""
+    {province: limitations}. If `metrics` is given, the reading of each file
+    is measured, see `covidnpi.utils.metrics.Metrics`. The data quality issues
+    of each file are collected in `covidnpi.utils.log.data_quality`"""
     dict_provincia_to_interventions = {}
+    # The taxonomy is read once for all the files
+    all_interventions = return_all_interventions(path_taxonomy=path_taxonomy)
     for file in sorted(os.listdir(path_data)):
         logger.debug(f"...............\n{file}")
         path_file = os.path.join(path_data, file)
-        try:
-            df = read_npi_data(path_file)
-        except IsADirectoryError:
-            logger.error(
-                f"File {file} could not be opened as province: not a valid file format\n...............\n"
-            )
-            continue
-        except KeyError:
-            logger.error(
-                f"File {file} could not be opened as province: base sheet is missing\n...............\n"
-            )
+        with measure(metrics, "read_npi", provincia=file) as record:
+            with data_quality.file(file):
+                dict_update = read_npi_file(
+                    path_file,
+                    path_taxonomy=path_taxonomy,
+                    all_interventions=all_interventions,
+                )
+            record["rows"] = sum(len(df) for df in dict_update.values())
+        if len(dict_update) == 0:
             continue
-        # Filtramos las interventions relevantes
-        df_filtered = filter_relevant_interventions(df, path_taxonomy=path_taxonomy)
-        # Corregimos las fechas
-        df_filtered = process_fecha(df_filtered)
-        # Renombramos la columna unidad
-        df_renamed = rename_unidad(df_filtered)
-        # Formateamos "porcentaje afectado"
-        df_renamed = format_porcentaje_afectado(df_renamed)
-        # Pivotamos la columna "unidad" y le asignamos a cada categoría
-        # su correspondiente "valor"
-        df_pivot = pivot_unidad_valor(df_renamed)
-        # Tomamos sólo las columnas que nos interesan
-        df_output = select_columns(df_pivot)
-        # Construimos el diccionario de interventions y lo guardamos
-        dict_update = return_dict_provincia_to_interventions(df_output)
         dict_provincia_to_interventions.update(dict_update)
         logger.debug(f"...............\n")
     return dict_provincia_to_interventions
@@ -491,6 +704,8 @@ def main(
     path_data: str = "datos_NPI",
     path_taxonomy: str = PATH_TAXONOMY,
     path_output: str = "output/interventions",
+    path_report: str = None,
+    verbose: bool = False,
 ):
     """Reads the raw data, in path_data, preprocess it and stores the results in
     path_output
@@ -500,8 +715,17 @@ def main(
     path_data : str, optional
     path_taxonomy : str, optional
     path_output : str, optional
+    path_report : str, optional
+        JSON-lines file where the data quality issues are stored, by default
+        data_quality.jsonl in the parent folder of `path_output`
+    verbose : bool, optional
+        Log every data quality issue, instead of a summary per file,
+        by default False
 
     """
+    if path_report is None:
+        path_report = os.path.join(os.path.dirname(path_output), "data_quality.jsonl")
+    data_quality.configure(path_report=path_report, verbose=verbose)
     dict_provincia_to_interventions = read_npi_and_build_dict(
         path_data=path_data, path_taxonomy=path_taxonomy
     )
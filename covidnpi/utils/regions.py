@@ -1,3 +1,6 @@
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
 from covidnpi.utils.dictionaries import reverse_dictionary
 
 POSTAL_TO_ISOPROV = {
@@ -284,3 +287,94 @@ ISLA_TO_PERCENTAGE = {
         "elhierro": 0.01,
     },
 }
+
+# Provinces of each autonomous community, by ISO 3166-2:ES codes
+ISOCCAA_TO_ISOPROV = {
+    "AN": ["AL", "CA", "CO", "GR", "H", "J", "MA", "SE"],
+    "AR": ["HU", "TE", "Z"],
+    "AS": ["O"],
+    "IB": ["PM"],
+    "CN": ["GC", "TF"],
+    "CB": ["S"],
+    "CL": ["AV", "BU", "LE", "P", "SA", "SG", "SO", "VA", "ZA"],
+    "CM": ["AB", "CR", "CU", "GU", "TO"],
+    "CT": ["B", "GI", "L", "T"],
+    "VC": ["A", "CS", "V"],
+    "EX": ["BA", "CC"],
+    "GA": ["C", "LU", "OR", "PO"],
+    "MD": ["M"],
+    "MC": ["MU"],
+    "NC": ["NA"],
+    "PV": ["BI", "SS", "VI"],
+    "RI": ["LO"],
+    "CE": ["CE"],
+    "ML": ["ML"],
+}
+
+ISOCCAA_TO_CCAA_LOWER = {
+    "AN": "andalucia",
+    "AR": "aragon",
+    "AS": "asturias",
+    "IB": "islas_baleares",
+    "CN": "canarias",
+    "CB": "cantabria",
+    "CL": "castilla_y_leon",
+    "CM": "castilla_la_mancha",
+    "CT": "cataluna",
+    "VC": "comunidad_valenciana",
+    "EX": "extremadura",
+    "GA": "galicia",
+    "MD": "madrid",
+    "MC": "murcia",
+    "NC": "navarra",
+    "PV": "pais_vasco",
+    "RI": "rioja_la",
+    "CE": "ceuta",
+    "ML": "melilla",
+}
+
+CCAA_LOWER_TO_ISOCCAA = reverse_dictionary(ISOCCAA_TO_CCAA_LOWER)
+
+# Country level of the rollups
+ISO_NATIONAL = "ES"
+NATIONAL_LOWER = "espana"
+
+
+@contextmanager
+def extend_regions(dict_regions: Dict[str, Tuple[str, float]]):
+    """Context manager that adds regions to the dictionaries of provinces while
+    inside the block, so that they are scored, normalized by population and
+    stored as any province. Used with synthetic regions, see
+    `covidnpi.utils.synthetic.return_dict_synthetic_regions`
+
+    Parameters
+    ----------
+    dict_regions : Dict[str, Tuple[str, float]]
+        Contains couples of {region: (code, population)}. Regions or codes that
+        already exist are not modified
+
+    """
+    list_dict = [
+        PROVINCIA_LOWER_TO_ISOPROV,
+        ISOPROV_TO_PROVINCIA_LOWER,
+        ISOPROV_TO_PROVINCIA,
+        ISOPROV_TO_POBLACION,
+    ]
+    dict_added = {id(d): [] for d in list_dict}
+
+    def add(d: dict, key: str, value):
+        if key not in d:
+            d[key] = value
+            dict_added[id(d)].append(key)
+
+    try:
+        for region, (code, poblacion) in dict_regions.items():
+            add(PROVINCIA_LOWER_TO_ISOPROV, region, code)
+            add(ISOPROV_TO_PROVINCIA_LOWER, code, region)
+            add(ISOPROV_TO_PROVINCIA, code, region)
+            add(ISOPROV_TO_POBLACION, code, poblacion)
+        yield
+    finally:
+        for d in list_dict:
+            for key in dict_added[id(d)]:
+                d.pop(key, None)
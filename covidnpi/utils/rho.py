@@ -1,7 +1,9 @@
+from typing import Iterable
+
 import numpy as np
 import pandas as pd
 
-from covidnpi.utils.series import moving_average
+from covidnpi.utils.series import moving_average, moving_average_matrix
 
 
 def compute_cases_weighted(series_cases: pd.Series, days: int = 7) -> pd.Series:
@@ -85,3 +87,75 @@ def compute_rho(
     list_denominator = [series_norm_movavg.shift(lag) for lag in range(5, 8)]
     denominator = pd.concat(list_denominator, axis=1).mean(axis=1)
     return np.divide(numerator, denominator)
+
+
+def shifted_mean_matrix(df: pd.DataFrame, lags: Iterable[int]) -> pd.DataFrame:
+    """Computes the mean of a dataframe shifted by each lag, ignoring NaNs.
+    Equivalent to `pd.concat([ser.shift(lag) for lag in lags], axis=1).mean(axis=1)`
+    applied to each column
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Index is dates, columns are provinces
+    lags : Iterable[int]
+        Lags to use
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    x = df.values
+    total = np.zeros(x.shape)
+    count = np.zeros(x.shape)
+    for lag in lags:
+        x_shift = np.full(x.shape, np.nan)
+        x_shift[lag:] = x[: len(x) - lag]
+        mask = ~np.isnan(x_shift)
+        total[mask] += x_shift[mask]
+        count += mask
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = total / count
+    return pd.DataFrame(x_mean, index=df.index, columns=df.columns)
+
+
+def compute_rho_matrix(
+    df_cases: pd.DataFrame, days: int = 7, lag_peso: int = 4, lag_norm: int = 6
+) -> pd.DataFrame:
+    """Computes rho for every column of a dataframe at once.
+    Same values as `compute_rho` applied to each column
+
+    Parameters
+    ----------
+    df_cases : pandas.DataFrame
+        COVID cases, index is dates, columns are provinces
+    days : int, optional
+        Size of the cumulative sum, by default 7
+    lag_peso : int, optional
+        Number of lags to use when computing weighted cases, by default 4
+    lag_norm : int, optional
+        Number of lags to use when computing movavg normed cases, by default 7
+
+    Returns
+    -------
+    pandas.DataFrame
+        Rho
+
+    """
+    # Weighted cases: cases per day divided by the average cases of the last days
+    acum = moving_average_matrix(df_cases, days).reindex(df_cases.index)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df_peso = df_cases / acum
+        # Normed cases
+        series_mean = shifted_mean_matrix(
+            df_peso, [lag * days for lag in range(lag_peso + 1)]
+        )
+        df_norm = df_cases / series_mean
+    # Compute the moving average of normed cases
+    df_norm_movavg = moving_average_matrix(df_norm, lag_norm)
+    # Compute rho
+    numerator = shifted_mean_matrix(df_norm_movavg, range(3))
+    denominator = shifted_mean_matrix(df_norm_movavg, range(5, 8))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return numerator / denominator
@@ -1,3 +1,5 @@
+from typing import Dict
+
 import numpy as np
 import pandas as pd
 
@@ -88,3 +90,117 @@ def compute_logarithmic_growth_rate(series: pd.Series, days: int) -> pd.Series:
     lr[lr == np.inf] = np.nan
     lr[lr == -np.inf] = np.nan
     return pd.Series(lr, index=idx)
+
+
+def rolling_sum(x: np.ndarray, w: int) -> np.ndarray:
+    """Sums the values of `x` over windows of size `w` along the first axis, using
+    cumulative sums. Windows containing NaN or infinite values give the same
+    result as `numpy.convolve`
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Array of shape (dates,) or (dates, provinces)
+    w : int
+        Size of the window
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (dates - w + 1, ...)
+
+    """
+    x = np.asarray(x, dtype=float)
+
+    def window(a: np.ndarray) -> np.ndarray:
+        a_cum = np.cumsum(a, axis=0)
+        a_cum = np.concatenate([np.zeros((1,) + a.shape[1:]), a_cum], axis=0)
+        return a_cum[w:] - a_cum[:-w]
+
+    x_sum = window(np.where(np.isfinite(x), x, 0))
+    # Count the non-finite values inside each window
+    num_pos = window(x == np.inf)
+    num_neg = window(x == -np.inf)
+    num_nan = window(np.isnan(x))
+    x_sum[num_pos > 0] = np.inf
+    x_sum[num_neg > 0] = -np.inf
+    x_sum[(num_nan > 0) | ((num_pos > 0) & (num_neg > 0))] = np.nan
+    return x_sum
+
+
+def cumulative_cases_matrix(df: pd.DataFrame, w: int) -> pd.DataFrame:
+    """Computes the cumulative cases of every column of a dataframe
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Index is dates, columns are provinces
+    w : int
+        Size of the acumulation
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    x_cum = rolling_sum(df.values, w)
+    return pd.DataFrame(x_cum, index=df.index[(w - 1) :], columns=df.columns)
+
+
+def moving_average_matrix(df: pd.DataFrame, w: int) -> pd.DataFrame:
+    """Computes the moving average of every column of a dataframe
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Index is dates, columns are provinces
+    w : int
+        Size of the moving average
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    return cumulative_cases_matrix(df, w) / w
+
+
+def compute_rates_matrix(df: pd.DataFrame, days: int) -> Dict[str, pd.DataFrame]:
+    """Computes the cumulative cases, moving average, growth rate and logarithmic
+    growth rate of every column of a dataframe, sharing the moving average
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Index is dates, columns are provinces
+    days : int
+        Size of the intervals
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        Contains the keys "cumulative", "average", "growth_rate" and
+        "logarithmic_growth_rate". Same values as `cumulative_cases`,
+        `moving_average`, `compute_growth_rate` and `compute_logarithmic_growth_rate`
+    """
+    df_cum = cumulative_cases_matrix(df, days)
+    x = df_cum.values / days
+    # IA7(t) / IA7(t-7)
+    ratio = np.full(x.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio[days:] = np.divide(x[days:], x[:-days])
+        lr = np.log(ratio)
+    # GR = ( IA7(t) - IA7(t-7) ) * 100 / IA7(t-7)
+    g = ratio.copy()
+    g[g == np.inf] = np.nan
+    g = (g - 1) * 100
+    # LR = ln( 1 + GR / 100 ) = ln( IA7(t) / IA7(t - 7) )
+    lr[np.isinf(lr)] = np.nan
+    return {
+        "cumulative": df_cum,
+        "average": pd.DataFrame(x, index=df_cum.index, columns=df.columns),
+        "growth_rate": pd.DataFrame(g, index=df_cum.index, columns=df.columns),
+        "logarithmic_growth_rate": pd.DataFrame(
+            lr, index=df_cum.index, columns=df.columns
+        ),
+    }
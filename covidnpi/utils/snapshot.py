@@ -0,0 +1,197 @@
+import datetime as dt
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from http.client import HTTPException
+from typing import Dict
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from covidnpi.utils.log import logger
+
+# Folder where the remote sources are stored, can be changed with the environment
+PATH_SNAPSHOT = "cache/snapshots"
+
+# Environment variables: folder of the snapshots, and "1" to never use the network
+ENV_SNAPSHOT = "COVIDNPI_SNAPSHOTS"
+ENV_OFFLINE = "COVIDNPI_OFFLINE"
+
+
+def is_remote(link: str) -> bool:
+    """Returns True if `link` is an URL, False if it is a local path"""
+    return str(link).startswith(("http://", "https://"))
+
+
+def is_offline() -> bool:
+    """Returns True if the environment asks to run only from snapshots"""
+    return os.environ.get(ENV_OFFLINE, "0").lower() in ["1", "true", "yes"]
+
+
+def set_offline(offline: bool = True):
+    """Sets the offline mode in the environment, so that the worker processes
+    started after this call inherit it"""
+    os.environ[ENV_OFFLINE] = "1" if offline else "0"
+
+
+def return_snapshot_path(url: str, path_snapshot: str = None) -> Path:
+    """Returns the path of the snapshot of `url`. The name of the file is kept,
+    preceded by a hash of the full `url`, so different sources never collide"""
+    if path_snapshot is None:
+        path_snapshot = os.environ.get(ENV_SNAPSHOT, PATH_SNAPSHOT)
+    name = os.path.basename(url.split("?")[0]) or "index"
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return Path(path_snapshot) / f"{digest}_{name}"
+
+
+def return_metadata_path(path_file: Path) -> Path:
+    """Returns the path of the json with the metadata of a snapshot"""
+    return path_file.with_name(path_file.name + ".json")
+
+
+def load_metadata(path_file: Path) -> Dict:
+    """Loads the metadata of a snapshot, empty if it does not exist"""
+    try:
+        with open(return_metadata_path(path_file)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def store_metadata(path_file: Path, dict_meta: Dict):
+    """Stores the metadata of a snapshot"""
+    with open(return_metadata_path(path_file), "w") as f:
+        json.dump(dict_meta, f, indent=2)
+
+
+def now_isoformat() -> str:
+    """Returns the current time in ISO format, to the second"""
+    return dt.datetime.now().isoformat(timespec="seconds")
+
+
+def store_snapshot(url: str, path_source: str, path_snapshot: str = None) -> Path:
+    """Copies a local file as the snapshot of `url`, without validators, so it
+    is used offline and replaced the first time `url` is fetched
+
+    Parameters
+    ----------
+    url : str
+        Web link the file is a snapshot of
+    path_source : str
+        Path to the local file
+    path_snapshot : str, optional
+        Folder of the snapshots, by default `PATH_SNAPSHOT`
+
+    Returns
+    -------
+    pathlib.Path
+        Path to the snapshot
+
+    """
+    path_file = return_snapshot_path(url, path_snapshot=path_snapshot)
+    path_file.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(path_source, path_file)
+    store_metadata(
+        path_file,
+        {"url": url, "source": str(path_source), "fetched": now_isoformat()},
+    )
+    return path_file
+
+
+def fetch_snapshot(
+    url: str,
+    path_snapshot: str = None,
+    offline: bool = None,
+    timeout: float = 60,
+) -> str:
+    """Returns the path to a local snapshot of `url`. The snapshot is revalidated
+    with the server using its ETag and Last-Modified headers, so the file is only
+    downloaded when it has changed. If the server cannot be reached, the existing
+    snapshot is used. Local paths are returned as they are
+
+    Parameters
+    ----------
+    url : str
+        Web link or local path
+    path_snapshot : str, optional
+        Folder of the snapshots, by default the environment variable
+        `COVIDNPI_SNAPSHOTS` or `PATH_SNAPSHOT`
+    offline : bool, optional
+        If True, the network is not used and the snapshot must exist.
+        By default the environment variable `COVIDNPI_OFFLINE`
+    timeout : float, optional
+        Seconds to wait for the server, by default 60
+
+    Returns
+    -------
+    str
+        Path to the snapshot
+
+    Raises
+    ------
+    FileNotFoundError
+        If there is no snapshot and it cannot be downloaded
+
+    """
+    if not is_remote(url):
+        return url
+    if offline is None:
+        offline = is_offline()
+    path_file = return_snapshot_path(url, path_snapshot=path_snapshot)
+    exists = path_file.exists()
+    if offline:
+        if not exists:
+            raise FileNotFoundError(f"Offline and no snapshot of {url} in {path_file}")
+        logger.debug(f"Offline, using snapshot {path_file}")
+        return str(path_file)
+
+    dict_meta = load_metadata(path_file) if exists else {}
+    headers = {}
+    if dict_meta.get("etag"):
+        headers["If-None-Match"] = dict_meta["etag"]
+    if dict_meta.get("last_modified"):
+        headers["If-Modified-Since"] = dict_meta["last_modified"]
+
+    # Download next to the snapshot, then replace it at once
+    path_temp = path_file.with_name(path_file.name + ".part")
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+            path_file.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(path_temp, "wb") as f:
+                    shutil.copyfileobj(response, f, length=1 << 20)
+                # Reading stops silently if the connection is closed early
+                if getattr(response, "length", None):
+                    raise HTTPException(f"{response.length} bytes not received")
+                os.replace(path_temp, path_file)
+            finally:
+                # Partial downloads are not kept
+                if path_temp.exists():
+                    path_temp.unlink()
+            dict_meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched": now_isoformat(),
+            }
+        logger.debug(f"Downloaded {url} to {path_file}")
+    except HTTPError as er:
+        if (er.code != 304) or (not exists):
+            return fallback_snapshot(url, path_file, exists, er)
+        logger.debug(f"Not modified, using snapshot {path_file}")
+    except (OSError, HTTPException) as er:
+        # OSError includes the URLError of unreachable servers, HTTPException
+        # the downloads interrupted halfway
+        return fallback_snapshot(url, path_file, exists, er)
+    dict_meta["checked"] = now_isoformat()
+    store_metadata(path_file, dict_meta)
+    return str(path_file)
+
+
+def fallback_snapshot(url: str, path_file: Path, exists: bool, er: Exception) -> str:
+    """Returns the snapshot when `url` could not be fetched, raises if missing"""
+    if not exists:
+        raise FileNotFoundError(f"Could not fetch {url} and there is no snapshot: {er}")
+    logger.warning(f"Could not fetch {url}, using snapshot {path_file}: {er}")
+    return str(path_file)
@@ -0,0 +1,622 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import typer
+
+from covidnpi.utils.log import logger
+from covidnpi.utils.preprocess import DICT_ADD_PROVINCE, LIST_BASE_SHEET
+from covidnpi.utils.regions import (
+    DICT_RENAME_PROVINCIA_LOWER,
+    ISLA_TO_PERCENTAGE,
+    ISOPROV_TO_POBLACION,
+    PROVINCIA_LOWER_TO_ISOPROV,
+)
+
+# Criteria of the taxonomy, as written in the original file
+CRIT_EXISTE = "Si existe = alto"
+CRIT_EXISTE_BAJO = "Si existe = bajo"
+CRIT_PORCENTAJE = "si <=35%  =medio\nsi >35% =bajo"
+CRIT_AFORO_6 = (
+    "si <=35% o <=6 personas = medio\n"
+    "si >35% o >6 personas  (o no se especifica)=bajo"
+)
+CRIT_AFORO_10 = "si <=35% o <=10 personas = medio\nsi >35% o >10 personas=bajo"
+CRIT_PERSONAS_6 = "si <=6 personas = medio\nsi >6 personas  (o no se especifica) = bajo"
+CRIT_NO_ESPECIFICA = (
+    "si <=6 personas (o no se especifica) = medio\nsi >6 personas = bajo"
+)
+CRIT_PERSONAS_100 = "si <=100 personas = medio\nsi >100 personas =bajo"
+CRIT_REUNION = "si <=6 personas  = alto\nsi >6 y <=10 = medio\nsi >10 = bajo"
+CRIT_MESA = "si <6 personas por mesa  = medio\nsi >=6 personas por mesa =bajo"
+CRIT_HORA = "si antes o igual que las 18:00 = medio; si después de las 18:00 bajo"
+
+# Taxonomy {field: [(codigo, nombre, ponderacion, criterio)]}
+# Rows without name belong to the same item as the previous row
+DICT_TAXONOMY = {
+    "deporte_exterior": [
+        ("AF.1", "DEX_afor", 1.0, CRIT_EXISTE),
+        ("AF.6", None, None, CRIT_AFORO_6),
+        ("AF.7", None, None, CRIT_PERSONAS_6),
+        ("AF.4", "DP_cont", 0.2, CRIT_EXISTE),
+        ("AF.17", None, None, CRIT_NO_ESPECIFICA),
+        ("AF.3", "DEX_pub", 0.7, CRIT_EXISTE),
+        ("AF.13", None, None, CRIT_EXISTE),
+        ("AF.15", None, None, CRIT_PORCENTAJE),
+    ],
+    "deporte_interior": [
+        ("AF.1", "DIN_afo", 1.0, CRIT_EXISTE),
+        ("AF.2", None, None, CRIT_EXISTE),
+        ("AF.5", None, None, CRIT_AFORO_6),
+        ("AF.12", None, None, CRIT_PERSONAS_6),
+        ("AF.4", "DIN_grupo", 0.2, CRIT_EXISTE),
+        ("AF.17", None, None, CRIT_NO_ESPECIFICA),
+        ("AF.3", "DIN_pub", 0.7, CRIT_EXISTE),
+        ("AF.14", None, None, CRIT_EXISTE),
+        ("AF.16", None, None, CRIT_PORCENTAJE),
+    ],
+    "cultura": [
+        ("CD.1", "CUL_mus", 0.5, CRIT_EXISTE),
+        ("CD.6", None, None, CRIT_PORCENTAJE),
+        ("CD.2", None, None, CRIT_EXISTE),
+        ("CD.7", None, None, CRIT_PORCENTAJE),
+        ("CD.8", None, None, CRIT_PORCENTAJE),
+        ("CD.3", "CUL_cin", 1.0, CRIT_EXISTE),
+        ("CD.4", None, None, CRIT_EXISTE),
+        ("CD.9", None, None, CRIT_PORCENTAJE),
+        ("CD.10", None, None, CRIT_PORCENTAJE),
+        ("CD.5", "CUL_sal", 0.3, CRIT_EXISTE),
+        ("CD.11", None, None, CRIT_PORCENTAJE),
+        ("CD.17", "CUL_tor", 0.2, CRIT_EXISTE),
+        ("CD.14", None, None, CRIT_PORCENTAJE),
+        ("CD.16", "CUL_zoo", 0.2, CRIT_EXISTE),
+        ("CD.15", None, None, CRIT_PORCENTAJE),
+    ],
+    "ceremonias": [
+        ("CE.1", "CER_cult", 1.0, CRIT_EXISTE),
+        ("CE.2", None, None, CRIT_PORCENTAJE),
+        ("CE.7", "CER_cor", 0.2, CRIT_EXISTE),
+        ("CE.3", "CER_ent_int", 0.3, CRIT_AFORO_10),
+        ("CE.4", "CER_ent_ext", 0.2, CRIT_AFORO_10),
+        ("CE.9", None, None, CRIT_EXISTE),
+        ("CE.5", "CER_otro_int", 0.3, CRIT_AFORO_10),
+        ("CE.10", None, None, CRIT_EXISTE),
+        ("CE.6", "CER_otro_ext", 0.2, CRIT_AFORO_10),
+    ],
+    "comercio": [
+        ("CO.1", "COM_afo", 1.0, CRIT_EXISTE),
+        ("CO.8", None, None, CRIT_PORCENTAJE),
+        ("CO.7", "COM_hor", 0.6, CRIT_HORA),
+        ("CO.2", "COM_esp", 0.3, CRIT_EXISTE),
+        ("CO.3", "COM_fis", 0.2, CRIT_EXISTE),
+        ("CO.4", "COM_cent", 1.0, CRIT_EXISTE),
+        ("CO.9", None, None, CRIT_PORCENTAJE),
+        ("CO.5", "COM_cczon", 0.3, CRIT_EXISTE),
+        ("CO.6", "COM_libre", 0.4, CRIT_EXISTE),
+        ("CO.10", None, None, CRIT_PORCENTAJE),
+    ],
+    "restauracion_interior": [
+        ("RH.1", "RIN_afo", 1.0, CRIT_EXISTE),
+        ("RH.2", None, None, CRIT_EXISTE),
+        ("RH.3", None, None, CRIT_EXISTE),
+        ("RH.4", None, None, CRIT_EXISTE_BAJO),
+        ("RH.7", None, None, CRIT_PORCENTAJE),
+        ("RH.5", "RIN_hor", 0.6, CRIT_HORA),
+        ("RH.9", "RIN_mesa", 0.6, CRIT_MESA),
+        ("RH.11", None, None, CRIT_MESA),
+    ],
+    "restauracion_exterior": [
+        ("RH.1", "REX_afo", 1.0, CRIT_EXISTE),
+        ("RH.2", None, None, CRIT_EXISTE),
+        ("RH.6", None, None, CRIT_PORCENTAJE),
+        ("RH.5", "REX_hor", 0.6, CRIT_HORA),
+        ("RH.9", "REX_otr", 0.6, CRIT_MESA),
+        ("RH.10", None, None, CRIT_MESA),
+    ],
+    "distancia_social": [
+        ("CD.12", "DS_even", 0.6, CRIT_PERSONAS_100),
+        ("CD.13", None, None, CRIT_PERSONAS_100),
+        ("MV.1", "DS_dom", 1.0, CRIT_EXISTE),
+        ("MV.2", None, None, CRIT_EXISTE_BAJO),
+        ("RS.1", "DS_reun", 0.8, CRIT_REUNION),
+        ("RS.2", None, None, CRIT_REUNION),
+        ("RS.3", None, None, CRIT_REUNION),
+        ("RS.8", None, None, CRIT_EXISTE),
+        ("TP.1", "DS_tran", 0.2, CRIT_EXISTE),
+    ],
+    "movilidad": [
+        ("MV.3", "MOV_qued", 1.0, CRIT_EXISTE),
+        ("MV.4", "MOV_per", 0.4, CRIT_EXISTE),
+        ("MV.7", "MOV_int", 1.0, CRIT_EXISTE),
+    ],
+}
+
+# Units written in the raw data for each criterion, as found in the original files
+# (they are renamed during the preprocess)
+DICT_CRITERIO_UNIDAD = {
+    CRIT_EXISTE: [None],
+    CRIT_EXISTE_BAJO: [None],
+    CRIT_PORCENTAJE: ["porcentaje", "aforo"],
+    CRIT_AFORO_6: ["porcentaje", "aforo", "personas"],
+    CRIT_AFORO_10: ["porcentaje", "aforo", "personas"],
+    CRIT_PERSONAS_6: ["personas", None],
+    CRIT_NO_ESPECIFICA: ["personas", None],
+    CRIT_PERSONAS_100: ["personas"],
+    CRIT_REUNION: ["personas"],
+    CRIT_MESA: ["mesas"],
+    CRIT_HORA: ["horario"],
+}
+
+# Interventions that appear in the raw data but are not in the taxonomy
+LIST_CODIGO_IGNORED = ["ED.1", "ED.2", "ED.5", "TP.3", "CO.11"]
+
+# Raw name of the percentage column, it changes between files
+LIST_PORCENTAJE_COLUMNS = [
+    "% afectado (si subprovincial; min 10%)",
+    "% afectado (si subprovincial; min 25%)",
+]
+
+LIST_NPI_COLUMNS = [
+    "Ámbito",
+    "Comunidad autónoma",
+    "Provincia",
+    "Fecha publicación oficial",
+    "Fecha inicio",
+    "Fecha fin",
+    "Cod_con",
+    "Cod_gen",
+    "Unidad de medida",
+    "Valor",
+    LIST_PORCENTAJE_COLUMNS[0],
+    "Nivel educación",
+]
+
+# Regions written with another name in the raw data {region: raw name}
+DICT_RAW_PROVINCIA = {
+    value: key for key, value in DICT_RENAME_PROVINCIA_LOWER.items() if value != ""
+}
+
+LIST_NIVEL_EDUCACION = [
+    "Todos",
+    "Infantil",
+    "Primaria",
+    "Secundaria",
+    "Bachillerato",
+    "Universidad",
+]
+
+DATE_START = "2020-03-15"
+
+# Provinces and codes of Spain, fixed before any region is added to them
+# (see `covidnpi.utils.regions.extend_regions`)
+LIST_PROVINCIA_LOWER = list(PROVINCIA_LOWER_TO_ISOPROV.keys())
+LIST_ISOPROV = list(ISOPROV_TO_POBLACION.keys())
+
+
+def list_synthetic_regions(num_regions: int = None) -> List[str]:
+    """Returns the regions that appear in the raw NPI data: every province
+    of Spain, but the groups of islands are replaced by their islands.
+    If `num_regions` is bigger, synthetic regions "region_00000", "region_00001"...
+    are appended to reach that number"""
+    list_regions = [
+        provincia
+        for provincia in LIST_PROVINCIA_LOWER
+        if provincia not in ["islas_baleares", "santa_cruz_de_tenerife"]
+    ]
+    for dict_islas in ISLA_TO_PERCENTAGE.values():
+        list_regions += [isla for isla in dict_islas if isla not in list_regions]
+    if num_regions is None:
+        return list_regions
+    num_extra = max(0, num_regions - len(list_regions))
+    list_regions += [f"region_{i:05d}" for i in range(num_extra)]
+    return list_regions[:num_regions]
+
+
+def return_dict_synthetic_regions(num_regions: int = None) -> Dict[str, tuple]:
+    """Returns the code and population of the synthetic regions of
+    `list_synthetic_regions`: "region_00000" has code "R00000", and so on.
+    Populations are spread between 50.000 and 2.000.000 inhabitants. Use it with
+    `covidnpi.utils.regions.extend_regions` to process them as provinces
+
+    Parameters
+    ----------
+    num_regions : int, optional
+        Number of regions, by default the regions of Spain (no synthetic ones)
+
+    Returns
+    -------
+    Dict[str, tuple]
+        Contains couples of {region: (code, population)}
+
+    """
+    num_extra = 0
+    if num_regions is not None:
+        num_extra = max(0, num_regions - len(list_synthetic_regions()))
+    return {
+        f"region_{i:05d}": (f"R{i:05d}", 50000 + (i * 104729) % 1950000)
+        for i in range(num_extra)
+    }
+
+
+def list_synthetic_codes(num_regions: int = None) -> List[str]:
+    """Returns the province codes that appear in the cases data: every code
+    of Spain and the codes of the synthetic regions, see
+    `return_dict_synthetic_regions`"""
+    dict_regions = return_dict_synthetic_regions(num_regions)
+    return LIST_ISOPROV + [code for code, _ in dict_regions.values()]
+
+
+def generate_taxonomy(path_taxonomy: str, dict_taxonomy: Dict = None) -> str:
+    """Writes a taxonomy xlsx file with the same format as the original one:
+    a summary sheet followed by one sheet per field of activity
+
+    Parameters
+    ----------
+    path_taxonomy : str
+        Path to the xlsx file
+    dict_taxonomy : Dict, optional
+        Taxonomy {field: [(codigo, nombre, ponderacion, criterio)]},
+        by default `DICT_TAXONOMY`
+
+    Returns
+    -------
+    str
+        Path to the xlsx file
+
+    """
+    if dict_taxonomy is None:
+        dict_taxonomy = DICT_TAXONOMY
+    with pd.ExcelWriter(path_taxonomy) as writer:
+        df = pd.DataFrame(
+            {
+                "Variable": list(dict_taxonomy.keys()),
+                "items": [
+                    sum(row[1] is not None for row in rows)
+                    for rows in dict_taxonomy.values()
+                ],
+            }
+        )
+        df.to_excel(writer, sheet_name="Resumen", index=False)
+        for field, rows in dict_taxonomy.items():
+            df = pd.DataFrame(
+                [
+                    (codigo, codigo, nombre, None, ponderacion, criterio)
+                    for codigo, nombre, ponderacion, criterio in rows
+                ],
+                columns=[
+                    "Código medida concreta",
+                    "Media concreta",
+                    "Nombre item",
+                    "Construccion del item",
+                    "Ponderación del item",
+                    "Criterio",
+                ],
+            )
+            df.to_excel(writer, sheet_name=field, index=False)
+    return path_taxonomy
+
+
+def return_dict_ccaa_to_regions(
+    list_regions: List[str], regions_per_ccaa: int = 4
+) -> Dict[str, List[str]]:
+    """Groups the regions in autonomous communities. The regions found in
+    `covidnpi.utils.preprocess.DICT_ADD_PROVINCE` keep their community, the rest
+    are grouped in synthetic communities of `regions_per_ccaa` regions"""
+    dict_ccaa = {}
+    list_rest = []
+    for region in list_regions:
+        if region in DICT_ADD_PROVINCE:
+            dict_ccaa.setdefault(DICT_ADD_PROVINCE[region], []).append(region)
+        else:
+            list_rest.append(region)
+    # Number of digits of the synthetic communities
+    width = len(str(len(list_rest) // regions_per_ccaa))
+    for i in range(0, len(list_rest), regions_per_ccaa):
+        ccaa = f"ccaa_{i // regions_per_ccaa:0{max(width, 2)}d}"
+        dict_ccaa[ccaa] = list_rest[i : i + regions_per_ccaa]
+    return dict_ccaa
+
+
+def generate_npi_dataframe(
+    ccaa: str,
+    list_regions: List[str],
+    num_years: int = 1,
+    num_measures: int = 100,
+    date_start: str = DATE_START,
+    random_state: np.random.RandomState = None,
+) -> pd.DataFrame:
+    """Generates the raw NPI data of an autonomous community, with the columns
+    of the original "base" sheet
+
+    Parameters
+    ----------
+    ccaa : str
+        Name of the autonomous community
+    list_regions : List[str]
+        Regions of the autonomous community
+    num_years : int, optional
+        Years covered by the interventions, by default 1
+    num_measures : int, optional
+        Interventions per region and year, by default 100
+    date_start : str, optional
+        Starting date of the interventions, by default `DATE_START`
+    random_state : numpy.random.RandomState, optional
+
+    Returns
+    -------
+    pandas.DataFrame
+        Raw NPI data
+
+    """
+    if random_state is None:
+        random_state = np.random.RandomState(0)
+    rng = random_state
+    # Every intervention of the taxonomy, with its criterion
+    list_rows = [row for rows in DICT_TAXONOMY.values() for row in rows]
+    dict_criterio = {codigo: criterio for codigo, _, _, criterio in list_rows}
+    list_codigo = list(dict_criterio.keys())
+
+    size = len(list_regions) * num_years * num_measures
+    provincia = np.repeat(
+        [DICT_RAW_PROVINCIA.get(p, p).replace("_", " ").title() for p in list_regions],
+        num_years * num_measures,
+    ).astype(object)
+    # Some interventions apply to the whole community, others to a part of a region
+    ambito = rng.choice(
+        ["Provincial", "Autonómico", "Subprovincial"], size=size, p=[0.6, 0.2, 0.2]
+    ).astype(object)
+    provincia[ambito == "Autonómico"] = None
+    porcentaje_afectado = np.where(
+        ambito == "Subprovincial", rng.randint(10, 40, size=size) + 0.5, np.nan
+    )
+    # Interventions, some of them not in the taxonomy. All of them appear at least
+    # once when possible, and one of each criterion comes first, so that every unit
+    # is found in the file even when there are few interventions
+    list_first = list(
+        {criterio: codigo for codigo, criterio in dict_criterio.items()}.values()
+    )
+    list_pool = list_first + [
+        c for c in list_codigo + LIST_CODIGO_IGNORED if c not in list_first
+    ]
+    codigo = rng.permutation(np.resize(np.array(list_pool, dtype=object), size))
+    criterio = pd.Series(codigo).map(dict_criterio).values
+    # Dates
+    days = rng.randint(0, 365 * num_years, size=size)
+    fecha_inicio = pd.Timestamp(date_start) + pd.to_timedelta(days, unit="D")
+    fecha_fin = fecha_inicio + pd.to_timedelta(rng.randint(7, 90, size=size), unit="D")
+    fecha_publicacion = fecha_inicio - pd.Timedelta(days=1)
+    fecha_inicio = pd.Series(fecha_inicio).mask(rng.rand(size) < 0.02)
+    # Units, chosen among the ones that fit the criterion of each intervention
+    unidad = np.full(size, None, dtype=object)
+    for crit, list_unidad in DICT_CRITERIO_UNIDAD.items():
+        mask = criterio == crit
+        unidad[mask] = rng.choice(np.array(list_unidad, dtype=object), mask.sum())
+    # Values of each unit
+    valor = np.full(size, None, dtype=object)
+    mask = np.isin(unidad, ["porcentaje", "aforo"])
+    valor[mask] = rng.randint(10, 101, size=mask.sum())
+    mask = np.isin(unidad, ["personas", "mesas"])
+    valor[mask] = rng.choice([4, 6, 10, 25, 100, 500], size=mask.sum())
+    mask = unidad == "horario"
+    hora = pd.Series(rng.choice([18, 20, 22, 23, 1], size=mask.sum())).map(
+        "{:02d}".format
+    ) + pd.Series(rng.choice([":00", ":30"], size=mask.sum()))
+    # Some hours are given as ranges
+    mask_range = rng.rand(mask.sum()) < 0.2
+    hora[mask_range] = "06:00-" + hora[mask_range]
+    valor[mask] = hora.values
+    # Education levels
+    nivel_educacion = np.full(size, np.nan, dtype=object)
+    mask = np.isin(codigo, ["ED.1", "ED.2", "ED.5"])
+    nivel_educacion[mask] = rng.choice(LIST_NIVEL_EDUCACION, size=mask.sum())
+
+    df = pd.DataFrame(
+        {
+            "Ámbito": ambito,
+            "Comunidad autónoma": ccaa.upper(),
+            "Provincia": provincia,
+            "Fecha publicación oficial": fecha_publicacion,
+            "Fecha inicio": fecha_inicio,
+            "Fecha fin": fecha_fin,
+            "Cod_con": codigo,
+            "Cod_gen": pd.Series(codigo).str.split(".").str[0].values,
+            "Unidad de medida": unidad,
+            "Valor": valor,
+            LIST_PORCENTAJE_COLUMNS[0]: porcentaje_afectado,
+            "Nivel educación": nivel_educacion,
+        },
+        columns=LIST_NPI_COLUMNS,
+    )
+    return df
+
+
+def generate_npi_folder(
+    path_raw: str,
+    num_regions: int = None,
+    num_years: int = 1,
+    num_measures: int = 100,
+    date_start: str = DATE_START,
+    seed: int = 0,
+    regions_per_ccaa: int = 4,
+) -> List[str]:
+    """Writes one xlsx file per autonomous community in `path_raw`, with the
+    format of the original NPI data, see `covidnpi.utils.preprocess.read_npi_data`.
+    The name of the base sheet and of the percentage column change between files,
+    as in the original data
+
+    Parameters
+    ----------
+    path_raw : str
+        Folder where the files are stored
+    num_regions : int, optional
+        Number of regions, by default all the regions of Spain
+        (see `list_synthetic_regions`)
+    num_years : int, optional
+        Years covered by the interventions, by default 1
+    num_measures : int, optional
+        Interventions per region and year, by default 100
+    date_start : str, optional
+        Starting date of the interventions, by default `DATE_START`
+    seed : int, optional
+        Random seed, by default 0. Each file has its own random state, derived
+        from the seed and the position of the file
+    regions_per_ccaa : int, optional
+        Regions per file, for those not belonging to a known community, by default 4
+
+    Returns
+    -------
+    List[str]
+        Paths to the xlsx files
+
+    """
+    list_regions = list_synthetic_regions(num_regions)
+    if not os.path.exists(path_raw):
+        os.makedirs(path_raw)
+    dict_ccaa = return_dict_ccaa_to_regions(
+        list_regions, regions_per_ccaa=regions_per_ccaa
+    )
+    list_path = []
+    for i, (ccaa, list_sub) in enumerate(dict_ccaa.items()):
+        df = generate_npi_dataframe(
+            ccaa,
+            list_sub,
+            num_years=num_years,
+            num_measures=num_measures,
+            date_start=date_start,
+            random_state=np.random.RandomState([seed, i]),
+        )
+        df = df.rename(
+            columns={
+                LIST_PORCENTAJE_COLUMNS[0]: LIST_PORCENTAJE_COLUMNS[
+                    i % len(LIST_PORCENTAJE_COLUMNS)
+                ]
+            }
+        )
+        path_file = os.path.join(path_raw, f"Medidas_{ccaa}.xlsx")
+        sheet_name = LIST_BASE_SHEET[i % len(LIST_BASE_SHEET)]
+        df.to_excel(path_file, sheet_name=sheet_name, index=False)
+        list_path.append(path_file)
+    return list_path
+
+
+def generate_cases_csv(
+    path_cases: str,
+    num_regions: int = None,
+    num_years: int = 1,
+    date_start: str = DATE_START,
+    seed: int = 0,
+    chunk_days: int = 30,
+) -> str:
+    """Writes a csv with the format of the ISCIII cases by province, see
+    `covidnpi.utils.cases.load_cases_df`. Cases follow waves of different height
+    for each province, proportional to its population, see
+    `return_dict_synthetic_regions`. The file is written in chunks of dates,
+    so memory does not grow with the number of years
+
+    Parameters
+    ----------
+    path_cases : str
+        Path to the csv file
+    num_regions : int, optional
+        Number of regions, by default the provinces of Spain
+        (see `list_synthetic_codes`)
+    num_years : int, optional
+        Years covered by the cases, by default 1
+    date_start : str, optional
+        First date, by default `DATE_START`
+    seed : int, optional
+        Random seed, by default 0
+    chunk_days : int, optional
+        Days written at once, by default 30
+
+    Returns
+    -------
+    str
+        Path to the csv file
+
+    """
+    rng = np.random.RandomState(seed)
+    dates = pd.date_range(date_start, periods=365 * num_years)
+    # Province codes as written by the ISCIII, and missing codes
+    list_codes = list_synthetic_codes(num_regions) + ["NC"]
+    dict_poblacion = dict(return_dict_synthetic_regions(num_regions).values())
+    dict_poblacion.update({c: ISOPROV_TO_POBLACION[c] for c in LIST_ISOPROV})
+    poblacion = np.array([dict_poblacion.get(c, 0) for c in list_codes], dtype=float)
+    mask_missing = poblacion == 0
+    poblacion[mask_missing] = rng.randint(50000, 2000000, size=mask_missing.sum())
+    # Waves of incidence per 100.000 inhabitants
+    phase = rng.uniform(0, 2 * np.pi, size=len(list_codes))
+
+    for start in range(0, len(dates), chunk_days):
+        dates_chunk = dates[start : start + chunk_days]
+        t = np.arange(start, start + len(dates_chunk))[:, None]
+        incidence = 5 + 45 * np.sin(2 * np.pi * t / 120 + phase) ** 2
+        num_casos = rng.poisson(incidence * poblacion / 1e5)
+        df = pd.DataFrame(
+            {
+                "provincia_iso": np.tile(list_codes, len(dates_chunk)),
+                "fecha": np.repeat(dates_chunk.strftime("%Y-%m-%d"), len(list_codes)),
+                "num_casos": num_casos.ravel(),
+            }
+        )
+        df["num_casos_prueba_pcr"] = (df["num_casos"] * 0.7).astype(int)
+        df["num_casos_prueba_test_ac"] = 0
+        df["num_casos_prueba_ag"] = df["num_casos"] - df["num_casos_prueba_pcr"]
+        df["num_casos_prueba_elisa"] = 0
+        df["num_casos_prueba_desconocida"] = 0
+        df.to_csv(
+            path_cases, index=False, mode="w" if start == 0 else "a", header=start == 0
+        )
+    return path_cases
+
+
+def main(
+    path_output: str = "synthetic",
+    num_regions: int = None,
+    num_years: int = 1,
+    num_measures: int = 100,
+    seed: int = 0,
+    regions_per_ccaa: int = 4,
+):
+    """Generates synthetic data in `path_output`: the taxonomy (taxonomy.xlsx),
+    the NPI files (datos_NPI folder) and the cases (cases.csv)
+
+    Parameters
+    ----------
+    path_output : str, optional
+        Output folder, by default "synthetic"
+    num_regions : int, optional
+        Number of regions, by default all the regions of Spain
+    num_years : int, optional
+        Years covered by the data, by default 1
+    num_measures : int, optional
+        Interventions per region and year, by default 100
+    seed : int, optional
+        Random seed, by default 0
+    regions_per_ccaa : int, optional
+        Regions per NPI file, by default 4
+
+    """
+    if not os.path.exists(path_output):
+        os.makedirs(path_output)
+    generate_taxonomy(os.path.join(path_output, "taxonomy.xlsx"))
+    list_path = generate_npi_folder(
+        os.path.join(path_output, "datos_NPI"),
+        num_regions=num_regions,
+        num_years=num_years,
+        num_measures=num_measures,
+        seed=seed,
+        regions_per_ccaa=regions_per_ccaa,
+    )
+    generate_cases_csv(
+        os.path.join(path_output, "cases.csv"),
+        num_regions=num_regions,
+        num_years=num_years,
+        seed=seed,
+    )
+    logger.debug(f"{len(list_path)} NPI files have been stored in {path_output}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
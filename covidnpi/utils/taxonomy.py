@@ -2,6 +2,10 @@ import pandas as pd
 
 PATH_TAXONOMY = "datos_NPI/Taxonomía_11052021.xlsx"
 
+# Interventions that are split by education level, and the initials of the levels
+LIST_CODIGO_NIVEL_EDUCACION = ["ED.1", "ED.2", "ED.5"]
+LIST_NIVEL_EDUCACION = ["I", "P", "S", "B", "U"]
+
 
 def read_taxonomy(path_taxonomy: str = PATH_TAXONOMY) -> pd.DataFrame:
     xl = pd.ExcelFile(path_taxonomy)
@@ -54,10 +58,10 @@ def return_all_interventions(path_taxonomy: str = PATH_TAXONOMY):
 
     list_codigos = df["codigo"].unique().tolist()
 
-    for codigo in ["ED.1", "ED.2", "ED.5"]:
+    for codigo in LIST_CODIGO_NIVEL_EDUCACION:
         if codigo in list_codigos:
             list_codigos.remove(codigo)
-            for niv in ["I", "P", "S", "B", "U"]:
+            for niv in LIST_NIVEL_EDUCACION:
                 list_codigos += [codigo + niv]
 
     return sorted(list_codigos)
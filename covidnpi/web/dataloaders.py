@@ -4,6 +4,7 @@ from typing import Dict, List, Tuple
 import numpy as np
 import pandas as pd
 from covidnpi.utils.config import load_config
+from covidnpi.web.encoding import decode_document
 from covidnpi.web.mongo import load_mongo
 
 
@@ -60,7 +61,60 @@ def return_scores_of_fields_by_province(
     mongo = load_mongo(cfg_mongo)
     col = mongo.get_col("scores")
 
-    dict_provincia = col.find_one({"code": code})
+    dict_provincia = decode_document(col.find_one({"code": code}))
+    return build_scores_of_fields_by_province(dict_provincia, code, fields, cfg_mongo)
+
+
+def return_scores_of_fields_by_rollup(
+    code: str, fields: tuple, path_config: str = "covidnpi/config.toml"
+) -> Dict:
+    """Loads the scores stored in mongo for a given combination of autonomous
+    community (or "ES", the whole country) and fields. Communities are
+    identified by their ISO code, see `covidnpi.utils.regions.ISOCCAA_TO_ISOPROV`
+
+    Parameters
+    ----------
+    code : str
+    fields : tuple
+    path_config : str, optional
+
+    Returns
+    -------
+    dict_plot : dict
+        {field: {x, y}}
+        x are dates in string format, y are the score values
+
+    """
+    cfg_mongo = load_config(path_config, key="mongo")
+    mongo = load_mongo(cfg_mongo)
+    col = mongo.get_col("rollup")
+
+    dict_rollup = decode_document(col.find_one({"code": code}))
+    return build_scores_of_fields_by_province(dict_rollup, code, fields, cfg_mongo)
+
+
+def build_scores_of_fields_by_province(
+    dict_provincia: Dict, code: str, fields: tuple, cfg_mongo: Dict
+) -> Dict:
+    """Builds the output of `return_scores_of_fields_by_province` from the
+    document stored in mongo
+
+    Parameters
+    ----------
+    dict_provincia : Dict
+        Document of the province, from collection "scores"
+    code : str
+    fields : tuple
+    cfg_mongo : Dict
+        Config with keys "date_min" and "date_max"
+
+    Returns
+    -------
+    dict_plot : dict
+        {field: {x, y}}
+        x are dates in string format, y are the score values
+
+    """
     try:
         x = dict_provincia["dates"]
     except TypeError:
@@ -131,7 +185,7 @@ def return_scores_of_provinces_by_field(
     x = [cfg_mongo["date_min"]]
 
     for code in codes:
-        dict_provincia = col.find_one({"code": code})
+        dict_provincia = decode_document(col.find_one({"code": code}))
         try:
             x = dict_provincia["dates"]
             y = dict_provincia[field]
@@ -178,7 +232,29 @@ def return_cases_of_province(
     mongo = load_mongo(cfg_mongo)
     col = mongo.get_col("cases")
 
-    x = col.find_one({"code": code})
+    x = decode_document(col.find_one({"code": code}))
+    return build_cases_of_province(x, code, cfg_mongo)
+
+
+def build_cases_of_province(x: Dict, code: str, cfg_mongo: Dict) -> Dict:
+    """Builds the output of `return_cases_of_province` from the document
+    stored in mongo
+
+    Parameters
+    ----------
+    x : Dict
+        Document of the province, from collection "cases"
+    code : str
+    cfg_mongo : Dict
+        Config with keys "date_min" and "date_max"
+
+    Returns
+    -------
+    dict_plot : dict
+        {x, y}
+        x are dates in string format, y are the number of cases
+
+    """
     try:
         dates = x["dates"]
         cases = x["cases"]
@@ -223,7 +299,33 @@ def return_growth_of_province(
     mongo = load_mongo(cfg_mongo)
     col = mongo.get_col("cases")
 
-    x = col.find_one({"code": code})
+    x = decode_document(col.find_one({"code": code}))
+    return build_growth_of_province(x, code, cfg_mongo, logarithmic=logarithmic)
+
+
+def build_growth_of_province(
+    x: Dict, code: str, cfg_mongo: Dict, logarithmic: bool = True
+) -> Dict:
+    """Builds the output of `return_growth_of_province` from the document
+    stored in mongo
+
+    Parameters
+    ----------
+    x : Dict
+        Document of the province, from collection "cases"
+    code : str
+    cfg_mongo : Dict
+        Config with keys "date_min" and "date_max"
+    logarithmic : bool, optional
+        Return LR instead of GR, by default True
+
+    Returns
+    -------
+    dict_plot : dict
+        {x, y}
+        x are dates in string format, y are the growth values
+
+    """
     if logarithmic:
         key = "logarithmic_growth_rate"
         y_max = 1.2
@@ -274,18 +376,40 @@ def return_statistics_of_field_by_province(
     mongo = load_mongo(cfg_mongo)
     col = mongo.get_col("scores")
 
-    x = col.find_one({"code": code})
-    list_fields = x["fields"]
-    list_fields.append(list_fields[0])
-    list_statistics = col.find_one({"code": "statistics"})["list"]
-    dict_types = col.find_one({"code": "statistics"})["types"]
+    x = decode_document(col.find_one({"code": code}))
+    dict_statistics = col.find_one({"code": "statistics"})
+    return build_statistics_of_field_by_province(x, dict_statistics)
+
+
+def build_statistics_of_field_by_province(x: Dict, dict_statistics: Dict) -> List[Dict]:
+    """Builds the output of `return_statistics_of_field_by_province` from the
+    documents stored in mongo
+
+    Parameters
+    ----------
+    x : Dict
+        Document of the province, from collection "scores"
+    dict_statistics : Dict
+        Document with code "statistics", from collection "scores"
+
+    Returns
+    -------
+    List[Dict]
+        List of dictionaries with format {"r": List[float], "theta": List[str], "name": str}
+    """
+    # The first value is repeated at the end to close the polygon, in new lists
+    # so that the documents are not modified
+    list_fields = list(x["fields"])
+    list_fields = list_fields + list_fields[:1]
+    list_statistics = dict_statistics["list"]
+    dict_types = dict_statistics["types"]
     list_plot = []
     for key in list_statistics:
         try:
-            r = x[key]
+            r = list(x[key])
         except KeyError:
             continue
-        r.append(r[0])
+        r = r + r[:1]
         list_plot.append(
             {"r": r, "theta": list_fields, "name": key, "type": dict_types[key]}
         )
@@ -315,6 +439,31 @@ def return_scores_boxplot_of_field(
     col = mongo.get_col("boxplot")
     x = col.find_one({"code": code})
     dict_color = col.find_one({"code": "color"})
+    return build_scores_boxplot_of_field(x, code, dict_color, cfg_mongo)
+
+
+def build_scores_boxplot_of_field(
+    x: Dict, code: str, dict_color: Dict, cfg_mongo: Dict
+) -> List[Dict]:
+    """Builds the output of `return_scores_boxplot_of_field` from the documents
+    stored in mongo
+
+    Parameters
+    ----------
+    x : Dict
+        Document of the field, from collection "boxplot"
+    code : str
+        Field of activity code
+    dict_color : Dict
+        Document with code "color", from collection "boxplot"
+    cfg_mongo : Dict
+        Config with keys "date_min" and "date_max"
+
+    Returns
+    -------
+    List[Dict]
+        List of dictionaries with format {"x": List[str], "y": List[float], "color": str, "name": str}
+    """
     try:
         list_dates = x["dates"]
     except (KeyError, TypeError) as er:
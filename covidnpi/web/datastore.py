@@ -1,5 +1,6 @@
 import datetime as dt
 from pathlib import Path
+from typing import Dict, List
 
 import numpy as np
 import pandas as pd
@@ -7,12 +8,15 @@ import typer
 from covidnpi.utils.config import load_config
 from covidnpi.utils.log import logger
 from covidnpi.utils.regions import (
+    CCAA_LOWER_TO_ISOCCAA,
+    ISO_NATIONAL,
     ISOPROV_TO_PROVINCIA_LOWER,
+    NATIONAL_LOWER,
     PROVINCIA_LOWER_TO_ISOPROV,
 )
 from covidnpi.utils.taxonomy import PATH_TAXONOMY, return_taxonomy
+from covidnpi.web.encoding import decode_document, encode_document
 from covidnpi.web.mongo import load_mongo
-from scipy.stats import iqr, variation
 
 DICT_FIELDS = {
     "ceremonias": "Ceremonies and religious celebrations",
@@ -62,10 +66,112 @@ DICT_BOXPLOT_COLOR = {
 }
 
 
+def build_scores_document(
+    df: pd.DataFrame, provincia: str, list_field: List[str], code: str = None
+) -> Dict:
+    """Builds the document of scores of a province, see `store_scores_in_mongo`
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Scores of each field, indexed by date
+    provincia : str
+        Name of the province
+    list_field : List[str]
+        Fields of activity
+    code : str, optional
+        Code of the region, by default the code of the province
+
+    Returns
+    -------
+    Dict
+        Document of scores
+
+    Raises
+    ------
+    KeyError
+        If the code of the province is not found
+
+    """
+    # scipy takes long to import, and only this function needs it
+    from scipy.stats import iqr, variation
+
+    dict_provincia = {
+        "province": provincia,
+        "code": PROVINCIA_LOWER_TO_ISOPROV[provincia] if code is None else code,
+        "dates": df.index.tolist(),
+    }
+
+    # Initialize list of statistics
+    list_mean = []
+    list_q25 = []
+    list_median = []
+    list_q75 = []
+    list_std = []
+    list_iqr = []
+    list_var = []
+
+    # Loop through fields of activity
+    for field in list_field:
+        logger.debug(f"  {field}")
+        series = df[field].values.tolist()
+        # Store field name in English
+        dict_provincia.update({DICT_FIELDS.get(field, field): series})
+        # Compute all statistics
+        list_mean.append(np.mean(series))
+        list_q25.append(np.quantile(series, 0.25))
+        list_median.append(np.median(series))
+        list_q75.append(np.quantile(series, 0.75))
+        list_std.append(np.std(series))
+        list_iqr.append(iqr(series))
+        list_var.append(variation(series))
+
+    # Include statistics
+    dict_provincia.update(
+        {
+            "Mean": list_mean,
+            "q25": list_q25,
+            "Median": list_median,
+            "q75": list_q75,
+            "Standard deviation": list_std,
+            "Interquantile range": list_iqr,
+            "Coefficient of variation": list_var,
+            "fields": [DICT_FIELDS.get(s, s) for s in list_field],
+        }
+    )
+    return dict_provincia
+
+
+def return_scores_documents(
+    path_output: Path, list_field: List[str], date_min: dt.datetime
+) -> List[Dict]:
+    """Reads the scores of each province stored in `path_output` and returns
+    their documents, see `build_scores_document`. Dates previous to `date_min`
+    are filtered"""
+    list_docs = []
+    for path_file in path_output.iterdir():
+        df = pd.read_csv(path_file, index_col="fecha")
+        # Filter dates previous to the minimum date
+        mask_date = pd.to_datetime(df.index, format="%Y-%m-%d") >= date_min
+        df = df[mask_date]
+        provincia = path_file.stem
+        logger.debug(f"\n{provincia}")
+        try:
+            dict_provincia = build_scores_document(df, provincia, list_field)
+        except KeyError:
+            logger.debug(
+                f"\nProvincia '{provincia}' code not found. Not stored in mongo.\n"
+            )
+            continue
+        list_docs.append(dict_provincia)
+    return list_docs
+
+
 def store_scores_in_mongo(
     path_output: Path = Path("output/score_field"),
     path_taxonomy: str = PATH_TAXONOMY,
     path_config: str = "covidnpi/config.toml",
+    compact: bool = False,
 ):
     """Store NPI scores in mongo server. Format:
     [
@@ -88,6 +194,9 @@ def store_scores_in_mongo(
         Path to taxonomy file
     path_config : str, optional
         Config file contains the route and credentials of mongo server
+    compact : bool, optional
+        If True, store the series of scores as float32 binary arrays, see
+        `covidnpi.web.encoding.encode_document`, by default False
 
     """
 
@@ -99,67 +208,17 @@ def store_scores_in_mongo(
     # Get the minimum date in datetime format
     date_min = dt.datetime.strptime(cfg_mongo["date_min"], "%Y-%m-%d")
 
-    for path_file in path_output.iterdir():
-        df = pd.read_csv(path_file, index_col="fecha")
-        # Filter dates previous to the minimum date
-        mask_date = pd.to_datetime(df.index, format="%Y-%m-%d") >= date_min
-        df = df[mask_date]
-        provincia = path_file.stem
-        try:
-            dict_provincia = {
-                "province": provincia,
-                "code": PROVINCIA_LOWER_TO_ISOPROV[provincia],
-                "dates": df.index.tolist(),
-            }
-        except KeyError:
-            logger.debug(
-                f"\nProvincia '{provincia}' code not found. Not stored in mongo.\n"
+    col = mongo.get_col("scores")
+    for dict_provincia in return_scores_documents(path_output, list_field, date_min):
+        provincia = dict_provincia["province"]
+        if compact:
+            dict_provincia = encode_document(
+                dict_provincia, [DICT_FIELDS.get(s, s) for s in list_field]
             )
-            continue
-        logger.debug(f"\n{provincia}")
-
-        # Initialize list of statistics
-        list_mean = []
-        list_q25 = []
-        list_median = []
-        list_q75 = []
-        list_std = []
-        list_iqr = []
-        list_var = []
-
-        # Loop through fields of activity
-        for field in list_field:
-            logger.debug(f"  {field}")
-            series = df[field].values.tolist()
-            # Store field name in English
-            dict_provincia.update({DICT_FIELDS.get(field, field): series})
-            # Compute all statistics
-            list_mean.append(np.mean(series))
-            list_q25.append(np.quantile(series, 0.25))
-            list_median.append(np.median(series))
-            list_q75.append(np.quantile(series, 0.75))
-            list_std.append(np.std(series))
-            list_iqr.append(iqr(series))
-            list_var.append(variation(series))
-
-        # Include statistics
-        dict_provincia.update(
-            {
-                "Mean": list_mean,
-                "q25": list_q25,
-                "Median": list_median,
-                "q75": list_q75,
-                "Standard deviation": list_std,
-                "Interquantile range": list_iqr,
-                "Coefficient of variation": list_var,
-                "fields": [DICT_FIELDS.get(s, s) for s in list_field],
-            }
-        )
 
         try:
-            col = mongo.get_col("scores")
             dict_found = col.find_one({"province": provincia})
-            _ = dict_found["dates"]
+            _ = dict_found["code"]
             mongo.update_dict("scores", "province", provincia, dict_provincia)
         except TypeError:
             _ = mongo.insert_new_dict("scores", dict_provincia)
@@ -174,26 +233,89 @@ def store_scores_in_mongo(
         _ = mongo.insert_new_dict("scores", DICT_SCORES_STATISTICS)
 
 
-def store_cases_in_mongo(
-    path_output: Path = Path("output"),
+def return_rollup_documents(
+    path_output: Path, list_field: List[str], date_min: dt.datetime
+) -> List[Dict]:
+    """Reads the scores of each community and of the country stored in
+    `path_output` and returns their documents, see `store_rollup_in_mongo`.
+    Dates previous to `date_min` are filtered"""
+    list_docs = []
+    for path_file in sorted(path_output.iterdir()):
+        name = path_file.stem
+        if name == NATIONAL_LOWER:
+            code, level = ISO_NATIONAL, "country"
+        elif name in CCAA_LOWER_TO_ISOCCAA:
+            code, level = CCAA_LOWER_TO_ISOCCAA[name], "ccaa"
+        else:
+            logger.debug(f"\nRegion '{name}' code not found. Not stored in mongo.\n")
+            continue
+        df = pd.read_csv(path_file, index_col="fecha")
+        # Filter dates previous to the minimum date
+        df = df[pd.to_datetime(df.index, format="%Y-%m-%d") >= date_min]
+        dict_rollup = build_scores_document(df, name, list_field, code=code)
+        dict_rollup["level"] = level
+        list_docs.append(dict_rollup)
+    return list_docs
+
+
+def store_rollup_in_mongo(
+    path_output: Path = Path("output/score_rollup"),
+    path_taxonomy: str = PATH_TAXONOMY,
     path_config: str = "covidnpi/config.toml",
+    compact: bool = False,
 ):
-    """Store cases and growth rate in mongo
+    """Store the scores of each community and of the country in the mongo
+    collection "rollup", with the same format as `store_scores_in_mongo`, plus
+    the "level" of the region ("ccaa" or "country"). Their codes are the ISO
+    codes of the communities and "ES"
 
     Parameters
     ----------
     path_output : Path, optional
-        Path where the output is located
+        Path containing the rollups, see `covidnpi.score.rollup.return_dict_rollup`
+    path_taxonomy : str, optional
+        Path to taxonomy file
     path_config : str, optional
         Config file contains the route and credentials of mongo server
+    compact : bool, optional
+        If True, store the series of scores as float32 binary arrays, see
+        `covidnpi.web.encoding.encode_document`, by default False
 
     """
-    # Initialize mongo
+    if not path_output.exists():
+        logger.warning(f"No rollups found in {path_output}")
+        return
     cfg_mongo = load_config(path_config, key="mongo")
     mongo = load_mongo(cfg_mongo)
-    # Load Cumulative cases and Growth Rate
-    cfg_cases = load_config(path_config, key="cases")
-    days = cfg_cases["movavg"]
+
+    taxonomy = return_taxonomy(path_taxonomy=path_taxonomy)
+    list_field = taxonomy["ambito"].unique().tolist()
+    # Get the minimum date in datetime format
+    date_min = dt.datetime.strptime(cfg_mongo["date_min"], "%Y-%m-%d")
+
+    col = mongo.get_col("rollup")
+    for dict_rollup in return_rollup_documents(path_output, list_field, date_min):
+        code = dict_rollup["code"]
+        if compact:
+            dict_rollup = encode_document(
+                dict_rollup, [DICT_FIELDS.get(s, s) for s in list_field]
+            )
+        try:
+            dict_found = col.find_one({"code": code})
+            _ = dict_found["code"]
+            mongo.update_dict("rollup", "code", code, dict_rollup)
+        except TypeError:
+            _ = mongo.insert_new_dict("rollup", dict_rollup)
+        except KeyError as er:
+            raise KeyError(f"Error in collection 'rollup': {er}")
+
+
+def return_cases_documents(
+    path_output: Path, days: int, date_min: dt.datetime
+) -> List[Dict]:
+    """Reads the cumulative cases and growth rates stored in `path_output` by
+    `covidnpi.store_cases` and returns the document of each province,
+    see `store_cases_in_mongo`. Dates previous to `date_min` are filtered"""
     df_cuminc = pd.read_csv(
         path_output / f"covid_cases_cumulative_{days}.csv",
         index_col=0,
@@ -210,9 +332,7 @@ def store_cases_in_mongo(
         parse_dates=True,
     )
 
-    # Get the minimum date in datetime format
-    date_min = dt.datetime.strptime(cfg_mongo["date_min"], "%Y-%m-%d")
-
+    list_docs = []
     # Loop through province codes
     for code, ser_cuminc in df_cuminc.iteritems():
         logger.debug(f"{code}")
@@ -237,11 +357,48 @@ def store_cases_in_mongo(
             "logarithmic_growth_rate": ser_lr.values.tolist(),
             "lr": ser_lr.values.tolist(),  # Repeated to ease access
         }
+        list_docs.append(dict_provincia)
+    return list_docs
+
+
+def store_cases_in_mongo(
+    path_output: Path = Path("output"),
+    path_config: str = "covidnpi/config.toml",
+    compact: bool = False,
+):
+    """Store cases and growth rate in mongo
+
+    Parameters
+    ----------
+    path_output : Path, optional
+        Path where the output is located
+    path_config : str, optional
+        Config file contains the route and credentials of mongo server
+    compact : bool, optional
+        If True, store the series as float32 binary arrays without repeated keys,
+        see `covidnpi.web.encoding.encode_document`, by default False
+
+    """
+    # Initialize mongo
+    cfg_mongo = load_config(path_config, key="mongo")
+    mongo = load_mongo(cfg_mongo)
+    # Load Cumulative cases and Growth Rate
+    cfg_cases = load_config(path_config, key="cases")
+    days = cfg_cases["movavg"]
+    # Get the minimum date in datetime format
+    date_min = dt.datetime.strptime(cfg_mongo["date_min"], "%Y-%m-%d")
+
+    col = mongo.get_col("cases")
+    for dict_provincia in return_cases_documents(path_output, days, date_min):
+        code = dict_provincia["code"]
+        if compact:
+            dict_provincia = encode_document(
+                dict_provincia, ["cases", "growth_rate", "logarithmic_growth_rate"]
+            )
         # Store the information in mongo
         try:
-            col = mongo.get_col("cases")
             dict_found = col.find_one({"code": code})
-            _ = dict_found["dates"]
+            _ = dict_found["code"]
             mongo.update_dict("cases", "code", code, dict_provincia)
         except TypeError:
             _ = mongo.insert_new_dict("cases", dict_provincia)
@@ -258,19 +415,30 @@ def store_boxplot_in_mongo(
     ----------
     path_config : str, optional
         Config file contains the route and credentials of mongo server
+    collection : str, optional
+        Collection used to compute the boxplots, "scores" or "cases"
 
     """
     cfg_mongo = load_config(path_config, key="mongo")
     mongo = load_mongo(cfg_mongo)
     col = mongo.get_col(collection)
+    # List provinces and load their documents
+    list_provinces = col.distinct("province")
+    dict_docs = {
+        province: decode_document(col.find_one({"province": province}))
+        for province in list_provinces
+    }
     # Define whole range of dates, to be common for all provinces
-    list_dates = [dt.datetime.strptime(d, "%Y-%m-%d") for d in col.distinct("dates")]
+    list_dates = [
+        dt.datetime.strptime(d, "%Y-%m-%d")
+        for dict_prov in dict_docs.values()
+        for d in dict_prov["dates"]
+    ]
     index = pd.date_range(min(list_dates), max(list_dates))
     list_dates = index.format(formatter=lambda x: x.strftime("%Y-%m-%d"))
-    # List provinces and statistics
-    list_provinces = col.distinct("province")
+    # List statistics
     if collection == "scores":
-        list_codes = col.find_one({"province": list_provinces[0]})["fields"]
+        list_codes = dict_docs[list_provinces[0]]["fields"]
     elif collection == "cases":
         list_codes = [
             "cases",
@@ -286,7 +454,7 @@ def store_boxplot_in_mongo(
     # for all provinces
     dict_codes = {code: [] for code in list_codes}
     for province in list_provinces:
-        dict_prov = col.find_one({"province": province})
+        dict_prov = dict_docs[province]
         dates = [dt.datetime.strptime(d, "%Y-%m-%d") for d in dict_prov["dates"]]
         for code in list_codes:
             ser = pd.Series(dict_prov[code], index=dates)
@@ -330,6 +498,7 @@ def datastore(
     path_taxonomy: str = PATH_TAXONOMY,
     path_config: str = "config.toml",
     free_memory: bool = False,
+    compact: bool = False,
 ):
     """Stores the data contained in the output folder in mongo
 
@@ -345,6 +514,8 @@ def datastore(
         Path to the regions file
     free_memory : bool, optional
         If True, free the memory of the database before loading new data, by default False
+    compact : bool, optional
+        If True, store the series as float32 binary arrays, by default False
 
     """
 
@@ -355,6 +526,7 @@ def datastore(
         mongo.remove_collection("boxplot")
         mongo.remove_collection("cases")
         mongo.remove_collection("scores")
+        mongo.remove_collection("rollup")
 
     path_output = Path(path_output)
     logger.debug("\n-----\nStoring scores in mongo\n-----\n")
@@ -362,11 +534,21 @@ def datastore(
         path_output=path_output / "score_field",
         path_taxonomy=path_taxonomy,
         path_config=path_config,
+        compact=compact,
+    )
+    logger.debug("\n-----\nStoring community and national scores in mongo\n-----\n")
+    store_rollup_in_mongo(
+        path_output=path_output / "score_rollup",
+        path_taxonomy=path_taxonomy,
+        path_config=path_config,
+        compact=compact,
     )
     logger.debug("\n-----\nStoring boxplots in mongo\n-----\n")
     store_boxplot_in_mongo(path_config=path_config, collection="scores")
     logger.debug("\n-----\nStoring number of cases in mongo\n-----\n")
-    store_cases_in_mongo(path_output=path_output, path_config=path_config)
+    store_cases_in_mongo(
+        path_output=path_output, path_config=path_config, compact=compact
+    )
     logger.debug("\n-----\nStoring cases boxplots in mongo\n-----\n")
     store_boxplot_in_mongo(path_config=path_config, collection="cases")
 
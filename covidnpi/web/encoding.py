@@ -0,0 +1,107 @@
+import datetime as dt
+from typing import Dict, List
+
+import numpy as np
+
+# Name of the encoding stored in compact documents
+ENCODING = "float32"
+
+# Keys repeated in the documents of "cases" to ease access {alias: key}
+DICT_ALIASES = {
+    "ci": "cases",
+    "gr": "growth_rate",
+    "lr": "logarithmic_growth_rate",
+}
+
+
+def encode_series(values: List[float]) -> "Binary":
+    """Encodes a list of floats as a little-endian float32 binary array"""
+    # bson comes with pymongo, it is only needed when storing documents
+    from bson.binary import Binary
+
+    return Binary(np.asarray(values, dtype="<f4").tobytes())
+
+
+def decode_series(data: bytes) -> List[float]:
+    """Decodes a binary array built by `encode_series` into a list of floats"""
+    return np.frombuffer(data, dtype="<f4").astype(float).tolist()
+
+
+def encode_document(dict_doc: Dict, list_series: List[str]) -> Dict:
+    """Encodes a mongo document in compact format:
+    - The series in `list_series` are stored as float32 binary arrays
+    - "dates" is replaced by "date_start", when dates are consecutive days
+    - Aliases (see `DICT_ALIASES`) are removed, they are resolved when decoding
+
+    Parameters
+    ----------
+    dict_doc : Dict
+        Document with keys "dates" and the ones listed in `list_series`
+    list_series : List[str]
+        Keys of the document containing series of floats
+
+    Returns
+    -------
+    Dict
+        Document in compact format
+    """
+    list_series = [s for s in list_series if s not in DICT_ALIASES]
+    # Dates are stored only by their first value, if they are consecutive days
+    dates = [dt.datetime.strptime(d, "%Y-%m-%d") for d in dict_doc["dates"]]
+    is_daily = all((d2 - d1).days == 1 for d1, d2 in zip(dates[:-1], dates[1:]))
+    # Keep the order of the keys, so that the decoded document matches the original
+    dict_compact = {}
+    for key, value in dict_doc.items():
+        if key in DICT_ALIASES:
+            continue
+        elif key in list_series:
+            dict_compact[key] = encode_series(value)
+        elif (key == "dates") and is_daily:
+            dict_compact["date_start"] = value[0] if len(value) > 0 else None
+            dict_compact["length"] = len(value)
+        else:
+            dict_compact[key] = value
+    dict_compact.update({"encoding": ENCODING, "series": list_series})
+    return dict_compact
+
+
+def decode_document(dict_doc: Dict) -> Dict:
+    """Decodes a document built by `encode_document`, returning it in the
+    original format. Documents that are not compact are returned untouched
+
+    Parameters
+    ----------
+    dict_doc : Dict
+        Document stored in mongo
+
+    Returns
+    -------
+    Dict
+        Document in original format
+    """
+    if (dict_doc is None) or (dict_doc.get("encoding") != ENCODING):
+        return dict_doc
+    list_series = dict_doc["series"]
+    dict_alias = {key: alias for alias, key in DICT_ALIASES.items()}
+    dict_decoded = {}
+    for key, value in dict_doc.items():
+        if key in ["encoding", "series", "length"]:
+            continue
+        elif key == "date_start":
+            length = dict_doc["length"]
+            if length == 0:
+                dict_decoded["dates"] = []
+                continue
+            date_start = dt.datetime.strptime(value, "%Y-%m-%d")
+            dict_decoded["dates"] = [
+                (date_start + dt.timedelta(days=i)).strftime("%Y-%m-%d")
+                for i in range(length)
+            ]
+        elif key in list_series:
+            dict_decoded[key] = decode_series(value)
+            # Resolve aliases
+            if key in dict_alias:
+                dict_decoded[dict_alias[key]] = list(dict_decoded[key])
+        else:
+            dict_decoded[key] = value
+    return dict_decoded
@@ -4,6 +4,7 @@ import typer
 
 from covidnpi.utils.config import load_config
 from covidnpi.utils.log import logger
+from covidnpi.web.encoding import decode_document
 from covidnpi.web.mongo import load_mongo
 from covidnpi.utils.regions import ISOPROV_TO_PROVINCIA
 
@@ -43,7 +44,7 @@ def json_fields(path_config: str, path_json: str):
     cfg_mongo = load_config(path_config, "mongo")
     mongo = load_mongo(cfg_mongo)
     col = mongo.get_col("scores")
-    dict_provincia = col.find_one({"code": "M"})
+    dict_provincia = decode_document(col.find_one({"code": "M"}))
     list_fields = [k for k in dict_provincia.keys()]
     for remove in ["code", "province", "dates", "_id"]:
         try:
@@ -1,15 +1,19 @@
-import pymongo
 from covidnpi.utils.log import logger
 
 
 class SingletonMeta(type):
+    """Keeps one instance per class and key. The key is given by the method
+    `singleton_key` of the class, called with the arguments of the instance"""
+
     _instances = {}
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
+        key_method = getattr(cls, "singleton_key", None)
+        key = (cls, None if key_method is None else key_method(*args, **kwargs))
+        if key not in cls._instances:
             instance = super().__call__(*args, **kwargs)
-            cls._instances[cls] = instance
-        return cls._instances[cls]
+            cls._instances[key] = instance
+        return cls._instances[key]
 
 
 class MongoSingleton(metaclass=SingletonMeta):
@@ -20,7 +24,16 @@ class MongoSingleton(metaclass=SingletonMeta):
         self.database = database
         self.__connect_mongo()
 
+    @staticmethod
+    def singleton_key(url: str, username: str, password: str, database: str) -> tuple:
+        """Each server and database has its own instance, so that several
+        configs can be used in the same process"""
+        return url, database
+
     def __connect_mongo(self) -> None:
+        # Imported here, so modules using mongo can be imported without connecting
+        import pymongo
+
         self.client = pymongo.MongoClient(
             self.url, username=self.username, password=self.password
         )
@@ -47,7 +60,7 @@ class MongoSingleton(metaclass=SingletonMeta):
     def update_dict(self, collection: str, id_key: str, id_value: str, new_dict: dict):
         mydb = self.client[self.database]
         mycol = mydb[collection]
-        mycol.update({id_key: id_value}, new_dict)
+        mycol.replace_one({id_key: id_value}, new_dict)
 
     def get_col(self, collection: str):
         return self.client[self.database][collection]
@@ -55,7 +68,7 @@ class MongoSingleton(metaclass=SingletonMeta):
     def remove_collection(self, collection):
         mydb = self.client[self.database]
         mycol = mydb[collection]
-        mycol.remove()
+        mycol.delete_many({})
 
 
 def load_mongo(cfg_mongo: dict) -> MongoSingleton:
@@ -0,0 +1,151 @@
+import gzip
+import json
+from pathlib import Path
+
+import typer
+
+from covidnpi.utils.config import load_config
+from covidnpi.utils.log import logger
+from covidnpi.web.dataloaders import (
+    build_cases_of_province,
+    build_growth_of_province,
+    build_scores_boxplot_of_field,
+    build_scores_of_fields_by_province,
+    build_statistics_of_field_by_province,
+)
+from covidnpi.web.encoding import decode_document
+from covidnpi.web.mongo import load_mongo
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LIST_COMPRESSION = ["gzip", "brotli"]
+
+
+def store_payload(payload, path_json: Path, list_compression: list = None):
+    """Stores a payload in json format, along with its compressed versions:
+    - gzip: `path_json` + ".gz"
+    - brotli: `path_json` + ".br", only if the brotli package is installed
+
+    Parameters
+    ----------
+    payload : Dict or List
+        Output of any of the functions in `covidnpi.web.dataloaders`
+    path_json : Path
+        Path where the json is stored, must end in a file with json format
+    list_compression : list, optional
+        Compression formats to store, by default `LIST_COMPRESSION`
+
+    """
+    if list_compression is None:
+        list_compression = LIST_COMPRESSION
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    path_json.write_bytes(data)
+    if "gzip" in list_compression:
+        path_json.with_name(path_json.name + ".gz").write_bytes(
+            gzip.compress(data, compresslevel=9)
+        )
+    if ("brotli" in list_compression) and (brotli is not None):
+        path_json.with_name(path_json.name + ".br").write_bytes(
+            brotli.compress(data)
+        )
+
+
+def store_static_json(
+    path_config: str = "config.toml",
+    path_static: str = "output/api",
+    compression: str = ",".join(LIST_COMPRESSION),
+):
+    """Stores the payloads returned by `covidnpi.web.dataloaders` as static json
+    files, one per code, so they can be served without querying mongo:
+    - scores/`code`.json : return_scores_of_fields_by_province, all fields
+    - statistics/`code`.json : return_statistics_of_field_by_province
+    - cases/`code`.json : return_cases_of_province
+    - growth/`code`.json : return_growth_of_province, logarithmic
+    - growth_rate/`code`.json : return_growth_of_province, not logarithmic
+    - boxplot/`code`.json : return_scores_boxplot_of_field
+
+    Parameters
+    ----------
+    path_config : str, optional
+        Path to the config toml file
+    path_static : str, optional
+        Folder where the json files are stored, by default "output/api"
+    compression : str, optional
+        Compression formats to store, separated by commas, by default "gzip,brotli"
+
+    """
+    list_compression = [s.strip() for s in compression.split(",") if s.strip()]
+    if ("brotli" in list_compression) and (brotli is None):
+        logger.warning("Package 'brotli' is not installed. Skipped brotli files.")
+    cfg_mongo = load_config(path_config, key="mongo")
+    mongo = load_mongo(cfg_mongo)
+
+    path_static = Path(path_static)
+    for folder in [
+        "scores",
+        "statistics",
+        "cases",
+        "growth",
+        "growth_rate",
+        "boxplot",
+    ]:
+        (path_static / folder).mkdir(parents=True, exist_ok=True)
+
+    # Scores and statistics
+    col = mongo.get_col("scores")
+    dict_statistics = col.find_one({"code": "statistics"})
+    for code in col.distinct("code"):
+        if code == "statistics":
+            continue
+        logger.debug(f"  {code}")
+        x = decode_document(col.find_one({"code": code}))
+        store_payload(
+            build_scores_of_fields_by_province(x, code, x["fields"], cfg_mongo),
+            path_static / "scores" / f"{code}.json",
+            list_compression=list_compression,
+        )
+        store_payload(
+            build_statistics_of_field_by_province(x, dict_statistics),
+            path_static / "statistics" / f"{code}.json",
+            list_compression=list_compression,
+        )
+
+    # Cases and growth
+    col = mongo.get_col("cases")
+    for code in col.distinct("code"):
+        x = decode_document(col.find_one({"code": code}))
+        store_payload(
+            build_cases_of_province(x, code, cfg_mongo),
+            path_static / "cases" / f"{code}.json",
+            list_compression=list_compression,
+        )
+        store_payload(
+            build_growth_of_province(x, code, cfg_mongo, logarithmic=True),
+            path_static / "growth" / f"{code}.json",
+            list_compression=list_compression,
+        )
+        store_payload(
+            build_growth_of_province(x, code, cfg_mongo, logarithmic=False),
+            path_static / "growth_rate" / f"{code}.json",
+            list_compression=list_compression,
+        )
+
+    # Boxplots
+    col = mongo.get_col("boxplot")
+    dict_color = col.find_one({"code": "color"})
+    for code in col.distinct("code"):
+        if code == "color":
+            continue
+        x = col.find_one({"code": code})
+        store_payload(
+            build_scores_boxplot_of_field(x, code, dict_color, cfg_mongo),
+            path_static / "boxplot" / f"{code}.json",
+            list_compression=list_compression,
+        )
+
+
+if __name__ == "__main__":
+    typer.run(store_static_json)
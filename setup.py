@@ -18,6 +18,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.7, <3.8",
+    entry_points={"console_scripts": ["covidnpi=covidnpi.cli:main"]},
     setup_requires=["setuptools_scm"],
     install_requires=[
         "adjustText==0.7.3",
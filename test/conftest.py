@@ -0,0 +1,32 @@
+import pytest
+
+from covidnpi.web.mongo import SingletonMeta
+
+
+@pytest.fixture
+def mongo_client(monkeypatch):
+    """In-memory mongo client, used by every connection opened in the test"""
+    mongomock = pytest.importorskip("mongomock")
+    import pymongo
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, "MongoClient", lambda *args, **kwargs: client)
+    monkeypatch.setattr(SingletonMeta, "_instances", {})
+    return client
+
+
+def write_config(path_config, database: str = "covidnpi"):
+    """Writes a config file pointing to `database`"""
+    path_config.write_text(
+        "[mongo]\n"
+        'url = "mongodb://localhost:27017/"\n'
+        'username = ""\n'
+        'password = ""\n'
+        f'database = "{database}"\n'
+        'date_min = "2020-03-15"\n'
+        'date_max = "2020-06-30"\n'
+        "\n"
+        "[cases]\n"
+        "movavg = 7\n"
+    )
+    return str(path_config)
@@ -0,0 +1,93 @@
+import pandas as pd
+
+from covidnpi.utils.cases import (
+    CasesRepository,
+    load_cases_df,
+    return_cases_matrix_normed,
+    return_cases_repository,
+)
+from covidnpi.utils.series import compute_rates_matrix
+from covidnpi.utils.snapshot import ENV_OFFLINE, ENV_SNAPSHOT, store_snapshot
+from covidnpi.utils.synthetic import generate_cases_csv
+
+
+def test_cases_repository(tmp_path):
+    path_cases = generate_cases_csv(str(tmp_path / "cases.csv"), num_years=1)
+    cases = CasesRepository(link=path_cases)
+
+    df_daily = cases.matrix_normed()
+    pd.testing.assert_frame_equal(
+        df_daily, return_cases_matrix_normed(load_cases_df(link=path_cases))
+    )
+    dict_rates = cases.rates(7)
+    pd.testing.assert_frame_equal(
+        dict_rates["growth_rate"], compute_rates_matrix(df_daily, 7)["growth_rate"]
+    )
+    # Computed once, shared by the following calls
+    assert cases.matrix_normed() is df_daily
+    assert cases.rates(7) is dict_rates
+    assert cases.rates(14) is not dict_rates
+    # Loaded again after invalidating
+    cases.invalidate()
+    assert cases.matrix_normed() is not df_daily
+    pd.testing.assert_frame_equal(cases.matrix_normed(), df_daily)
+
+    # The same repository is shared for each link
+    assert return_cases_repository(path_cases) is return_cases_repository(path_cases)
+
+
+def test_load_cases_df_chunksize(tmp_path):
+    path_cases = tmp_path / "cases.csv"
+    # Only the last chunk has a missing number of cases
+    path_cases.write_text(
+        "provincia_iso,fecha,num_casos,num_casos_prueba_pcr\n"
+        "M,2020-03-01,10,5\n"
+        "CA,2020-03-01,3,1\n"
+        "M,2020-03-02,12,6\n"
+        "CA,2020-03-02,NC,2\n"
+    )
+    cases = load_cases_df(link=str(path_cases))
+    assert cases["num_casos"].dtype == "float32"
+    for chunksize in [1, 2, 3]:
+        pd.testing.assert_frame_equal(
+            load_cases_df(link=str(path_cases), chunksize=chunksize), cases
+        )
+
+
+def test_cases_repository_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_SNAPSHOT, str(tmp_path / "snapshots"))
+    monkeypatch.setenv(ENV_OFFLINE, "1")
+    link = "https://example.com/cases.csv"
+    path_cases = generate_cases_csv(str(tmp_path / "cases.csv"), num_years=1)
+    store_snapshot(link, path_cases)
+    cases = CasesRepository(link=link)
+    df_daily = cases.matrix_normed()
+    assert cases.matrix_normed() is df_daily
+
+    # A newer snapshot replaces the memoized data
+    path_cases = generate_cases_csv(str(tmp_path / "cases.csv"), num_years=1, seed=1)
+    store_snapshot(link, path_cases)
+    df_new = cases.matrix_normed()
+    assert df_new is not df_daily
+    pd.testing.assert_frame_equal(
+        df_new, CasesRepository(link=path_cases).matrix_normed()
+    )
+    cases.refresh()
+    assert cases.matrix_normed() is df_new
+
+
+def test_cases_matrix_order(tmp_path):
+    path_cases = tmp_path / "cases.csv"
+    path_cases.write_text(
+        "provincia_iso,fecha,num_casos\n"
+        "SE,2020-03-01,1\n"
+        "M,2020-03-01,2\n"
+        "CA,2020-03-01,3\n"
+        "SE,2020-03-02,4\n"
+        "M,2020-03-02,5\n"
+        "CA,2020-03-02,6\n"
+    )
+    cases = load_cases_df(link=str(path_cases))
+    # Provinces keep the order of the source
+    df = return_cases_matrix_normed(cases)
+    assert df.columns.tolist() == ["SE", "M", "CA"]
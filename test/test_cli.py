@@ -0,0 +1,58 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+from covidnpi.cli import DICT_COMMANDS, main
+
+
+def run_python(code: str) -> str:
+    """Runs `code` in a new interpreter, so that no module is already imported"""
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+
+def test_cli_lazy_imports():
+    stderr = run_python(
+        "import sys, covidnpi.cli; "
+        "print(*[m for m in ('pandas', 'scipy', 'pymongo', 'bson', 'matplotlib', "
+        "'typer') if m in sys.modules], file=sys.stderr)"
+    )
+    # The last line lists the heavy modules that have been imported
+    assert stderr.splitlines()[-1].strip() == ""
+
+
+@pytest.mark.parametrize(
+    "module, list_lazy",
+    [
+        ("covidnpi.web.datastore", ["scipy", "pymongo", "bson"]),
+        ("covidnpi.web.generate_json", ["scipy", "pymongo", "bson"]),
+        ("covidnpi.initialize_web", ["scipy", "pymongo", "bson"]),
+    ],
+)
+def test_lazy_imports(module: str, list_lazy: list):
+    stderr = run_python(
+        f"import sys, {module}; "
+        f"print(*[m for m in {list_lazy} if m in sys.modules], file=sys.stderr)"
+    )
+    assert stderr.splitlines()[-1].strip() == ""
+
+
+def test_cli_commands(capsys):
+    main([])
+    out = capsys.readouterr().out
+    for command in DICT_COMMANDS:
+        assert command in out
+    with pytest.raises(SystemExit):
+        main(["not_a_command"])
+
+
+@pytest.mark.parametrize("command", list(DICT_COMMANDS))
+def test_cli_command_exists(command: str):
+    module, function, _ = DICT_COMMANDS[command]
+    assert callable(getattr(importlib.import_module(module), function))
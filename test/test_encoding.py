@@ -0,0 +1,31 @@
+import numpy as np
+from covidnpi.web.encoding import decode_document, encode_document
+
+
+def test_encode_decode_cases():
+    dict_doc = {
+        "code": "M",
+        "province": "madrid",
+        "dates": ["2020-12-30", "2020-12-31", "2021-01-01"],
+        "cases": [1.5, 2.25, 0.0],
+        "ci": [1.5, 2.25, 0.0],
+        "growth_rate": [0.0, 50.0, -100.0],
+        "gr": [0.0, 50.0, -100.0],
+    }
+    dict_compact = encode_document(dict_doc, ["cases", "ci", "growth_rate", "gr"])
+    assert "dates" not in dict_compact
+    assert "ci" not in dict_compact
+    dict_decoded = decode_document(dict_compact)
+    assert list(dict_decoded.keys()) == list(dict_doc.keys())
+    for key, value in dict_doc.items():
+        if key in ["code", "province", "dates"]:
+            assert dict_decoded[key] == value
+        else:
+            np.testing.assert_allclose(dict_decoded[key], value, rtol=1e-6)
+
+
+def test_decode_keeps_original_documents():
+    dict_doc = {"code": "M", "dates": ["2020-01-01", "2020-01-03"], "cases": [1.0]}
+    assert decode_document(dict_doc) is dict_doc
+    dict_decoded = decode_document(encode_document(dict_doc, ["cases"]))
+    assert dict_decoded["dates"] == dict_doc["dates"]
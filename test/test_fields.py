@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from covidnpi.score.fields import return_field_weights, score_ponderada_batch
+
+
+def test_score_ponderada_batch():
+    ponderacion = pd.DataFrame(
+        {
+            "ambito": ["ocio", "ocio", "cultura"],
+            "nombre": ["bar", "cine", "museo"],
+            "ponderacion": [3, 1, 2],
+        }
+    )
+    weights = return_field_weights(ponderacion=ponderacion)
+    assert weights.index.tolist() == ["ocio", "cultura"]
+    assert weights.columns.tolist() == ["bar", "cine", "museo"]
+    np.testing.assert_allclose(weights.sum(axis=1), 1)
+
+    fecha = pd.date_range("2020-10-01", periods=2)
+    dict_afectado = {
+        "madrid": pd.DataFrame(
+            {"fecha": fecha, "bar": [1, np.nan], "cine": [0.5, 1], "museo": [0, 1]}
+        ),
+        "soria": pd.DataFrame(
+            {"fecha": fecha[:1], "bar": [0], "cine": [np.nan], "museo": [np.nan]}
+        ),
+    }
+    dict_field = score_ponderada_batch(dict_afectado, weights)
+    # Missing items count as 0
+    np.testing.assert_allclose(dict_field["madrid"]["ocio"], [0.875, 0.25])
+    np.testing.assert_allclose(dict_field["madrid"]["cultura"], [0, 1])
+    np.testing.assert_allclose(dict_field["soria"]["ocio"], [0])
+    np.testing.assert_allclose(dict_field["soria"]["cultura"], [0])
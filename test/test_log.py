@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from covidnpi.utils.log import DataQualityReport
+
+
+def test_data_quality_report(tmp_path: Path):
+    path_report = tmp_path / "data_quality.jsonl"
+    report = DataQualityReport(str(path_report), max_examples=3)
+    df = pd.DataFrame(
+        {"hora": ["22", "cierre", "x", "y", np.nan]}, index=[4, 7, 8, 9, 10]
+    )
+    with report.file("Medidas_andalucia.xlsx"):
+        report.add(df, [4, 7], "hora", "missing", "Lost values")
+        report.add(df, [8, 9], "hora", "missing", "Lost values")
+        report.add(df, [], "porcentaje_afectado", "type", "Not a number")
+        report.add(df, [10], "hora", "value", "Suspicious values")
+    # Outside of a file, records are stored when added
+    report.add(df, [7], "hora", "missing", "Lost values")
+
+    list_records = [json.loads(line) for line in path_report.read_text().splitlines()]
+    assert len(list_records) == 3
+    record = list_records[0]
+    assert record["file"] == "Medidas_andalucia.xlsx"
+    assert record["count"] == 4
+    # Rows of the spreadsheet, with the header in the first row
+    assert record["rows"] == [6, 9, 10, 11]
+    assert record["examples"] == ["22", "cierre", "x"]
+    assert list_records[2]["file"] is None
+    summary = report.summary()
+    assert summary.loc[("Medidas_andalucia.xlsx", "hora", "missing")] == 4
@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+
+from covidnpi.utils.metrics import Metrics, measure
+
+
+def test_metrics(tmp_path: Path):
+    path_metrics = tmp_path / "metrics.jsonl"
+    metrics = Metrics(str(path_metrics))
+    with metrics.measure("stage") as record:
+        for provincia in ["cadiz", "sevilla"]:
+            with measure(metrics, "province", provincia=provincia) as record_prov:
+                record_prov["rows"] = len(provincia)
+        record["rows"] = 2
+    # Measuring without metrics does nothing
+    with measure(None, "stage") as record:
+        record["rows"] = 0
+
+    list_records = [json.loads(line) for line in path_metrics.read_text().splitlines()]
+    assert [d["provincia"] for d in list_records] == ["cadiz", "sevilla", None]
+    for d in list_records:
+        assert d["wall_time"] >= 0
+        assert d["cpu_time"] >= 0
+        assert d["process_peak_rss_increase_mb"] >= 0
+    assert metrics.summary().loc["stage", "rows"] == 2
+    df = metrics.summary_provincia(top=1)
+    assert len(df) == 1
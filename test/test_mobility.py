@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+
+from covidnpi.utils.cases import CasesRepository
+from covidnpi.utils.mobility import MOBILITY_REPORT_SUFFIX, store_mobility_reports
+from covidnpi.utils.synthetic import generate_cases_csv
+
+LIST_REPORTS = ["retail_and_recreation", "workplaces", "residential"]
+
+
+def generate_mobility_csv(path_csv: str) -> str:
+    dates = pd.date_range("2020-03-01", periods=60)
+    list_df = []
+    # "MD" is reassigned to "M", "XX" is not a province
+    for i, code in enumerate(["ES-M", "ES-B", "ES-CU", "ES-MD", "ES-XX", ""]):
+        df = pd.DataFrame(
+            {
+                "country_region_code": "ES",
+                "iso_3166_2_code": code,
+                "date": dates.strftime("%Y-%m-%d"),
+            }
+        )
+        for j, report in enumerate(LIST_REPORTS):
+            df[report + MOBILITY_REPORT_SUFFIX] = (i + j) * 1.5
+        list_df.append(df)
+    df = pd.concat(list_df, ignore_index=True)
+    df.to_csv(path_csv, index=False)
+    return path_csv
+
+
+def test_store_mobility_reports_forked(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path_mobility = generate_mobility_csv(str(tmp_path / "mobility.csv"))
+    path_cases = generate_cases_csv(str(tmp_path / "cases.csv"), num_years=1)
+    cases = CasesRepository(link=path_cases)
+
+    import covidnpi.utils.mobility as mobility
+
+    load = mobility.load_mobility_report
+    monkeypatch.setattr(
+        mobility,
+        "load_mobility_report",
+        lambda path_extract=None: load(path_csv=path_mobility),
+    )
+
+    dict_files = {}
+    for n_jobs in [1, 2]:
+        path_output = str(tmp_path / f"mobility_{n_jobs}")
+        store_mobility_reports(
+            path_output=path_output, path_extract=None, n_jobs=n_jobs, cases=cases
+        )
+        dict_files[n_jobs] = {
+            name: open(os.path.join(path_output, name)).read()
+            for name in sorted(os.listdir(path_output))
+        }
+    assert list(dict_files[1]) == ["barcelona.csv", "cuenca.csv", "madrid.csv"]
+    assert dict_files[1] == dict_files[2]
+    assert not mobility.DICT_SHARED
+
+    df = pd.read_csv(tmp_path / "mobility_2" / "cuenca.csv", index_col="date")
+    assert list(df.columns) == ["retail", "workplaces", "residential"] + [
+        "ia7",
+        "growth_rate",
+        "rho",
+    ]
+    assert (df["retail"].dropna() == 3.0).all()
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from covidnpi.utils.synthetic import DICT_TAXONOMY, generate_taxonomy
+from covidnpi.web.datastore import store_scores_in_mongo
+from covidnpi.web.mongo import load_mongo
+from conftest import write_config
+
+pytest.importorskip("openpyxl")
+
+
+def test_store_two_configs(tmp_path: Path, monkeypatch, mongo_client):
+    client = mongo_client
+    # The taxonomy writes auxiliary files in the relative path "output"
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+
+    path_taxonomy = str(tmp_path / "taxonomy.xlsx")
+    generate_taxonomy(path_taxonomy)
+    path_scores = tmp_path / "score_field"
+    path_scores.mkdir()
+    df = pd.DataFrame(
+        {field: [0.5, 1.0] for field in DICT_TAXONOMY},
+        index=pd.Index(["2020-10-01", "2020-10-02"], name="fecha"),
+    )
+    df.to_csv(path_scores / "madrid.csv")
+
+    dict_config = {"staging": tmp_path / "staging.toml", "live": tmp_path / "live.toml"}
+    for database, path_config in dict_config.items():
+        write_config(path_config, database)
+        store_scores_in_mongo(
+            path_output=path_scores,
+            path_taxonomy=path_taxonomy,
+            path_config=str(path_config),
+        )
+
+    # Each config reaches its own database
+    for database in dict_config:
+        assert client[database]["scores"].find_one({"province": "madrid"})
+    cfg = {"url": "mongodb://localhost:27017/", "username": "", "password": ""}
+    mongo_staging = load_mongo(dict(cfg, database="staging"))
+    assert mongo_staging is load_mongo(dict(cfg, database="staging"))
+    assert mongo_staging is not load_mongo(dict(cfg, database="live"))
+    assert mongo_staging.database == "staging"
@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from covidnpi.pipeline import Stage, return_update_stages, run_pipeline, sort_stages
+
+
+def load(value: int, delay: float = 0) -> int:
+    time.sleep(delay)
+    return value
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def fail():
+    raise ValueError("Failed stage")
+
+
+def pid() -> int:
+    return os.getpid()
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_run_pipeline(n_jobs: int):
+    dict_stages = {
+        "sum": Stage(add, inputs={"a": "a", "b": "b"}),
+        "a": Stage(load, kwargs={"value": 1, "delay": 0.1}),
+        "b": Stage(load, kwargs={"value": 2}),
+    }
+    assert sort_stages(dict_stages) == ["a", "b", "sum"]
+    dict_output = run_pipeline(dict_stages, n_jobs=n_jobs)
+    assert dict_output == {"a": 1, "b": 2, "sum": 3}
+
+
+def test_run_pipeline_parallel():
+    dict_stages = {
+        f"load_{i}": Stage(load, kwargs={"value": i, "delay": 0.5}) for i in range(4)
+    }
+    time_start = time.perf_counter()
+    run_pipeline(dict_stages, n_jobs=4)
+    # The stages run at the same time
+    assert time.perf_counter() - time_start < 1.5
+    dict_output = run_pipeline({"pid": Stage(pid)}, n_jobs=2)
+    assert dict_output["pid"] != os.getpid()
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_run_pipeline_failure(n_jobs: int):
+    dict_stages = {
+        "fail": Stage(fail),
+        "after": Stage(load, kwargs={"value": 1}, requires=("fail",)),
+        "independent": Stage(load, kwargs={"value": 2}),
+    }
+    with pytest.raises(RuntimeError, match="fail, after"):
+        run_pipeline(dict_stages, n_jobs=n_jobs)
+
+
+def test_sort_stages_errors():
+    with pytest.raises(ValueError, match="missing"):
+        sort_stages({"a": Stage(load, requires=("b",))})
+    with pytest.raises(ValueError, match="cyclic"):
+        sort_stages(
+            {"a": Stage(load, requires=("b",)), "b": Stage(load, requires=("a",))}
+        )
+
+
+def test_return_update_stages():
+    dict_stages = return_update_stages(list_config=["config.toml", "config-live.toml"])
+    assert set(dict_stages) == {
+        "npi",
+        "cases",
+        "mobility",
+        "web_config.toml",
+        "web_config-live.toml",
+        "json",
+    }
+    # Cases and mobility do not wait for the scores
+    assert dict_stages["cases"].dependencies() == set()
+    assert dict_stages["mobility"].dependencies() == {"cases"}
+    assert dict_stages["web_config-live.toml"].dependencies() == {"npi", "cases"}
+    # The json files shared by the configs are written once
+    assert dict_stages["json"].dependencies() == {"web_config.toml"}
+    assert dict_stages["json"].kwargs["path_config"] == "config.toml"
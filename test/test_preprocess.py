@@ -0,0 +1,165 @@
+import tracemalloc
+from datetime import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from covidnpi.utils.preprocess import (
+    DICT_COLS_DTYPE,
+    clean_pandas_str,
+    enforce_dtypes,
+    filter_relevant_interventions,
+    format_hora,
+    format_porcentaje_afectado,
+    parse_hora,
+    parse_porcentaje,
+    parse_unique,
+    pivot_unidad_valor,
+    preprocess_npi_data,
+    process_fecha,
+    read_npi_data,
+    return_dict_provincia_to_ccaa,
+    return_dict_provincia_to_interventions,
+    rename_unidad,
+    select_columns,
+)
+from covidnpi.utils.synthetic import generate_npi_folder, generate_taxonomy
+from covidnpi.utils.taxonomy import return_all_interventions
+
+
+def test_clean_pandas_str():
+    series = pd.Series(
+        ["Autonómico", "Castilla y León ", None, np.nan, 5, "A Coruña"] * 2,
+        index=range(10, 22),
+    )
+    expected = pd.Series(
+        ["autonomico", "castilla_y_leon", np.nan, np.nan, np.nan, "a_coruna"] * 2,
+        index=range(10, 22),
+        dtype=object,
+    )
+    pd.testing.assert_series_equal(clean_pandas_str(series), expected)
+    # Column names
+    index = pd.Index(["Ámbito", "% afectado (si subprovincial; min 10%)"])
+    expected = pd.Index(["ambito", "%_afectado_(si_subprovincial;_min_10%)"])
+    pd.testing.assert_index_equal(clean_pandas_str(index), expected)
+    # Columns without strings
+    with pytest.raises(AttributeError):
+        clean_pandas_str(pd.Series([np.nan, np.nan]))
+
+
+def test_select_columns_dtypes():
+    df = pd.DataFrame(
+        {
+            "comunidad_autonoma": ["andalucia"] * 3,
+            "provincia": ["cadiz", "sevilla", np.nan],
+            "codigo": ["AF.1", "MV.1", "AF.1"],
+            "fecha_inicio": ["2020-11-06", pd.Timestamp("2020-11-01"), "2020-03-15"],
+            "fecha_fin": pd.to_datetime(["2020-12-01"] * 3),
+            "ambito": ["provincial", "provincial", "autonomico"],
+            "porcentaje_afectado": [np.nan, 25.0, np.nan],
+            "porcentaje": [30.0, np.nan, np.nan],
+            "personas": [np.nan, 6.0, np.nan],
+            "hora": [np.nan, np.nan, 22.5],
+            "nivel_educacion": np.nan,
+            "unidad": ["porcentaje", "personas", "hora"],
+        }
+    )
+    df = select_columns(df)
+    assert df.columns.tolist() == list(DICT_COLS_DTYPE.keys())
+    for col, dtype in DICT_COLS_DTYPE.items():
+        assert df[col].dtype == dtype, col
+    # Categories do not create new combinations of province and region
+    dict_provincia = return_dict_provincia_to_ccaa(df, dict_add={})
+    assert dict_provincia == {"cadiz": "andalucia", "sevilla": "andalucia"}
+
+
+def test_preprocess_memory(tmp_path: Path):
+    pytest.importorskip("openpyxl")
+    path_taxonomy = str(tmp_path / "taxonomy.xlsx")
+    generate_taxonomy(path_taxonomy)
+    all_interventions = return_all_interventions(path_taxonomy)
+    list_files = generate_npi_folder(
+        str(tmp_path / "datos_NPI"), num_regions=8, num_measures=1000
+    )
+    # Largest workbook, so that the fixed allocations of pandas are negligible
+    path_file = max(list_files, key=lambda path: Path(path).stat().st_size)
+    df = read_npi_data(path_file)
+    size_raw = df.memory_usage(deep=True).sum()
+    df_raw = df.copy()
+
+    tracemalloc.start()
+    try:
+        df_output = preprocess_npi_data(df, all_interventions=all_interventions)
+        dict_interventions = return_dict_provincia_to_interventions(df_output)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Copying the table in each step took more than 1.6 times the raw size
+    assert peak < 1.5 * size_raw
+    assert len(dict_interventions) > 0
+
+    # Same output as the steps that copy the dataframe
+    df_copy = filter_relevant_interventions(df_raw, all_interventions=all_interventions)
+    df_copy = pivot_unidad_valor(
+        format_porcentaje_afectado(rename_unidad(process_fecha(df_copy)))
+    )
+    pd.testing.assert_frame_equal(df_output, select_columns(df_copy))
+
+
+def test_return_dict_provincia_to_interventions():
+    df = pd.DataFrame(
+        {
+            "comunidad_autonoma": ["andalucia", "andalucia", "aragon", "andalucia"],
+            "provincia": ["cadiz", "sevilla", "huesca", np.nan],
+            "codigo": ["AF.1", "MV.1", "AF.1", "ED.1"],
+            "ambito": ["provincial", "autonomico", "provincial", "autonomico"],
+        }
+    )
+    dict_interventions = return_dict_provincia_to_interventions(
+        enforce_dtypes(df, dict_dtype={"provincia": "category"})
+    )
+    assert sorted(dict_interventions) == ["cadiz", "huesca", "sevilla"]
+    # Autonomic rows are shared by the provinces of the region, in their order
+    assert dict_interventions["cadiz"]["codigo"].tolist() == ["AF.1", "MV.1", "ED.1"]
+    assert dict_interventions["sevilla"]["codigo"].tolist() == ["MV.1", "ED.1"]
+    assert dict_interventions["huesca"]["codigo"].tolist() == ["AF.1"]
+    assert dict_interventions["sevilla"].index.tolist() == [0, 1]
+
+
+def test_format_hora_porcentaje():
+    df = pd.DataFrame(
+        {
+            "hora": [
+                "22:30",
+                "20:00 - 23:30",
+                time(1, 15),
+                "22",
+                "cierre",
+                np.nan,
+                "22:30",
+            ],
+            "porcentaje_afectado": [
+                "25 %",
+                "12,5",
+                "Cantalejo",
+                np.nan,
+                "nan",
+                "zona",
+                40,
+            ],
+        },
+        index=range(5, 12),
+    )
+    df_output = format_porcentaje_afectado(format_hora(df))
+    expected = [22.5, 23.5, 1.25, np.nan, np.nan, np.nan, 22.5]
+    np.testing.assert_array_equal(df_output["hora"], expected)
+    expected = [25, 12.5, 2, np.nan, np.nan, np.nan, 40]
+    np.testing.assert_array_equal(df_output["porcentaje_afectado"], expected)
+    # The original dataframe is not modified
+    assert df["hora"].iloc[0] == "22:30"
+    # Rejected values
+    _, rejected = parse_unique(df["hora"], parse_hora)
+    assert df.index[rejected].tolist() == [8, 9]
+    _, rejected = parse_unique(df["porcentaje_afectado"], parse_porcentaje)
+    assert df.index[rejected].tolist() == [10]
@@ -0,0 +1,148 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from covidnpi.score.islas import return_dict_islas
+from covidnpi.score.rollup import (
+    return_dict_rollup,
+    return_population_weights,
+    return_weight_matrix,
+    rollup_scores,
+)
+from covidnpi.utils.dictionaries import store_dict_scores
+from covidnpi.utils.regions import ISOPROV_TO_POBLACION
+from covidnpi.web.datastore import return_rollup_documents
+
+
+def add_scores(dict_scores: dict, dict_weights: dict) -> pd.DataFrame:
+    """Previous aggregation: weighted frames added one by one"""
+    list_df = [dict_scores[member] * w for member, w in dict_weights.items()]
+    return reduce(lambda x, y: x.add(y, fill_value=0), list_df)
+
+
+def test_rollup_scores():
+    rng = np.random.RandomState(0)
+    dates = pd.date_range("2020-03-01", periods=40)
+    dict_scores = {}
+    for i, member in enumerate("abcde"):
+        values = rng.rand(30, 3)
+        values[rng.rand(30, 3) < 0.3] = np.nan
+        dict_scores[member] = pd.DataFrame(
+            values, index=dates[i : i + 30], columns=["x", "y", "z"]
+        )
+    # Missing column in one member, and a value missing in every member
+    dict_scores["b"] = dict_scores["b"].drop(columns="y")
+    for df in dict_scores.values():
+        df.loc[df.index.isin(dates[10:11]), "x"] = np.nan
+
+    dict_groups = {
+        "ab": {"a": 0.5, "b": 0.5},
+        "cde": {"c": 0.2, "d": 0.3, "e": 0.5},
+        "all": {m: 0.2 for m in "abcde"},
+    }
+    dict_rollup = rollup_scores(dict_scores, return_weight_matrix(dict_groups))
+    assert list(dict_rollup) == list(dict_groups)
+    for group, dict_weights in dict_groups.items():
+        pd.testing.assert_frame_equal(
+            dict_rollup[group], add_scores(dict_scores, dict_weights), check_freq=False
+        )
+    assert (
+        dict_rollup["all"].loc[dates[10], "x"] != dict_rollup["all"].loc[dates[10], "x"]
+    )
+
+    # Groups with missing members are skipped
+    dict_groups["af"] = {"a": 0.5, "f": 0.5}
+    dict_rollup = rollup_scores(dict_scores, return_weight_matrix(dict_groups))
+    assert "af" not in dict_rollup
+    assert "ab" in dict_rollup
+
+
+def test_population_weights():
+    weights = return_population_weights(
+        {"g1": ["a", "b"], "g2": ["c"]}, {"a": 30, "b": 10, "c": 5}
+    )
+    assert weights.loc["g1", "a"] == 0.75
+    assert weights.loc["g1", "c"] == 0
+    np.testing.assert_allclose(weights.sum(axis=1), 1)
+
+
+def test_return_dict_islas():
+    dates = pd.date_range("2020-03-01", periods=5)
+    dict_field = {
+        isla: pd.DataFrame({"ocio": np.arange(5.0)}, index=dates)
+        for isla in ["tenerife", "lanzarote", "fuerteventura"]
+    }
+    dict_islas = return_dict_islas(dict_field)
+    assert list(dict_islas) == ["santa_cruz_de_tenerife"]
+    np.testing.assert_allclose(
+        dict_islas["santa_cruz_de_tenerife"]["ocio"], np.arange(5.0)
+    )
+
+
+def test_return_dict_rollup(tmp_path):
+    dates = pd.date_range("2020-03-01", periods=5, name="fecha")
+    dict_field = {
+        provincia: pd.DataFrame({"cultura": np.full(5, score)}, index=dates)
+        for provincia, score in [
+            ("cadiz", 1.0),
+            ("sevilla", 0.0),
+            ("madrid", 0.5),
+            ("santa_cruz_de_tenerife", 0.2),
+            ("tenerife", 1.0),
+        ]
+    }
+    dict_rollup = return_dict_rollup(dict_field)
+    assert set(dict_rollup) == {"andalucia", "madrid", "canarias", "espana"}
+    share = ISOPROV_TO_POBLACION["CA"] / (
+        ISOPROV_TO_POBLACION["CA"] + ISOPROV_TO_POBLACION["SE"]
+    )
+    np.testing.assert_allclose(dict_rollup["andalucia"]["cultura"], share)
+    # The group of islands stands for the province, not the island
+    np.testing.assert_allclose(dict_rollup["canarias"]["cultura"], 0.2)
+    list_code = ["CA", "SE", "M", "TF"]
+    pob = np.array([ISOPROV_TO_POBLACION[code] for code in list_code])
+    expected = (pob * np.array([1.0, 0.0, 0.5, 0.2])).sum() / pob.sum()
+    np.testing.assert_allclose(dict_rollup["espana"]["cultura"], expected)
+
+    # Documents of the mongo collection "rollup"
+    store_dict_scores(dict_rollup, path_output=str(tmp_path))
+    list_docs = return_rollup_documents(tmp_path, ["cultura"], dates[1])
+    dict_docs = {doc["code"]: doc for doc in list_docs}
+    assert set(dict_docs) == {"AN", "MD", "CN", "ES"}
+    assert dict_docs["ES"]["level"] == "country"
+    assert dict_docs["AN"]["level"] == "ccaa"
+    assert len(dict_docs["MD"]["dates"]) == 4
+    assert dict_docs["MD"]["Culture"] == [0.5] * 4
+
+
+def test_return_dict_rollup_missing():
+    dates = pd.date_range("2020-03-01", periods=6, name="fecha")
+    dict_field = {
+        "cadiz": pd.DataFrame({"cultura": np.ones(6)}, index=dates),
+        "sevilla": pd.DataFrame({"cultura": [1.0, np.nan, 1, 1, 1, 1]}, index=dates),
+        # Madrid starts later
+        "madrid": pd.DataFrame({"cultura": np.full(3, 0.5)}, index=dates[3:]),
+    }
+    dict_rollup = return_dict_rollup(dict_field)
+    # Provinces without a value do not count as 0
+    np.testing.assert_allclose(dict_rollup["andalucia"]["cultura"], 1.0)
+    np.testing.assert_allclose(dict_rollup["madrid"]["cultura"], 0.5)
+    assert len(dict_rollup["madrid"]) == 3
+    espana = dict_rollup["espana"]["cultura"]
+    np.testing.assert_allclose(espana[:3], 1.0)
+    pob = np.array([ISOPROV_TO_POBLACION[code] for code in ["CA", "SE", "M"]])
+    expected = (pob * np.array([1.0, 1.0, 0.5])).sum() / pob.sum()
+    np.testing.assert_allclose(espana[3:], expected)
+
+    # The island groups are still sums, with missing values as 0
+    dict_islas = return_dict_islas(
+        {
+            isla: pd.DataFrame({"ocio": [1.0, np.nan]}, index=dates[:2])
+            for isla in ["tenerife", "lanzarote", "fuerteventura"]
+        }
+    )
+    assert dict_islas["santa_cruz_de_tenerife"]["ocio"].isna().tolist() == [
+        False,
+        True,
+    ]
@@ -1,7 +1,8 @@
+import numpy as np
 import pandas as pd
 import pytest
-from covidnpi.score.interventions import score_interventions
-from covidnpi.utils.taxonomy import return_taxonomy
+from covidnpi.score.interventions import expand_nivel_educacion, score_interventions
+from covidnpi.utils.taxonomy import LIST_NIVEL_EDUCACION, return_taxonomy
 
 
 @pytest.fixture
@@ -29,3 +30,27 @@ def test_interventions(
         interventions, taxonomy, path_out_conditions=None
     ).reset_index()
     pd.testing.assert_frame_equal(sc_med, sc_interventions, check_names=False)
+
+
+def test_expand_nivel_educacion():
+    df = pd.DataFrame(
+        {
+            "codigo": ["ED.1", "AF.1", "ED.2", "ED.5"],
+            "nivel_educacion": ["primaria", np.nan, "todos", np.nan],
+            "score_intervention": [1, 0.2, 0.5, 0.2],
+        },
+        index=[3, 5, 8, 9],
+    ).astype({"codigo": "category", "nivel_educacion": "category"})
+    df_expanded = expand_nivel_educacion(df)
+    list_nivel = LIST_NIVEL_EDUCACION
+    assert df_expanded["codigo"].tolist() == (
+        ["ED.1P"]
+        + [f"ED.2{niv}" for niv in list_nivel]
+        + [f"ED.5{niv}" for niv in list_nivel]
+        + ["AF.1"]
+    )
+    assert df_expanded["score_intervention"].tolist() == [1] + [0.5] * 5 + [0.2] * 6
+    assert df_expanded.index.tolist() == list(range(12))
+    # Nothing to expand
+    df_no_ed = df.query("codigo == 'AF.1'")
+    pd.testing.assert_frame_equal(expand_nivel_educacion(df_no_ed), df_no_ed)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from covidnpi.utils.rho import compute_rho, compute_rho_matrix
+from covidnpi.utils.series import (
+    compute_growth_rate,
+    compute_logarithmic_growth_rate,
+    compute_rates_matrix,
+    cumulative_cases,
+    moving_average,
+)
+
+
+@pytest.fixture
+def cases() -> pd.DataFrame:
+    rng = np.random.RandomState(0)
+    idx = pd.date_range("2020-03-01", "2020-09-30")
+    x = rng.poisson(20, size=(len(idx), 4)).astype(float)
+    # Include missing values and periods without cases
+    x[rng.rand(*x.shape) < 0.05] = np.nan
+    x[:30, 1] = 0
+    x[90:120, 2] = 0
+    yield pd.DataFrame(x, index=idx, columns=["M", "CA", "SE", "TF"])
+
+
+def test_rates_matrix(cases: pd.DataFrame):
+    dict_rates = compute_rates_matrix(cases, 7)
+    for code, ser in cases.items():
+        for key, func in [
+            ("cumulative", cumulative_cases),
+            ("average", moving_average),
+            ("growth_rate", compute_growth_rate),
+            ("logarithmic_growth_rate", compute_logarithmic_growth_rate),
+        ]:
+            pd.testing.assert_series_equal(
+                dict_rates[key][code], func(ser, 7), check_names=False
+            )
+
+
+def test_rho_matrix(cases: pd.DataFrame):
+    df_rho = compute_rho_matrix(cases)
+    for code, ser in cases.items():
+        pd.testing.assert_series_equal(df_rho[code], compute_rho(ser), check_names=False)
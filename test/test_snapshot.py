@@ -0,0 +1,112 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from covidnpi.utils.snapshot import (
+    fetch_snapshot,
+    load_metadata,
+    return_snapshot_path,
+    store_snapshot,
+)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    list_status = []
+
+    def log_request(self, code="-", size="-"):
+        self.list_status.append(int(code))
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    path_web = tmp_path / "web"
+    path_web.mkdir()
+    (path_web / "cases.csv").write_text("provincia_iso,fecha,num_casos\n")
+    QuietHandler.list_status = []
+    handler = functools.partial(QuietHandler, directory=str(path_web))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}/cases.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_snapshot(tmp_path: Path, server):
+    httpd, url = server
+    path_snapshot = str(tmp_path / "snapshots")
+    with pytest.raises(FileNotFoundError):
+        fetch_snapshot(url, path_snapshot=path_snapshot, offline=True)
+
+    # Downloaded the first time, revalidated after
+    path_file = fetch_snapshot(url, path_snapshot=path_snapshot)
+    assert Path(path_file).read_text() == "provincia_iso,fecha,num_casos\n"
+    assert load_metadata(Path(path_file))["last_modified"] is not None
+    assert fetch_snapshot(url, path_snapshot=path_snapshot) == path_file
+    assert QuietHandler.list_status == [200, 304]
+
+    # Offline and unreachable servers use the snapshot
+    assert fetch_snapshot(url, path_snapshot=path_snapshot, offline=True) == path_file
+    httpd.shutdown()
+    httpd.server_close()
+    assert fetch_snapshot(url, path_snapshot=path_snapshot, timeout=1) == path_file
+    assert QuietHandler.list_status == [200, 304]
+
+    # Local paths are not copied
+    assert fetch_snapshot(path_file, path_snapshot=path_snapshot) == path_file
+
+
+def test_store_snapshot(tmp_path: Path):
+    url = "https://example.com/data/cases.csv"
+    path_source = tmp_path / "cases.csv"
+    path_source.write_text("a,b\n1,2\n")
+    path_file = store_snapshot(url, str(path_source), str(tmp_path / "snapshots"))
+    assert path_file == return_snapshot_path(url, str(tmp_path / "snapshots"))
+    assert path_file.name.endswith("_cases.csv")
+    path_read = fetch_snapshot(
+        url, path_snapshot=str(tmp_path / "snapshots"), offline=True
+    )
+    assert Path(path_read).read_text() == "a,b\n1,2\n"
+
+
+class TruncatedHandler(SimpleHTTPRequestHandler):
+    """Announces a longer file than it sends, as an interrupted download"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "1000")
+        self.end_headers()
+        self.wfile.write(b"provincia_iso,fecha")
+        self.close_connection = True
+
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+def test_fetch_snapshot_interrupted(tmp_path: Path):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TruncatedHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/cases.csv"
+    path_snapshot = str(tmp_path / "snapshots")
+    path_file = return_snapshot_path(url, path_snapshot=path_snapshot)
+    path_temp = path_file.with_name(path_file.name + ".part")
+    try:
+        with pytest.raises(FileNotFoundError):
+            fetch_snapshot(url, path_snapshot=path_snapshot, timeout=5)
+        assert not path_temp.exists()
+        # The previous snapshot is kept
+        path_source = tmp_path / "cases.csv"
+        path_source.write_text("provincia_iso,fecha,num_casos\n")
+        store_snapshot(url, str(path_source), path_snapshot=path_snapshot)
+        assert fetch_snapshot(url, path_snapshot=path_snapshot, timeout=5) == str(
+            path_file
+        )
+        assert path_file.read_text() == "provincia_iso,fecha,num_casos\n"
+        assert not path_temp.exists()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
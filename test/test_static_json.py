@@ -0,0 +1,89 @@
+import gzip
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from covidnpi.store_cases import main as store_cases
+from covidnpi.utils.cases import return_cases_repository
+from covidnpi.utils.dictionaries import store_dict_scores
+from covidnpi.utils.synthetic import (
+    DICT_TAXONOMY,
+    generate_cases_csv,
+    generate_taxonomy,
+)
+from covidnpi.web.dataloaders import build_statistics_of_field_by_province
+from covidnpi.web.datastore import datastore
+from covidnpi.web.static_json import store_static_json
+from conftest import write_config
+
+pytest.importorskip("openpyxl")
+
+
+def test_store_static_json(tmp_path: Path, monkeypatch, mongo_client):
+    # The taxonomy writes auxiliary files in the relative path "output"
+    monkeypatch.chdir(tmp_path)
+    path_output = tmp_path / "output"
+    path_output.mkdir()
+    path_config = write_config(tmp_path / "config.toml")
+    path_taxonomy = str(tmp_path / "taxonomy.xlsx")
+    generate_taxonomy(path_taxonomy)
+
+    # Fixture outputs of the scores and cases
+    dates = pd.date_range("2020-03-15", periods=30, name="fecha")
+    dict_field = {
+        provincia: pd.DataFrame(
+            {field: [i / 10] * len(dates) for field in DICT_TAXONOMY}, index=dates
+        )
+        for i, provincia in enumerate(["madrid", "cadiz"])
+    }
+    store_dict_scores(dict_field, path_output=str(path_output / "score_field"))
+    path_cases = generate_cases_csv(str(tmp_path / "cases.csv"), num_years=1)
+    store_cases(path_output=str(path_output), path_config=path_config, link=path_cases)
+    return_cases_repository(path_cases).invalidate()
+
+    datastore(
+        path_output=str(path_output),
+        path_taxonomy=path_taxonomy,
+        path_config=path_config,
+    )
+    doc = mongo_client["covidnpi"]["scores"].find_one({"code": "M"})
+    list_fields = list(doc["fields"])
+    list_mean = list(doc["Mean"])
+
+    path_static = tmp_path / "api"
+    store_static_json(
+        path_config=path_config, path_static=str(path_static), compression="gzip"
+    )
+    for folder in ["scores", "statistics", "cases", "growth", "growth_rate"]:
+        assert (path_static / folder / "M.json").exists()
+        assert (path_static / folder / "M.json.gz").exists()
+    assert len(list((path_static / "boxplot").glob("*.json"))) > 0
+
+    statistics = json.loads((path_static / "statistics" / "M.json").read_text())
+    mean = [d for d in statistics if d["name"] == "Mean"][0]
+    # The polygon is closed, without modifying the documents
+    assert mean["theta"] == list_fields + list_fields[:1]
+    assert mean["r"] == list_mean + list_mean[:1]
+    scores = json.loads(
+        gzip.decompress((path_static / "scores" / "M.json.gz").read_bytes())
+    )
+    assert scores == json.loads((path_static / "scores" / "M.json").read_text())
+    assert len(scores) == len(list_fields)
+
+
+def test_build_statistics_of_field_by_province():
+    x = {"fields": ["Culture", "Commerce"], "Mean": [0.1, 0.2]}
+    dict_statistics = {"list": ["Mean", "Median"], "types": {"Mean": "localization"}}
+    list_plot = build_statistics_of_field_by_province(x, dict_statistics)
+    assert list_plot == [
+        {
+            "r": [0.1, 0.2, 0.1],
+            "theta": ["Culture", "Commerce", "Culture"],
+            "name": "Mean",
+            "type": "localization",
+        }
+    ]
+    # The document is not modified
+    assert x == {"fields": ["Culture", "Commerce"], "Mean": [0.1, 0.2]}
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from numpy.random import RandomState
+from covidnpi.utils.cases import load_cases_df, return_cases_matrix_normed
+from covidnpi.utils.preprocess import read_npi_and_build_dict
+from covidnpi.utils.regions import ISOPROV_TO_POBLACION, extend_regions
+from covidnpi.utils.synthetic import (
+    DICT_TAXONOMY,
+    generate_cases_csv,
+    generate_npi_dataframe,
+    generate_npi_folder,
+    generate_taxonomy,
+    list_synthetic_codes,
+    list_synthetic_regions,
+    return_dict_synthetic_regions,
+)
+from covidnpi.utils.taxonomy import return_all_interventions, return_item_ponderacion
+from covidnpi.web.datastore import build_scores_document
+
+pytest.importorskip("openpyxl")
+
+
+def test_synthetic(tmp_path: Path):
+    path_taxonomy = str(tmp_path / "taxonomy.xlsx")
+    generate_taxonomy(path_taxonomy)
+    list_codigo = {row[0] for rows in DICT_TAXONOMY.values() for row in rows}
+    assert set(return_all_interventions(path_taxonomy)) == list_codigo
+    ponderacion = return_item_ponderacion(path_taxonomy)
+    assert set(ponderacion["ambito"]) == set(DICT_TAXONOMY.keys())
+
+    path_raw = str(tmp_path / "datos_NPI")
+    list_path = generate_npi_folder(path_raw, num_regions=6, num_measures=40)
+    assert len(list_path) > 0
+    dict_interventions = read_npi_and_build_dict(
+        path_data=path_raw, path_taxonomy=path_taxonomy
+    )
+    # Autonomic interventions also reach the regions of the same community
+    assert set(list_synthetic_regions()[:6]) <= set(dict_interventions.keys())
+    for df in dict_interventions.values():
+        assert df["codigo"].isin(list_codigo).all()
+        assert df["hora"].dropna().between(0, 24).all()
+
+    path_cases = str(tmp_path / "cases.csv")
+    generate_cases_csv(path_cases, num_regions=70, num_years=1)
+    cases = load_cases_df(link=path_cases)
+    assert cases["fecha"].nunique() == 365
+    assert set(list_synthetic_codes(70)) <= set(cases["provincia_iso"])
+
+
+def test_synthetic_seed():
+    list_regions = list_synthetic_regions(100)
+    assert len(list_regions) == 100
+    df1 = generate_npi_dataframe("ccaa", list_regions, random_state=RandomState(1))
+    df2 = generate_npi_dataframe("ccaa", list_regions, random_state=RandomState(1))
+    pd.testing.assert_frame_equal(df1, df2)
+
+
+def test_synthetic_regions(tmp_path: Path):
+    num_regions = len(list_synthetic_regions()) + 5
+    dict_regions = return_dict_synthetic_regions(num_regions)
+    assert list(dict_regions) == list_synthetic_regions(num_regions)[-5:]
+    path_cases = generate_cases_csv(
+        str(tmp_path / "cases.csv"), num_regions=num_regions, num_years=1
+    )
+    list_code = [code for code, _ in dict_regions.values()]
+
+    with extend_regions(dict_regions):
+        # Synthetic regions are normalized by population and have a code
+        df = return_cases_matrix_normed(load_cases_df(link=path_cases))
+        assert set(list_code) <= set(df.columns)
+        df_scores = pd.DataFrame(
+            {"ocio": [0.5]}, index=pd.Index(["2020-10-01"], name="fecha")
+        )
+        doc = build_scores_document(df_scores, "region_00000", ["ocio"])
+        assert doc["code"] == "R00000"
+        assert list_synthetic_regions(num_regions)[-1] == "region_00004"
+    # The regions are removed after the block
+    df = return_cases_matrix_normed(load_cases_df(link=path_cases))
+    assert not set(list_code) & set(df.columns)
+    assert "R00000" not in ISOPROV_TO_POBLACION